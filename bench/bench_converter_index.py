@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Benchmarks converter table lookups against the number of registered classes,
+comparing the indexed TypeMatcher lookup to the original scan of every matcher.
+
+Usage::
+
+    $ python bench/bench_converter_index.py [--sizes 10 100 1000] [--calls 2000]
+
+"""
+from __future__ import print_function
+import sys
+import time
+import argparse
+
+from xdress.typesystem import TypeSystem, TypeMatcher, MatchAny
+
+
+class ScanningIndex(set):
+    """Reproduces the pre-index behavior, every miss checks every matcher."""
+
+    def match(self, t):
+        for tm in self:
+            if tm.matches(t):
+                return tm
+        return None
+
+
+def make_ts(nclasses, scanning=False):
+    """Creates a type system with nclasses registered classes, each of which
+    has converters for references to vectors and maps of itself."""
+    ts = TypeSystem()
+    conv = ts.cython_py2c_conv
+    for i in range(nclasses):
+        name = 'Class{0}'.format(i)
+        ts.register_classname(name, 'bench', 'bench', 'cpp_bench')
+        vec = conv[(('vector', name, 0), '&')]
+        conv[TypeMatcher((('vector', name, MatchAny), '&'))] = vec
+        conv[TypeMatcher(((('vector', name, MatchAny), 'const'), '&'))] = vec
+        conv[TypeMatcher((('map', 'str', name, MatchAny), '&'))] = vec
+    if scanning:
+        conv._tms = ScanningIndex(conv._tms)
+    return ts
+
+
+def lookups_per_second(ts, ncalls):
+    """Times lookups which miss the table, i.e. which are not yet known types,
+    since hits are stored and then found directly."""
+    conv = ts.cython_py2c_conv
+    t0 = time.time()
+    for i in range(ncalls):
+        (('vector', 'Unknown{0}'.format(i), 0), '&') in conv
+        (('Unknown{0}'.format(i), 'const'), '&') in conv
+    return 2 * ncalls / (time.time() - t0)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--calls', type=int, default=2000)
+    ns = parser.parse_args(args)
+    print("{0:>8} {1:>10} {2:>14} {3:>14} {4:>8}".format('classes', 'matchers',
+          'scan [1/s]', 'index [1/s]', 'speedup'))
+    for n in ns.sizes:
+        scanning = make_ts(n, scanning=True)
+        indexed = make_ts(n)
+        scan = lookups_per_second(scanning, ns.calls)
+        index = lookups_per_second(indexed, ns.calls)
+        print("{0:>8} {1:>10} {2:>14,.0f} {3:>14,.0f} {4:>7.1f}x".format(n,
+              len(indexed.cython_py2c_conv._tms), scan, index, index / scan))
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""Benchmarks GCC-XML class description time against header size, comparing
+the indexed GccxmlTree lookups to the original full-scan XPath queries.
+
+Usage::
+
+    $ python bench/bench_gccxml_index.py [--sizes 100 1000 10000] [--members 20]
+
+"""
+from __future__ import print_function
+import sys
+import time
+import argparse
+
+from xdress.astparsers import etree, GccxmlTree
+from xdress.autodescribe import GccxmlClassDescriber
+from xdress.typesystem import TypeSystem
+
+
+class ScanningGccxmlTree(GccxmlTree):
+    """Reproduces the pre-index behavior, every lookup is an XPath scan."""
+
+    def byid(self, id):
+        return self.tree.find(".//*[@id='{0}']".format(id))
+
+    def byname(self, name, tags=None):
+        elems = self.tree.findall(".//*[@name='{0}']".format(name))
+        if tags is None:
+            return elems
+        tags = (tags,) if isinstance(tags, str) else tags
+        return [e for e in elems if e.tag in tags]
+
+
+def make_gccxml(nclasses, nmembers):
+    """Creates a synthetic GCC-XML document with nclasses classes, each of which
+    has nmembers fields and nmembers methods."""
+    root = etree.Element('GCC_XML')
+    etree.SubElement(root, 'Namespace', id='_1', name='::', members='')
+    etree.SubElement(root, 'File', id='f1', name='bench.h')
+    etree.SubElement(root, 'FundamentalType', id='_2', name='int')
+    etree.SubElement(root, 'FundamentalType', id='_3', name='double')
+    etree.SubElement(root, 'FundamentalType', id='_4', name='void')
+    n = 5
+    for c in range(nclasses):
+        cid = '_{0}'.format(n)
+        n += 1
+        members = []
+        for m in range(nmembers):
+            fid, mid = '_{0}'.format(n), '_{0}'.format(n + 1)
+            n += 2
+            members += [fid, mid]
+            etree.SubElement(root, 'Field', id=fid, name='f{0}'.format(m),
+                             type='_2', context=cid, access='public', file='f1')
+            meth = etree.SubElement(root, 'Method', id=mid, name='m{0}'.format(m),
+                                    returns='_4', context=cid, access='public',
+                                    file='f1')
+            etree.SubElement(meth, 'Argument', name='x', type='_3')
+        etree.SubElement(root, 'Class', id=cid, name='C{0}'.format(c), context='_1',
+                         file='f1', bases='', members=' '.join(members))
+    return etree.ElementTree(root)
+
+
+def time_describe(root, name, ts, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.time()
+        describer = GccxmlClassDescriber(name, root, onlyin='bench.h', ts=ts)
+        describer.visit()
+        best = min(best, time.time() - t0)
+    return best
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        default=[100, 300, 1000, 3000])
+    parser.add_argument('--members', type=int, default=20)
+    ns = parser.parse_args(args)
+    ts = TypeSystem()
+    print("{0:>8} {1:>10} {2:>12} {3:>12} {4:>9}".format('classes', 'nodes',
+          'scan [s]', 'index [s]', 'speedup'))
+    for size in ns.sizes:
+        tree = make_gccxml(size, ns.members)
+        nnodes = len(list(tree.getroot().iter()))
+        name = 'C{0}'.format(size - 1)  # worst case, last in the document
+        ts.register_classname(name, 'bench', 'bench', 'cpp_bench')
+        scanning = ScanningGccxmlTree(tree)
+        t0 = time.time()
+        indexed = GccxmlTree(tree)
+        tindex = time.time() - t0
+        tscan = time_describe(scanning, name, ts)
+        tidx = time_describe(indexed, name, ts)
+        print("{0:>8} {1:>10} {2:>12.5f} {3:>12.5f} {4:>8.1f}x   "
+              "(index build {5:.5f} s)".format(size, nnodes, tscan, tidx,
+                                                tscan / tidx, tindex))
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Benchmarks loading GCC-XML output in full against the streaming, pruned
+loader, for a small user header which includes a large "system" header.
+
+Usage::
+
+    $ python bench/bench_gccxml_prune.py [--system 1000 10000] [--user 10]
+
+"""
+from __future__ import print_function
+import os
+import io
+import sys
+import time
+import argparse
+import tempfile
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from xdress.astparsers import etree, GccxmlTree, gccxml_load_pruned
+
+
+def make_gccxml(nsystem, nuser, nmembers=10):
+    """Creates a synthetic GCC-XML document with nsystem classes in a system
+    header and nuser classes in the user header.  Each user class has a field
+    whose type is one of the system classes."""
+    root = etree.Element('GCC_XML')
+    ns = etree.SubElement(root, 'Namespace', id='_1', name='::', members='')
+    etree.SubElement(root, 'FundamentalType', id='_2', name='int')
+    n = [3]
+    def nextid():
+        n[0] += 1
+        return '_{0}'.format(n[0])
+    def add_class(name, fid, fieldtype):
+        cid = nextid()
+        members = []
+        for m in range(nmembers):
+            mid = nextid()
+            members.append(mid)
+            etree.SubElement(root, 'Field', id=mid, name='f{0}'.format(m),
+                             type=fieldtype, context=cid, access='public',
+                             mangled='_ZN{0}f{1}E'.format(name, m),
+                             demangled='{0}::f{1}'.format(name, m),
+                             location='{0}:{1}'.format(fid, n[0]), file=fid,
+                             line=str(n[0]), offset='0')
+        etree.SubElement(root, 'Class', id=cid, name=name, context='_1', file=fid,
+                         members=' '.join(members), bases='', access='public',
+                         mangled='{0}{1}'.format(len(name), name),
+                         demangled=name, location='{0}:{1}'.format(fid, n[0]),
+                         line=str(n[0]), size='320', align='32')
+        return cid
+    sysids = [add_class('S{0}'.format(i), 'f2', '_2') for i in range(nsystem)]
+    userids = [add_class('U{0}'.format(i), 'f1', sysids[i % nsystem])
+               for i in range(nuser)]
+    ns.attrib['members'] = ' '.join(sysids + userids)
+    etree.SubElement(root, 'File', id='f1', name='user.h')
+    etree.SubElement(root, 'File', id='f2', name='system.h')
+    return etree.ElementTree(root)
+
+
+def measure(func):
+    if tracemalloc is not None:
+        tracemalloc.start()
+    t0 = time.time()
+    tree = GccxmlTree(func())
+    dt = time.time() - t0
+    peak = 0
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return tree, dt, peak / 2.0**20
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--system', nargs='+', type=int,
+                        default=[1000, 10000, 30000])
+    parser.add_argument('--user', type=int, default=10)
+    ns = parser.parse_args(args)
+    print("{0:>8} {1:>10} {2:>10} {3:>10} {4:>10} {5:>10} {6:>10}".format(
+          'system', 'full [s]', 'full [MB]', 'prune [s]', 'prune [MB]',
+          'full ids', 'prune ids'))
+    tmpdir = tempfile.mkdtemp()
+    xmlname = os.path.join(tmpdir, 'bench.xml')
+    for size in ns.system:
+        make_gccxml(size, ns.user).write(xmlname)
+        def full():
+            with io.open(xmlname, 'rb') as f:
+                return etree.parse(f)
+        ftree, ft, fm = measure(full)
+        ptree, pt, pm = measure(lambda: gccxml_load_pruned(xmlname, set(['user.h'])))
+        print("{0:>8} {1:>10.4f} {2:>10.1f} {3:>10.4f} {4:>10.1f} {5:>10} "
+              "{6:>10}".format(size, ft, fm, pt, pm, len(ftree.ids),
+                               len(ptree.ids)))
+    os.remove(xmlname)
+    os.rmdir(tmpdir)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""Benchmarks memoized TypeSystem queries, such as canon() and cython_ctype(),
+in calls per second, comparing utils.memoize_method to the original partial-
+and ishashable-based memoizer.
+
+Usage::
+
+    $ python bench/bench_memoize.py [--calls 200000]
+
+"""
+from __future__ import print_function
+import sys
+import time
+import argparse
+import functools
+
+from xdress.utils import memoize_method, ishashable
+from xdress.typesystem import TypeSystem
+
+
+class legacy_memoize_method(object):
+    """Reproduces the original memoizer, which builds a partial on every
+    attribute access and walks the key with ishashable() on every call."""
+
+    def __init__(self, meth):
+        self.meth = meth
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self.meth
+        p = functools.partial(self, obj)
+        p.__doc__ = self.meth.__doc__
+        p.__name__ = self.meth.__name__
+        return p
+
+    def __call__(self, *args, **kwargs):
+        obj = args[0]
+        cache = obj._legacy_cache = getattr(obj, '_legacy_cache', {})
+        key = (self.meth, args[1:], tuple(sorted(kwargs.items())))
+        if ishashable(key):
+            if key not in cache:
+                cache[key] = self.meth(*args, **kwargs)
+            return cache[key]
+        else:
+            return self.meth(*args, **kwargs)
+
+
+class LegacyTypeSystem(TypeSystem):
+    pass
+
+for _name, _attr in list(TypeSystem.__dict__.items()):
+    if isinstance(_attr, memoize_method):
+        setattr(LegacyTypeSystem, _name, legacy_memoize_method(_attr.meth))
+
+
+TYPES = ['int32', 'float64', 'complex128', 'str', ('vector', 'float64'),
+         ('set', 'int32'), ('map', 'str', 'int32'), ('int32', '*'),
+         ('float64', '&')]
+
+METHODS = ['canon', 'cython_ctype', 'cython_c2py', 'cython_py2c']
+"""The queries to benchmark, the converters also take a variable name."""
+
+
+def calls_per_second(ts, meth, ncalls):
+    argss = [(t,) if meth in ('canon', 'cython_ctype') else ('x', t)
+             for t in TYPES]
+    for args in argss:
+        getattr(ts, meth)(*args)  # warm the memo
+    nrounds = max(ncalls // len(argss), 1)
+    t0 = time.time()
+    for _ in range(nrounds):
+        for args in argss:
+            getattr(ts, meth)(*args)
+    return nrounds * len(argss) / (time.time() - t0)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200000)
+    ns = parser.parse_args(args)
+    print("{0:<14} {1:>14} {2:>14} {3:>8}".format('method', 'legacy [1/s]',
+                                                  'current [1/s]', 'speedup'))
+    for meth in METHODS:
+        legacy = calls_per_second(LegacyTypeSystem(), meth, ns.calls)
+        current = calls_per_second(TypeSystem(), meth, ns.calls)
+        print("{0:<14} {1:>14,.0f} {2:>14,.0f} {3:>7.1f}x".format(meth, legacy,
+              current, current / legacy))
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""Benchmarks the wall time of short xdress command lines, such as --help,
+each in a fresh interpreter, and lists which heavy modules they import.
+
+Usage::
+
+    $ python bench/bench_startup.py [--repeat 10] [--plugins xdress.autoall ...]
+
+"""
+from __future__ import print_function
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+HEAVY_MODULES = ('numpy', 'pycparser', 'lxml.etree', 'xdress.clang.cindex',
+                 'Cython')
+
+SCRIPT = """
+import sys, time
+t0 = time.time()
+sys.argv = ['xdress'] + {argv!r}
+from xdress.main import main
+try:
+    main()
+except SystemExit:
+    pass
+sys.stderr.write('XDRESS-STARTUP {{0}} {{1}}\\n'.format(time.time() - t0,
+    ' '.join([m for m in {heavy!r} if m in sys.modules])))
+"""
+
+def run(argv, env):
+    script = SCRIPT.format(argv=argv, heavy=HEAVY_MODULES)
+    t0 = time.time()
+    p = subprocess.Popen([sys.executable, '-c', script], env=env,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, err = p.communicate()
+    total = time.time() - t0
+    for line in err.decode().splitlines():
+        if line.startswith('XDRESS-STARTUP'):
+            _, dt, heavy = (line + ' ').split(' ', 2)
+            return total, float(dt), heavy.strip()
+    raise RuntimeError(err.decode())
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--plugins', nargs='+', default=None)
+    ns = parser.parse_args(args)
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    plugins = [] if ns.plugins is None else ['--plugins'] + ns.plugins
+    cmds = [['--help'], ['--bash-completion', '--help'], ['--dumpdesc', '--help']]
+    print("{0:<32} {1:>10} {2:>10}  {3}".format('command', 'total [ms]',
+                                               'xdress [ms]', 'heavy imports'))
+    for cmd in cmds:
+        argv = plugins + cmd
+        run(argv, env)  # warm the bytecode cache
+        times = [run(argv, env) for i in range(ns.repeat)]
+        total = min([t[0] for t in times]) * 1e3
+        dt = min([t[1] for t in times]) * 1e3
+        print("{0:<32} {1:>10.1f} {2:>10.1f}  {3}".format(' '.join(cmd), total,
+                                                         dt, times[0][2]))
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,314 @@
+from __future__ import print_function
+import os
+import io
+from glob import glob
+
+from xdress.astparsers import etree, GccxmlTree, gccxml_tree, artifact_filename, \
+    artifact_dependencies, artifact_isvalid, ParserCache, gccxml_load_pruned, \
+    shared_artifact_fetch, shared_artifact_store, normalize_flags, \
+    _memoize_parser, PARSER_CACHE, gccxml_parse, _PARSER_VERSIONS, clang_parse, \
+    clang_build_pch, clearmemo, dependencies, load_clang, PARSERS_AVAILABLE
+from xdress.utils import set_shared_cache
+
+from nose.tools import assert_equal, assert_true, assert_false, assert_is
+from tools import unit, cleanfs, skip_then_continue
+
+def make_gccxml():
+    root = etree.Element('GCC_XML')
+    etree.SubElement(root, 'File', id='f1', name='./joan.h')
+    etree.SubElement(root, 'File', id='f2', name='hoover.h')
+    etree.SubElement(root, 'FundamentalType', id='_1', name='int')
+    etree.SubElement(root, 'Class', id='_2', name='Joan', file='f1', members='_3')
+    etree.SubElement(root, 'Field', id='_3', name='arc', type='_1', file='f1')
+    etree.SubElement(root, 'Struct', id='_4', name='Joan', file='f2')
+    enum = etree.SubElement(root, 'Enumeration', id='_5', name='Leslie', file='f2')
+    etree.SubElement(enum, 'EnumValue', name='HuaMulan', init='0')
+    return etree.ElementTree(root)
+
+@unit
+def test_gccxml_tree_byid():
+    tree = GccxmlTree(make_gccxml())
+    assert_equal(tree.byid('_3').attrib['name'], 'arc')
+    assert_is(tree.byid('_42'), None)
+
+@unit
+def test_gccxml_tree_byname():
+    tree = GccxmlTree(make_gccxml())
+    assert_equal([e.tag for e in tree.byname('Joan')], ['Class', 'Struct'])
+    assert_equal(tree.findname('Joan', 'Struct').attrib['id'], '_4')
+    assert_equal(tree.findname('HuaMulan').tag, 'EnumValue')
+    assert_is(tree.findname('Joan', 'Union'), None)
+
+@unit
+def test_gccxml_tree_files():
+    tree = GccxmlTree(make_gccxml())
+    assert_equal(tree.fileid('joan.h'), 'f1')
+    assert_equal(tree.fileid('hoover.h'), 'f2')
+    assert_is(tree.fileid('edgar.h'), None)
+    assert_equal([e.attrib['id'] for e in tree.byfile('f2')], ['_4', '_5'])
+    assert_equal(len(tree.bytag('File')), 2)
+
+@unit
+def test_gccxml_tree_passthrough():
+    raw = make_gccxml()
+    tree = gccxml_tree(raw)
+    assert_true(isinstance(tree, GccxmlTree))
+    assert_is(gccxml_tree(tree), tree)
+    assert_equal(tree.find("Class").attrib['id'], '_2')
+
+@unit
+def test_artifact_filename():
+    a = artifact_filename(os.path.join('src', 'joan.h'), 'build', '.xml',
+                          'gccxml', ['-DX'])
+    b = artifact_filename(os.path.join('src', 'joan.h'), 'build', '.xml',
+                          'gccxml', ['-DY'])
+    assert_true(os.path.basename(a).startswith('src_joan.'))
+    assert_true(a.endswith('.xml'))
+    assert_true(a != b)
+
+@unit
+def test_artifact_isvalid():
+    builddir = os.path.join('build', 'artifacts')
+    cleanfs([('build', 'artifacts')])
+    os.makedirs(builddir)
+    header = os.path.join(builddir, 'joan.h')
+    artname = os.path.join(builddir, 'joan.xml')
+    for fname in header, artname:
+        with io.open(fname, 'w') as f:
+            f.write(u'int arc;\n')
+    assert_false(artifact_isvalid(artname))
+    artifact_dependencies(artname, [header, '<built-in>'])
+    assert_true(artifact_isvalid(artname))
+    # touching the file changes the mtime but not the contents
+    st = os.stat(header)
+    os.utime(header, (st.st_atime, st.st_mtime + 10))
+    assert_true(artifact_isvalid(artname))
+    with io.open(header, 'w') as f:
+        f.write(u'int arc, hoover;\n')
+    assert_false(artifact_isvalid(artname))
+    cleanfs([('build', 'artifacts')])
+
+@unit
+def test_normalize_flags():
+    assert_equal(normalize_flags(['a ', 'b', 'a'], ['Y', 'X=1']),
+                 ((), ('a', 'b'), ('X=1', 'Y'), (), ()))
+    assert_equal(normalize_flags(defines=['X=2', 'X=1']), 
+                 ((), (), ('X=2', 'X=1'), (), ()))
+
+@unit
+def test_shared_artifact():
+    cleanfs([('build', 'shared')])
+    shared = set_shared_cache(os.path.join('build', 'shared', 'cache'))
+    header = os.path.join('build', 'shared', 'joan.h')
+    artname = os.path.join('build', 'shared', 'a', 'joan.xml')
+    othername = os.path.join('build', 'shared', 'b', 'joan.xml')
+    os.makedirs(os.path.dirname(artname))
+    for fname in header, artname:
+        with io.open(fname, 'w') as f:
+            f.write(u'int arc;\n')
+    flags = normalize_flags(['a'])
+    assert_false(shared_artifact_fetch(othername, header, '.xml', 'gccxml', flags))
+    artifact_dependencies(artname, [header])
+    shared_artifact_store(artname, header, '.xml', 'gccxml', flags)
+    assert_false(shared_artifact_fetch(othername, header, '.xml', 'gccxml', ()))
+    assert_true(shared_artifact_fetch(othername, header, '.xml', 'gccxml', flags))
+    assert_true(artifact_isvalid(othername))
+    with io.open(othername) as f:
+        assert_equal(f.read(), u'int arc;\n')
+    with io.open(header, 'w') as f:
+        f.write(u'int arc, hoover;\n')
+    assert_false(shared_artifact_fetch(othername, header, '.xml', 'gccxml', flags))
+    set_shared_cache(None)
+    cleanfs([('build', 'shared')])
+
+@unit
+def test_gccxml_failure_drops_stale_output():
+    cleanfs([('build', 'failing')])
+    builddir = os.path.join('build', 'failing')
+    bindir = os.path.join(builddir, 'bin')
+    os.makedirs(bindir)
+    fake = os.path.join(bindir, 'gccxml')
+    with io.open(fake, 'w') as f:
+        f.write(u'#!/bin/sh\nexit 1\n')
+    os.chmod(fake, 0o755)
+    header = os.path.join(builddir, 'joan.h')
+    with io.open(header, 'w') as f:
+        f.write(u'int arc;\n')
+    path = os.environ['PATH']
+    os.environ['PATH'] = os.path.abspath(bindir) + os.pathsep + path
+    version = _PARSER_VERSIONS.pop('gccxml', None)
+    try:
+        xmlname = artifact_filename(header, builddir, '.xml', 'gccxml',
+                                    ['-DXDRESS'])
+        with io.open(xmlname, 'w') as f:
+            f.write(u'<GCC_XML/>\n')
+        artifact_dependencies(xmlname, [header])
+        with io.open(header, 'w') as f:
+            f.write(u'int arc, hoover;\n')
+        try:
+            gccxml_parse(header, builddir=builddir)
+        except RuntimeError:
+            pass
+        else:
+            assert False, 'the failed run was not reported'
+        assert_false(os.path.exists(xmlname))
+        assert_false(os.path.exists(xmlname + '.deps'))
+    finally:
+        os.environ['PATH'] = path
+        _PARSER_VERSIONS.pop('gccxml', None)
+        if version is not None:
+            _PARSER_VERSIONS['gccxml'] = version
+        cleanfs([('build', 'failing')])
+
+def write_joan(builddir, hoover=u'struct Hoover { int fbi; };\n'):
+    with io.open(os.path.join(builddir, 'hoover.h'), 'w') as f:
+        f.write(hoover)
+    joan = os.path.join(builddir, 'joan.h')
+    with io.open(joan, 'w') as f:
+        f.write(u'#include "hoover.h"\nstruct Joan { Hoover arc; };\n')
+    return joan
+
+@unit
+def test_clang_serialized_tu():
+    if not PARSERS_AVAILABLE['clang']:
+        skip_then_continue('clang unavailable')
+    cleanfs([('build', 'clangtu')])
+    builddir = os.path.join('build', 'clangtu')
+    os.makedirs(builddir)
+    joan = write_joan(builddir)
+    clearmemo()
+    clang_parse(joan, includes=[builddir], builddir=builddir)
+    astnames = glob(os.path.join(builddir, '*.ast'))
+    assert_equal(len(astnames), 1)
+    astname = astnames[0]
+    assert_true(artifact_isvalid(astname))
+    assert_true(os.path.abspath(os.path.join(builddir, 'hoover.h')) in 
+                dependencies(joan))
+    # a second parse loads the saved translation unit rather than reparsing
+    os.utime(astname, (1, 1))
+    clearmemo()
+    clang_parse(joan, includes=[builddir], builddir=builddir)
+    assert_equal(os.path.getmtime(astname), 1)
+    # changing an include invalidates it
+    write_joan(builddir, u'struct Hoover { int fbi, cia; };\n')
+    assert_false(artifact_isvalid(astname))
+    clearmemo()
+    tu = clang_parse(joan, includes=[builddir], builddir=builddir)
+    assert_true(os.path.getmtime(astname) > 1)
+    fields = [c.spelling for c in tu.cursor.walk_preorder() 
+              if c.kind == load_clang().CursorKind.FIELD_DECL]
+    assert_true('cia' in fields)
+    clearmemo()
+    cleanfs([('build', 'clangtu')])
+
+@unit
+def test_clang_pch():
+    if not PARSERS_AVAILABLE['clang']:
+        skip_then_continue('clang unavailable')
+    cleanfs([('build', 'clangpch')])
+    builddir = os.path.join('build', 'clangpch')
+    os.makedirs(builddir)
+    joan = write_joan(builddir)
+    try:
+        pch = clang_build_pch(['hoover.h'], includes=[builddir], builddir=builddir)
+        assert_true(os.path.isfile(pch))
+        clearmemo()
+        clang_parse(joan, includes=[builddir], builddir=builddir)
+        assert_true(os.path.abspath(pch) in dependencies(joan))
+        # the precompiled header is reused while it is current
+        os.utime(pch, (1, 1))
+        assert_equal(clang_build_pch(['hoover.h'], includes=[builddir], 
+                                     builddir=builddir), pch)
+        assert_equal(os.path.getmtime(pch), 1)
+        # and dropped when there are no headers to precompile
+        assert_is(clang_build_pch([], builddir=builddir), None)
+        clearmemo()
+        clang_parse(joan, includes=[builddir], builddir=builddir)
+        assert_false(os.path.abspath(pch) in dependencies(joan))
+    finally:
+        clang_build_pch([])
+        clearmemo()
+        cleanfs([('build', 'clangpch')])
+
+class Sized(object):
+    def __init__(self, nbytes):
+        self.xdress_nbytes = nbytes
+
+@unit
+def test_parser_cache_lru():
+    cache = ParserCache(maxbytes=100)
+    cache['a'] = Sized(40)
+    cache['b'] = Sized(40)
+    cache['a']  # a is now more recently used than b
+    cache['c'] = Sized(40)
+    assert_true('a' in cache)
+    assert_false('b' in cache)
+    assert_true('c' in cache)
+    assert_equal(cache.nbytes, 80)
+    assert_equal(cache.evictions, 1)
+    # the most recent entry is kept even if it is over budget
+    cache['d'] = Sized(1000)
+    assert_equal(len(cache), 1)
+    assert_equal(cache.evictions, 3)
+
+@unit
+def test_parser_cache_invalidate():
+    cleanfs([('build', 'invalidate')])
+    os.makedirs(os.path.join('build', 'invalidate'))
+    joan = os.path.join('build', 'invalidate', 'joan.h')
+    with io.open(joan, 'w') as f:
+        f.write(u'int arc;\n')
+    mtime = os.stat(joan).st_mtime
+    cache = ParserCache()
+    cache.set(('parse', joan), Sized(10), stamp=mtime + 1)
+    cache.set(('parse', 'leslie.h'), Sized(10))
+    # files parsed after they were modified are kept
+    assert_equal(cache.invalidate([os.path.abspath('hoover.h'), joan]), 0)
+    cache.set(('parse', joan), Sized(10), stamp=mtime - 1)
+    assert_equal(cache.invalidate([os.path.abspath(joan)]), 1)
+    assert_false(('parse', joan) in cache)
+    assert_true(('parse', 'leslie.h') in cache)
+    assert_equal(cache.nbytes, 10)
+    cleanfs([('build', 'invalidate')])
+
+@unit
+def test_parser_memo_between_projects():
+    calls = []
+    @_memoize_parser
+    def joan_parse(filename, includes=(), verbose=False, builddir='build'):
+        calls.append((os.path.basename(os.getcwd()), filename))
+        return Sized(10)
+    here = os.getcwd()
+    joan = os.path.abspath('joan.h')
+    include = os.path.abspath('include')
+    cleanfs([('build', 'memo')])
+    try:
+        for proj in ('hua', 'mulan'):
+            projdir = os.path.join(here, 'build', 'memo', proj)
+            os.makedirs(projdir)
+            os.chdir(projdir)
+            joan_parse(joan, includes=[include], builddir=proj + '-build', 
+                       verbose=True)
+            joan_parse('joan.h', includes=[include])
+            os.chdir(here)
+    finally:
+        os.chdir(here)
+        for key in [k for k in PARSER_CACHE.data if k[0] == 'joan_parse']:
+            PARSER_CACHE._pop(key)
+    # absolute paths are parsed once, relative ones once per directory
+    assert_equal(calls, [('hua', joan), ('hua', 'joan.h'), ('mulan', 'joan.h')])
+    cleanfs([('build', 'memo')])
+
+@unit
+def test_gccxml_load_pruned():
+    cleanfs([('build', 'pruned')])
+    os.makedirs(os.path.join('build', 'pruned'))
+    xmlname = os.path.join('build', 'pruned', 'joan.xml')
+    make_gccxml().write(xmlname)
+    tree = GccxmlTree(gccxml_load_pruned(xmlname, set(['joan.h'])))
+    assert_equal(sorted(tree.ids), ['_1', '_2', '_3', 'f1', 'f2'])
+    assert_equal(tree.fileid('joan.h'), 'f1')
+    # unknown files load the whole tree
+    tree = GccxmlTree(gccxml_load_pruned(xmlname, set(['leslie.h'])))
+    assert_equal(len(tree.ids), 7)
+    cleanfs([('build', 'pruned')])
@@ -7,6 +7,7 @@ from xdress import autodescribe as ad
 from xdress.astparsers import PARSERS_AVAILABLE
 from xdress.utils import parse_global_rc, Arg
 
+from nose.tools import assert_equal, assert_true
 from tools import unit, assert_equal_or_diff, skip_then_continue, cleanfs
 
 from numpy.testing import dec
@@ -16,6 +17,10 @@ ts = TypeSystem()
 if not os.path.isdir('build'):
     os.mkdir('build')
 
+def teardown_module():
+    # removes the pycparser artifacts of device.c
+    cleanfs([('build', 'device.*')])
+
 base = ('Base', 'int32', 7, 0)
 def exp_base_desc(parser):
     # TODO: The results depend on the parser since gccxml misses stuff
@@ -328,6 +333,50 @@ def test_pycparser_describe_device_descriptor_tag():
            }
     assert_equal_or_diff(obs, exp)
 
+@dec.skipif(ad.pycparser is None)
+@unit
+def test_pycparser_describe_many():
+    ts.register_class('DeviceDescriptorTag')
+    names_kinds = [('Device_measure', 'func'), ('DeviceDescriptorTag', 'class'),
+                   ('Device_Init', 'func')]
+    obs = ad.pycparser_describe_many('device.c', names_kinds, ts=ts)
+    exp = [ad.pycparser_describe('device.c', name, kind, ts=ts)
+           for name, kind in names_kinds]
+    assert_equal_or_diff(obs, exp)
+
+class FakeAttrs(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class FakeCursor(object):
+    """Just enough of a libclang cursor for ClangDeclIndex."""
+    def __init__(self, kind, spelling, filename=None, children=()):
+        self.kind = kind
+        self.spelling = spelling
+        self.location = FakeAttrs(file=FakeAttrs(name=filename) if filename else None)
+        self.children = list(children)
+
+    def get_children(self):
+        return iter(self.children)
+
+@unit
+def test_clang_decl_index():
+    fdecl = ad.cindex.CursorKind.FUNCTION_DECL
+    cdecl = ad.cindex.CursorKind.CLASS_DECL
+    joan = FakeCursor(fdecl, 'joan', 'arc.h')
+    hoover = FakeCursor(fdecl, 'joan', 'fbi.h')
+    inner = FakeCursor(cdecl, 'joan', 'arc.h')
+    ns = FakeCursor(ad.cindex.CursorKind.NAMESPACE, 'people', 'arc.h', [inner])
+    tu = FakeAttrs(cursor=FakeCursor(None, '', children=[joan, hoover, ns]))
+    onlyin = frozenset(['arc.h'])
+    index = ad.clang_decl_index(tu, onlyin)
+    assert_true(index is ad.clang_decl_index(tu, onlyin))
+    assert_equal(index.find('joan', (fdecl,)), [joan])
+    assert_equal(index.find('joan', (fdecl, cdecl)), [inner, joan])
+    assert_equal(index.find('joan', (cdecl,), namespace='people'), [inner])
+    assert_equal(index.find('joan', (fdecl,), namespace='people'), [])
+    assert_equal(ad.clang_find_decls(tu, 'joan', (fdecl,), None), [joan, hoover])
+
 if __name__ == '__main__':
     import nose
     nose.runmodule()
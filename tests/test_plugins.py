@@ -0,0 +1,99 @@
+from __future__ import print_function
+import os
+import io
+import sys
+import subprocess
+from nose.tools import assert_equal, assert_true, assert_false
+from tools import unit, cleanfs, stub_plugins
+from xdress.plugins import Plugins
+from xdress.main import run_projects
+
+@unit
+def test_dependency_graph():
+    plugins = Plugins(['xdress.stlwrap', 'xdress.autoall', 'xdress.autodescribe',
+                       'xdress.descfilter', 'xdress.cythongen'])
+    plugins.merge_rcs()
+    deps, detached = plugins.dependency_graph()
+    idx = dict([(name, i) for i, name in enumerate(plugins.modnames)])
+    named = lambda d: set([plugins.modnames[i] for i in d])
+    # code generation for dtypes & stl containers does not wait on parsing
+    assert_equal(named(deps[idx['xdress.dtypes']]), 
+                 set(['xdress.base', 'xdress.extratypes']))
+    assert_equal(named(deps[idx['xdress.autodescribe']]), set(['xdress.base']))
+    # descfilter does not declare its reads and writes
+    assert_equal(named(deps[idx['xdress.descfilter']]), 
+                 set(plugins.modnames[:idx['xdress.descfilter']]))
+    assert_equal(named(deps[idx['xdress.cythongen']]), 
+                 set(['xdress.autodescribe', 'xdress.descfilter']))
+    assert_equal([plugins.modnames[i] for i, d in enumerate(detached) if d],
+                 ['xdress.extratypes', 'xdress.dtypes', 'xdress.stlwrap', 
+                  'xdress.cythongen'])
+
+@unit
+def test_metadata_is_lazy():
+    # building the cli must not load the parser backends or numpy
+    script = ("import sys\n"
+              "from xdress.plugins import Plugins\n"
+              "plugins = Plugins(['xdress.autoall', 'xdress.cythongen', "
+              "'xdress.stlwrap', 'xdress.doxygen'])\n"
+              "plugins.build_cli()\n"
+              "plugins.merge_rcs()\n"
+              "mods = ['numpy', 'pycparser', 'lxml.etree', 'xdress.clang.cindex']\n"
+              "print(' '.join([m for m in mods if m in sys.modules]))\n")
+    out = subprocess.check_output([sys.executable, '-c', script])
+    assert_equal(out.decode().strip(), '')
+
+@unit
+def test_rerun():
+    plugins, calls = stub_plugins(['xdress.stlwrap', 'xdress.autoall', 
+        'xdress.autodescribe', 'xdress.descfilter', 'xdress.cythongen'], 
+        invalid=['xdress.autodescribe'])
+    rerun = plugins.rerun(['joan.h'])
+    # plugins which depend on autodescribe are re-run, the code generation 
+    # for dtypes and stl containers is not
+    assert_equal(rerun, ['xdress.autodescribe', 'xdress.descfilter', 
+                         'xdress.cythongen'])
+    assert_equal(calls, rerun)
+
+@unit
+def test_default_ts_per_run():
+    # projects run in the same process must not share a type system
+    rcs = [Plugins(['xdress.base']).merge_rcs() for i in range(2)]
+    assert_false(rcs[0].ts is rcs[1].ts)
+
+@unit
+def test_run_projects():
+    cleanfs([('build', 'projects')])
+    rcfiles = [os.path.join('build', 'projects', p, 'xdressrc.py') 
+               for p in ('joan', 'hoover')]
+    for rcfile in rcfiles:
+        os.makedirs(os.path.dirname(rcfile))
+    with io.open(rcfiles[0], 'w') as f:
+        f.write(u"plugins = ('xdress.base',)\npackage = 'joan'\n")
+    with io.open(rcfiles[1], 'w') as f:
+        f.write(u"plugins = ('xdress.base',\n")
+    for jobs in 1, 2:
+        failed = run_projects(rcfiles, jobs=jobs)
+        assert_equal([rcfile for rcfile, err in failed], rcfiles[1:])
+        assert_true(failed[0][1].startswith('SyntaxError: '))
+        assert_true(os.path.isfile(os.path.join('build', 'projects', 'joan', 
+                                                'joan', '__init__.py')))
+    cleanfs([('build', 'projects')])
+
+@unit
+def test_profile():
+    builddir = os.path.join('build', 'profiling')
+    profdir = os.path.join(builddir, 'profile')
+    for selected, exp in [([], ['xdress.autoall', 'xdress.base']), 
+                          (['autoall'], ['xdress.autoall'])]:
+        cleanfs([('build', 'profiling')])
+        plugins, calls = stub_plugins(['xdress.base', 'xdress.autoall'])
+        plugins.rc.builddir = builddir
+        plugins.rc.profile = selected
+        plugins.setup()
+        plugins.execute()
+        plugins.teardown()
+        obs = sorted(os.listdir(profdir))
+        assert_equal(obs, sorted([name + ext for name in exp 
+                                  for ext in ('.pstats', '.txt')]))
+    cleanfs([('build', 'profiling')])
@@ -0,0 +1,90 @@
+from __future__ import print_function
+import os
+import io
+import time
+import threading
+
+from nose.tools import assert_equal, assert_true
+from tools import unit, cleanfs, stub_plugins
+from xdress.session import Session, serve, request
+
+@unit
+def test_session():
+    stale = [None]
+    def describe(rc):
+        calls.append('xdress.autodescribe')
+        rc.stale_modules = stale[0]
+    def generate(rc):
+        calls.append(('xdress.cythongen', rc.stale_modules))
+    plugins, calls = stub_plugins(['xdress.stlwrap', 'xdress.autoall', 
+        'xdress.autodescribe', 'xdress.descfilter', 'xdress.cythongen'], 
+        invalid=['xdress.autodescribe'], 
+        execute={'xdress.autodescribe': describe, 'xdress.cythongen': generate})
+    gen = ['xdress.extratypes', 'xdress.dtypes', 'xdress.stlwrap', 
+           'xdress.cythongen']
+    s = Session(plugins=plugins)
+
+    # the describing plugins run once
+    s.describe()
+    assert_equal(calls, [n for n in plugins.modnames if n not in gen])
+    del calls[:]
+    s.describe()
+    assert_equal(calls, [])
+
+    # all modules are generated the first time
+    assert_equal(s.generate(), gen)
+    assert_equal(calls[-1], ('xdress.cythongen', None))
+    del calls[:]
+    assert_equal(s.generate(), [])
+
+    # then only those which autodescribe says are stale
+    assert_equal(s.invalidate(['joan.h']), ['xdress.autodescribe', 
+                 'xdress.descfilter', 'xdress.cythongen'])
+    stale[0] = set(['joan'])
+    s.generate()
+    assert_equal(calls, ['xdress.autodescribe', 'xdress.descfilter', 
+                         ('xdress.cythongen', set(['joan']))])
+    del calls[:]
+
+    # unless the modules are given
+    assert_equal(s.generate(modules=['mulan']), gen)
+    assert_equal(calls[-1], ('xdress.cythongen', set(['mulan'])))
+
+@unit
+def test_serve():
+    cleanfs([('build', 'serve')])
+    os.makedirs(os.path.join('build', 'serve'))
+    rcfile = os.path.join('build', 'serve', 'xdressrc.py')
+    with io.open(rcfile, 'w') as f:
+        f.write(u"plugins = ('xdress.base',)\n")  # no package, so setup fails
+    sockname = os.path.join('build', 'serve', 'xdress.sock')
+    def describe(rc):
+        rc.env = {'joan': {'Joan': {}, 'arc': {}, ('hoover',): {}}}
+    plugins, calls = stub_plugins(['xdress.base', 'xdress.autodescribe'], 
+                                  invalid=['xdress.autodescribe'], 
+                                  execute={'xdress.autodescribe': describe})
+    plugins.rc.rc = rcfile
+    s = Session(['--rc', rcfile], plugins=plugins)
+    server = threading.Thread(target=serve, args=(s, sockname))
+    server.start()
+    try:
+        for _ in range(100):
+            if os.path.exists(sockname):
+                break
+            time.sleep(0.05)
+        assert_equal(request(sockname, 'describe'), {'joan': ['Joan', 'arc']})
+        assert_equal(request(sockname, 'invalidate', paths=['joan.h']),
+                     ['xdress.autodescribe'])
+        # a broken run control file is reported, and the server keeps running
+        try:
+            request(sockname, 'invalidate', paths=[rcfile])
+        except RuntimeError as e:
+            assert_true('no package name given' in str(e))
+        else:
+            assert False, 'the failed reload was not reported'
+        assert_equal(request(sockname, 'describe'), {'joan': ['Joan', 'arc']})
+    finally:
+        request(sockname, 'shutdown')
+        server.join()
+    assert_true(not os.path.exists(sockname))
+    cleanfs([('build', 'serve')])
@@ -2,10 +2,11 @@ from __future__ import print_function
 import pprint
 import os
 
-from xdress.typesystem import MatchAny, TypeSystem, TypeMatcher, matches
+from xdress.typesystem import MatchAny, TypeSystem, TypeMatcher, matches, \
+    _TypeMatcherIndex
 from xdress.utils import Arg
 
-from nose.tools import assert_equal, with_setup
+from nose.tools import assert_equal, assert_true, with_setup
 from tools import unit
 
 # default typesystem
@@ -93,6 +94,42 @@ def test_canon():
         yield check_canon, t, exp            # Check that the case works,
         yield check_canon, ts.canon(t), exp  # And that it is actually canonical.
 
+@unit
+def test_intern():
+    t = ts.canon(('set', 'float'))
+    assert_true(t is ts.canon(('set', 'float64', 0)))
+    u = ts.intern(('map', ('int32', 'nucid'), ('set', 'float64', 0), 0))
+    assert_true(u[2] is t)
+    assert_true(u is ts.intern(tuple(['map', ('int32', 'nucid'), t, 0])))
+    unhashable = ('vector', ['int32'])
+    assert_true(ts.intern(unhashable) is unhashable)
+
+@unit
+def test_clearmemo():
+    ts = TypeSystem()
+    tm = TypeMatcher('int32')
+    t = ts.intern((('vector', 'int32'), '&'))
+    assert_true(tm.flatmatches(t))
+    ts.cython_functionname('float64')
+    ts.clearmemo()
+    assert_equal(len(ts._interned), 0)
+    assert_true(tm._flatmemo is None)
+    assert_equal(len(ts._cache[TypeSystem.cython_functionname]), 0)
+    assert_true(tm.flatmatches(t))
+
+
+@unit
+def test_delmemo():
+    ts = TypeSystem()
+    ts.cython_functionname('float64')
+    ts.cython_variablename('int32')
+    cache = ts._cache[TypeSystem.cython_functionname]
+    assert_true(ts.cython_functionname is ts.cython_variablename)
+    assert_equal(len(cache), 2)
+    ts.delmemo('cython_functionname', 'float64')
+    ts.delmemo(ts.cython_variablename, 'int32')
+    assert_equal(len(cache), 0)
+
 
 def check_basename(t, exp):
     obs = ts.basename(t)
@@ -546,6 +583,25 @@ def test_matches():
     for pattern, t, exp in type_matcher_cases:
         yield check_matches, pattern, t, exp
 
+def check_typematcher_index(index, t):
+    exp = [tm for tm in index if tm.matches(t)]
+    obs = [tm for tm in index.candidates(t) if tm.matches(t)]
+    assert_equal(exp, obs)
+
+@unit
+def test_typematcher_index():
+    patterns = [p1, MatchAny, 'float64', ('vector', MatchAny, '&'),
+                (('vector', MatchAny, 0), '&'), ((MatchAny, 'const'), '&'),
+                (('enum', MatchAny, MatchAny), '*'), ('map', 'int32', MatchAny, 0)]
+    index = _TypeMatcherIndex([TypeMatcher(p) for p in patterns])
+    types = [t for _, t, _ in type_matcher_cases] + ['int32', 
+             ('vector', 'float64', '&'), (('vector', 'int32', 0), '&'),
+             (('vector', 'int32', 0), 'const'), (('str', 'const'), '&'),
+             (('enum', 'Fish', (('A', 1),)), '*'), ('map', 'int32', 'str', 0),
+             ('map', 'str', 'int32', 0), ('set', ['int32'], 0), ()]
+    for t in types:
+        yield check_typematcher_index, index, t
+
 def check_strip_predicates(t, exp):
     obs = ts.strip_predicates(t)
     assert_equal(exp, obs)
@@ -1,15 +1,19 @@
 from __future__ import print_function
 import os
+import json
 
 import numpy as np
 
+from xdress import utils
 from xdress.utils import NotSpecified, RunControl, flatten, split_template_args, \
     ishashable, memoize, memoize_method, apiname, ensure_apiname, sortedbytype, \
-    c_literal, touch
+    c_literal, touch, parallel_imap, DescriptionCache, FileDigests, \
+    CacheJournal, file_digest, SharedCache, CacheCounters, CACHE_COUNTERS, \
+    register_cache_counters, cache_report, Tracer, MemoryMonitor, FileWatcher
 
 from nose.tools import assert_equal, with_setup, assert_true, assert_false, \
     assert_not_equal
-from tools import unit
+from tools import unit, cleanfs
 
 @unit
 def test_rc_make():
@@ -122,6 +126,58 @@ def test_memoize_method():
     assert_equal(j.inc.__name__, "inc")
     assert_equal(j.inc.__doc__, "I am inc's docstr")
 
+@unit
+def test_memoize_method_keys():
+    class Hua(object):
+
+        def __init__(self):
+            self.call_count = 0
+
+        @memoize_method
+        def mulan(self, x, y=1):
+            self.call_count += 1
+            return x
+
+    h = Hua()
+    h.mulan(1)
+    h.mulan(1)
+    h.mulan(1, y=1)
+    h.mulan(1, y=1)
+    assert_equal(h.call_count, 2)
+    # unhashable arguments are not memoized
+    h.mulan([1])
+    h.mulan([1])
+    assert_equal(h.call_count, 4)
+    # each method has its own cache and is bound once per instance
+    assert_equal(list(h._cache.keys()), [Hua.mulan])
+    assert_equal(len(h._cache[Hua.mulan]), 2)
+    assert_true(h.mulan is h.mulan)
+    assert_true(Hua().mulan is not h.mulan)
+
+@unit
+def test_memoize_method_override():
+    class Joan(object):
+
+        @memoize_method
+        def arc(self, x):
+            return 'base'
+
+        hoover = arc
+
+    class Edgar(Joan):
+
+        def arc(self, x):
+            return 'sub:' + super(Edgar, self).arc(x)
+
+    e = Edgar()
+    assert_equal(e.arc(1), 'sub:base')
+    assert_equal(e.arc(1), 'sub:base')
+    assert_equal(len(e._cache[Joan.arc]), 1)
+    # aliases share one memo and are bound once per instance
+    j = Joan()
+    assert_true(j.arc is j.hoover)
+    assert_true(j.hoover is j.hoover)
+
 def check_ensure_apiname(x, exp):
     obs = ensure_apiname(x)
     print(exp)
@@ -197,3 +253,268 @@ def test_literal():
         }
     for s, x in cases.items():
         yield check_literal, s, x
+
+def _square(x):
+    return x*x
+
+@unit
+def test_parallel_imap():
+    exp = [x*x for x in range(10)]
+    for jobs in (1, 3):
+        obs = list(parallel_imap(_square, range(10), jobs=jobs))
+        yield assert_equal, obs, exp
+
+@unit
+def test_description_cache_dependencies():
+    cleanfs([('build', 'depcache')])
+    os.makedirs(os.path.join('build', 'depcache'))
+    src = os.path.join('build', 'depcache', 'joan.h')
+    inc = os.path.join('build', 'depcache', 'arc.h')
+    for fname in src, inc:
+        with open(fname, 'w') as f:
+            f.write('int x;\n')
+    cache = DescriptionCache(os.path.join('build', 'depcache', 'desc.cache'))
+    name = ensure_apiname(('Joan', src, 'joan'))
+    cache.set((name, 'class'), {'name': 'Joan'}, dependencies=[src, inc])
+    assert_true(cache.isvalid(name, 'class'))
+    assert_equal(cache[name, 'class'], {'name': 'Joan'})
+    with open(inc, 'w') as f:
+        f.write('int x, y;\n')
+    assert_false(cache.isvalid(name, 'class'))
+    cleanfs([('build', 'depcache')])
+
+@unit
+def test_description_cache_lazy():
+    cleanfs([('build', 'lazycache')])
+    os.makedirs(os.path.join('build', 'lazycache'))
+    src = os.path.join('build', 'lazycache', 'joan.h')
+    with open(src, 'w') as f:
+        f.write('int x;\n')
+    cachefile = os.path.join('build', 'lazycache', 'desc.cache')
+    cache = DescriptionCache(cachefile)
+    names = [ensure_apiname((n, src, 'joan')) for n in ('Joan', 'Arc', 'Orleans')]
+    for name in names:
+        cache[name, 'class'] = {'name': name.srcname}
+    del cache[names[2], 'class']
+    # no dump(), as if the run was interrupted
+    cache = DescriptionCache(cachefile)
+    assert_equal(cache.cache, {})
+    assert_equal(len(cache), 2)
+    assert_equal(cache[names[1], 'class'], {'name': 'Arc'})
+    assert_equal(len(cache.cache), 1)
+    assert_false(cache.isvalid(names[2], 'class'))
+    cache.dump()
+    cache.close()
+    cleanfs([('build', 'lazycache')])
+
+@unit
+def test_description_cache_migrate():
+    cleanfs([('build', 'migcache')])
+    os.makedirs(os.path.join('build', 'migcache'))
+    src = os.path.join('build', 'migcache', 'joan.h')
+    with open(src, 'w') as f:
+        f.write('int x;\n')
+    cachefile = os.path.join('build', 'migcache', 'desc.cache')
+    name = ensure_apiname(('Joan', src, 'joan'))
+    journal = CacheJournal(cachefile)
+    key = tuple(name) + ('class',)
+    journal.compact({key: ((file_digest(src),), {'name': 'Joan'}, {})})
+    cache = DescriptionCache(cachefile)
+    assert_true(cache.isvalid(name, 'class'))
+    assert_equal(cache[name, 'class'], {'name': 'Joan'})
+    cache.close()
+    cleanfs([('build', 'migcache')])
+
+@unit
+def test_cache_journal_torn_tail():
+    cleanfs([('build', 'torn')])
+    journalfile = os.path.join('build', 'torn', 'desc.cache.journal')
+    journal = CacheJournal(os.path.join('build', 'torn', 'desc.cache'))
+    journal.append('a', 'x' * 20)
+    journal.close()
+    size = os.path.getsize(journalfile)
+    journal.append('b', 'y' * 20)
+    journal.close()
+    with open(journalfile, 'rb') as f:
+        full = f.read()
+    for cut in range(1, len(full) - size):
+        with open(journalfile, 'wb') as f:
+            f.write(full[:-cut])
+        journal = CacheJournal(os.path.join('build', 'torn', 'desc.cache'))
+        assert_equal(journal.load(), {'a': 'x' * 20})
+        journal.append('c', 'z' * 20)
+        journal.close()
+        journal = CacheJournal(os.path.join('build', 'torn', 'desc.cache'))
+        assert_equal(journal.load(), {'a': 'x' * 20, 'c': 'z' * 20})
+    cleanfs([('build', 'torn')])
+
+@unit
+def test_file_digests():
+    cleanfs([('build', 'digests')])
+    os.makedirs(os.path.join('build', 'digests'))
+    fname = os.path.join('build', 'digests', 'joan.h')
+    with open(fname, 'w') as f:
+        f.write('int x;\n')
+    old = os.path.getmtime(fname) - 60.0
+    os.utime(fname, (old, old))
+    digests = FileDigests()
+    digests.load(os.path.join('build', 'digests', 'filedigest.cache'))
+    d = digests.digest(fname)
+    assert_equal(digests.digest(fname), d)
+    assert_equal(digests.hashed, 1)
+    digests.dump()
+    # a new run trusts the persisted stat info
+    digests = FileDigests()
+    digests.load(os.path.join('build', 'digests', 'filedigest.cache'))
+    assert_equal(digests.digest(fname), d)
+    assert_equal(digests.hashed, 0)
+    with open(fname, 'w') as f:
+        f.write('int x, y;\n')
+    assert_true(digests.digest(fname) != d)
+    assert_equal(digests.hashed, 1)
+    cleanfs([('build', 'digests')])
+
+@unit
+def test_file_watcher():
+    cleanfs([('build', 'watcher')])
+    os.makedirs(os.path.join('build', 'watcher'))
+    joan = os.path.join('build', 'watcher', 'joan.h')
+    arc = os.path.join('build', 'watcher', 'arc.h')
+    with open(joan, 'w') as f:
+        f.write('int x;\n')
+    watcher = FileWatcher([joan, arc])
+    assert_equal(watcher.changed(), [])
+    with open(joan, 'w') as f:
+        f.write('int x, y;\n')
+    with open(arc, 'w') as f:  # created
+        f.write('int z;\n')
+    assert_equal(watcher.wait(0.01), sorted([os.path.abspath(joan), 
+                                             os.path.abspath(arc)]))
+    assert_equal(watcher.changed(), [])
+    # pending changes survive re-watching
+    os.remove(arc)
+    watcher.watch([joan, arc])
+    assert_equal(watcher.changed(), [os.path.abspath(arc)])
+    cleanfs([('build', 'watcher')])
+
+@unit
+def test_shared_cache():
+    cleanfs([('build', 'sharedcache')])
+    shared = SharedCache(os.path.join('build', 'sharedcache'))
+    keys = [SharedCache.key('joan', i) for i in range(4)]
+    assert_equal(len(set(keys)), 4)
+    assert_true(shared.get(keys[0]) is None)
+    for i, key in enumerate(keys):
+        shared.put(key, 'x' * 1000)
+        path = shared.path(key, '.pkl')
+        os.utime(path, (i, i))
+    assert_equal(shared.get(keys[0]), 'x' * 1000)  # touches it
+    assert_equal(shared.hits, 1)
+    assert_equal(shared.misses, 1)
+    nremoved, nbytes = shared.evict(2 * shared.size() // 3)
+    assert_equal(nremoved, 2)
+    assert_true(shared.get(keys[1]) is None)
+    assert_true(shared.get(keys[2]) is None)
+    assert_true(shared.get(keys[0]) is not None)
+    assert_true(shared.get(keys[3]) is not None)
+    cleanfs([('build', 'sharedcache')])
+
+@unit
+def test_cache_counters():
+    c = CacheCounters('joan')
+    assert_true(c.saved() is None)
+    c.incr('hits', 3)
+    c.incr('misses')
+    c.add_time('compute', 2.0)
+    c.add_time('load', 0.5)
+    with c.timer('dump'):
+        pass
+    assert_equal(c['hits'], 3)
+    assert_equal(c['stale'], 0)
+    assert_equal(c.saved(), 5.5)
+    assert_equal(sorted(c.todict()['times']), ['compute', 'dump', 'load'])
+    register_cache_counters(c)
+    try:
+        lines = [l for l in cache_report().splitlines() if l.startswith('joan ')]
+        assert_equal(len(lines), 1)
+        assert_equal(lines[0].split()[1:5], ['3', '1', '75.0', '2.500'])
+    finally:
+        del CACHE_COUNTERS['joan']
+
+@unit
+def test_tracer():
+    cleanfs([('build', 'trace.json')])
+    tracer = Tracer()
+    with tracer.span('ignored'):
+        pass
+    assert_equal(tracer.events, [])
+    tracer.enable()
+    with tracer.span('outer', 'joan'):
+        with tracer.span('inner', 'joan', names=['arc']):
+            pass
+    inner, outer = tracer.events
+    assert_equal(outer['name'], 'outer')
+    assert_equal(inner['args']['names'], ['arc'])
+    assert_true(outer['ts'] <= inner['ts'])
+    assert_true(inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur'])
+    assert_true('cpu_ms' in outer['args'])
+    tracer.dump(os.path.join('build', 'trace.json'))
+    with open(os.path.join('build', 'trace.json')) as f:
+        trace = json.load(f)
+    assert_equal(len(trace['traceEvents']), 3)
+    assert_equal(trace['traceEvents'][0]['ph'], 'M')
+    cleanfs([('build', 'trace.json')])
+
+@unit
+def test_memory_monitor():
+    freed = []
+    mon = MemoryMonitor(max_mb=1e-3)
+    mon.add_reliever('joan', lambda: freed.append(1))
+    assert_equal(mon.check('here'), ['joan'])
+    assert_equal(len(freed), 1)
+    mon.max_mb = None
+    assert_equal(mon.check('here'), [])
+    mon.start()
+    if not mon.tracing:
+        return
+    try:
+        with mon.stage('outer'):
+            with mon.stage('inner'):
+                x = [None] * 2**17
+            del x
+    finally:
+        mon.stop()
+    inner, outer = mon.records
+    assert_equal(inner['name'], 'inner')
+    assert_equal(inner['depth'], 1)
+    assert_true(inner['end'] - inner['start'] >= 2**20)
+    assert_true(outer['peak'] >= inner['peak'])
+    assert_true(mon.report().splitlines()[2].startswith('  inner'))
+
+@unit
+def test_memory_monitor_hysteresis():
+    rss = [90.0]
+    current_rss_mb = utils.current_rss_mb
+    utils.current_rss_mb = lambda: rss[0]
+    try:
+        freed = []
+        mon = MemoryMonitor(max_mb=100.0)
+        mon.add_reliever('joan', lambda: freed.append(1))
+        # RSS stays high, since freed memory is seldom given back
+        with mon.stage('outer'):
+            for i in range(10):
+                with mon.stage('inner'):
+                    pass
+        assert_equal(len(freed), 1)
+        # until it grows further
+        rss[0] = 96.0
+        assert_equal(mon.check('here'), ['joan'])
+        assert_equal(mon.check('here'), [])
+        # or drops below the soft limit and crosses it again
+        rss[0] = 50.0
+        assert_equal(mon.check('here'), [])
+        rss[0] = 85.0
+        assert_equal(mon.check('here'), ['joan'])
+        assert_equal(len(freed), 3)
+    finally:
+        utils.current_rss_mb = current_rss_mb
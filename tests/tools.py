@@ -16,6 +16,8 @@ from nose.tools import assert_true, assert_equal
 from nose.plugins.attrib import attr
 from nose.plugins.skip import SkipTest
 
+from xdress.plugins import Plugins
+
 if sys.version_info[0] >= 3:
     basestring = str
 
@@ -36,6 +38,26 @@ def cleanfs(paths):
                 shutil.rmtree(p)
                 print(' -- removed {0!r}'.format(p))
 
+def stub_plugins(modnames, invalid=(), execute=None):
+    """Loads the plugins for the given module names and merges their run 
+    control, but replaces their hooks with stubs so that the plugin machinery
+    may be tested without doing any actual work.  The stub execute() appends
+    the plugin's module name to a list of calls, unless a function of rc is 
+    given for that name in the execute dict.  Only the plugins named in 
+    invalid are invalidated by changed paths.  Returns the plugins and the 
+    list of calls.
+    """
+    plugins = Plugins(modnames)
+    plugins.merge_rcs()
+    calls = []
+    execute = execute or {}
+    for name, plugin in zip(plugins.modnames, plugins.plugins):
+        plugin.setup = plugin.teardown = lambda rc: None
+        plugin.watched = lambda rc: ()
+        plugin.invalidate = lambda rc, paths, invalid=name in invalid: invalid
+        plugin.execute = execute.get(name, lambda rc, name=name: calls.append(name))
+    return plugins, calls
+
 def check_cmd(args, cwd, holdsrtn, suppress=True):
     """Runs a command in a subprocess and verifies that it executed properly.
     """
@@ -9,7 +9,9 @@ AST Parsers API
 from __future__ import print_function
 import os
 import io
+import re
 import sys
+import time
 from copy import deepcopy
 import linecache
 import subprocess
@@ -19,6 +21,7 @@ import functools
 import collections
 from pprint import pprint, pformat
 from warnings import warn
+from hashlib import md5
 import gzip
 try:
     import cPickle as pickle
@@ -29,68 +32,102 @@ if os.name == 'nt':
     import ntpath
     import posixpath
 
+from . import utils
+# The parser backends are only imported when they are first used, since they are
+# slow to import and are not needed for --help, --version, etc.
+
 # GCC-XML conditional imports
-HAVE_LXML = False
-try:
-    from lxml import etree
-    HAVE_LXML = True
-except ImportError:
-    try:
-        # Python 2.5
-        import xml.etree.cElementTree as etree
-    except ImportError:
-        try:
-            # Python 2.5
-            import xml.etree.ElementTree as etree
-        except ImportError:
-            try:
-                # normal cElementTree install
-                import cElementTree as etree
-            except ImportError:
-                try:
-                    # normal ElementTree install
-                    import elementtree.ElementTree as etree
-                except ImportError:
-                    pass
+for _etree_name in ('lxml.etree', 'xml.etree.cElementTree', 
+                    'xml.etree.ElementTree', 'cElementTree', 
+                    'elementtree.ElementTree'):
+    etree = utils.lazy_import(_etree_name)
+    if etree is not None:
+        break
+HAVE_LXML = _etree_name == 'lxml.etree' and etree is not None
 
 # pycparser conditional imports
-try:
-    import pycparser
-    PycparserNodeVisitor = pycparser.c_ast.NodeVisitor
-except ImportError:
-    pycparser = None
-    PycparserNodeVisitor = object  # fake this for class definitions
+pycparser = utils.lazy_import('pycparser')
 
-# clang conditional imports
-try:
-    from . import clang
-    from .clang import cindex
-    # Make sure we use our own version of libclang.so
-    from .clang import libclang
-    cindex.Config.set_library_file(libclang.__file__)
-except ImportError:
-    clang = None
+class PycparserNodeVisitor(object):
+    """A stand-in for pycparser.c_ast.NodeVisitor, which dispatches to the
+    visit_<classname>() methods, so that visitor classes may be defined without
+    importing pycparser."""
+
+    def visit(self, node):
+        """Visits a node."""
+        method = 'visit_' + node.__class__.__name__
+        return getattr(self, method, self.generic_visit)(node)
+
+    def generic_visit(self, node):
+        """Called if no explicit visitor function exists for a node. Visits
+        the children of the node."""
+        for _, c in node.children():
+            self.visit(c)
+
+# clang conditional imports, see load_clang()
+clang = utils.lazy_import('xdress.clang')
+cindex = libclang = None
+
+def load_clang():
+    """Imports the clang bindings along with our own version of libclang, 
+    unless this has already been done.  Returns the bindings' cindex module, 
+    or None if libclang is not available."""
+    global clang, cindex, libclang
+    if cindex is not None or clang is None:
+        return cindex
+    try:
+        from .clang import cindex as _cindex
+        # Make sure we use our own version of libclang.so
+        from .clang import libclang as _libclang
+        _cindex.Config.set_library_file(_libclang.__file__)
+    except ImportError:
+        clang = None
+        return None
+    cindex, libclang = _cindex, _libclang
+    return cindex
 
-from . import utils
 from .utils import guess_language, RunControl, NotSpecified, ensuredirs
 from .plugins import Plugin
 
-PARSERS_AVAILABLE = {
-    'clang': clang is not None,
-    'pycparser': pycparser is not None,
-    }
-with tempfile.NamedTemporaryFile() as f:
-    # If gccxml is not availble, an OSError is raised.  Otherwise, it will
-    # return 0 (typically indicates successful invocation).
-    try:
-        retcode = subprocess.call(['gccxml'], stdout=f, stderr=f)
-        if retcode == 0:
-            PARSERS_AVAILABLE['gccxml'] = True
-        else:
-            PARSERS_AVAILABLE['gccxml'] = False
-    except OSError:
-        PARSERS_AVAILABLE['gccxml'] = False
-del f
+def _gccxml_available():
+    with tempfile.NamedTemporaryFile() as f:
+        # If gccxml is not availble, an OSError is raised.  Otherwise, it will
+        # return 0 (typically indicates successful invocation).
+        try:
+            return subprocess.call(['gccxml'], stdout=f, stderr=f) == 0
+        except OSError:
+            return False
+
+class _ParsersAvailable(collections.Mapping):
+    # checks whether each parser is available the first time it is looked up
+    def __init__(self, checks):
+        self.checks = checks
+        self.cache = {}
+
+    def __getitem__(self, parser):
+        if parser not in self.cache:
+            self.cache[parser] = bool(self.checks[parser]())
+        return self.cache[parser]
+
+    def __setitem__(self, parser, value):
+        self.cache[parser] = value
+
+    def __iter__(self):
+        return iter(self.checks)
+
+    def __len__(self):
+        return len(self.checks)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+PARSERS_AVAILABLE = _ParsersAvailable({
+    'clang': lambda: load_clang() is not None,
+    'gccxml': _gccxml_available,
+    'pycparser': lambda: pycparser is not None,
+    })
+"""Maps parser names to whether they are available, which is only checked
+when first looked up."""
 
 if sys.version_info[0] >= 3:
     basestring = str
@@ -107,18 +144,190 @@ def _makekey(obj):
     else:
         return obj
 
+_UNKEYED_KWARGS = frozenset(['verbose', 'debug', 'builddir'])
+
+def _memokey(fname, args, kwargs):
+    # The output options do not change the parse results, so projects with
+    # different build directories share them.  However, the results name files
+    # by the paths that were given, so when any of these are relative they are
+    # only valid in the same working directory.
+    key = (fname,) + _makekey(args) + _makekey(dict([(k, v) for k, v in 
+                                     kwargs.items() if k not in _UNKEYED_KWARGS]))
+    paths = list(args[:1]) + list(kwargs.get('includes', ())) + \
+            list(kwargs.get('clang_includes', ()))
+    if any([isinstance(p, basestring) and not os.path.isabs(p) for p in paths]):
+        key += (os.getcwd(),)
+    return key
+
+class ParserCache(object):
+    """A least-recently-used cache for parse results (GCC-XML trees, clang
+    translation units, pycparser ASTs) which is bounded by an estimated memory
+    budget rather than by a number of entries.  The parsers in this module all
+    share a single instance of this cache, PARSER_CACHE.
+    """
+
+    def __init__(self, maxbytes=2048*2**20, verbose=False):
+        """Parameters
+        -------------
+        maxbytes : int, optional
+            The memory budget for all cached parse results, in bytes.
+        verbose : bool, optional
+            Flag to print a message whenever an entry is evicted.
+
+        """
+        self.maxbytes = maxbytes
+        self.verbose = verbose
+        self.data = collections.OrderedDict()
+        self.stamps = {}
+        self.nbytes = 0
+        self.counters = utils.CacheCounters('parser memo')
+
+    @property
+    def hits(self):
+        return self.counters['hits']
+
+    @property
+    def misses(self):
+        return self.counters['misses']
+
+    @property
+    def evictions(self):
+        return self.counters['evictions']
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        value, size = self.data.pop(key)
+        self.data[key] = (value, size)  # move to most recently used
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value, stamp=None):
+        """Adds a parse result along with the time at which parsing started, 
+        which defaults to now, see invalidate()."""
+        hash(key)  # raises TypeError for unhashable keys
+        if key in self.data:
+            self.nbytes -= self.data.pop(key)[1]
+        size = estimate_nbytes(value)
+        self.data[key] = (value, size)
+        self.stamps[key] = time.time() if stamp is None else stamp
+        self.nbytes += size
+        self.evict()
+
+    def _pop(self, key):
+        value, size = self.data.pop(key)
+        del self.stamps[key]
+        self.nbytes -= size
+        return value, size
+
+    def evict(self, maxbytes=None):
+        """Removes least recently used entries until the cache is within its
+        memory budget, or within maxbytes if given.  The most recent entry is 
+        always kept."""
+        maxbytes = self.maxbytes if maxbytes is None else maxbytes
+        while self.nbytes > maxbytes and len(self.data) > 1:
+            key = next(iter(self.data))
+            value, size = self._pop(key)
+            self.counters.incr('evictions')
+            if self.verbose:
+                print("astparsers: evicted {0} ({1:.1f} MB) from the parser "
+                      "cache".format(key[0], size / 2.0**20))
+
+    def invalidate(self, paths):
+        """Removes the parse results of files which depend on any of the given
+        paths, i.e. the files themselves or their includes, if these have been
+        modified since the file was parsed.  Returns the number of entries 
+        removed."""
+        paths = frozenset([os.path.abspath(p) for p in paths])
+        removed = 0
+        for key in list(self.data.keys()):
+            filename = key[1] if isinstance(key, tuple) and len(key) > 1 else None
+            if not isinstance(filename, basestring):
+                continue
+            for dep in (filename,) + dependencies(filename):
+                dep = os.path.abspath(dep)
+                if dep not in paths:
+                    continue
+                try:
+                    mtime = os.stat(dep).st_mtime
+                except OSError:
+                    mtime = float('inf')
+                if mtime >= self.stamps[key]:
+                    self._pop(key)
+                    removed += 1
+                    break
+        return removed
+
+    def clear(self):
+        """Removes all entries, the statistics are kept."""
+        self.data.clear()
+        self.stamps.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        """Returns a string of the cache statistics."""
+        return ("parser cache: {0} entries, {1:.1f} MB of {2:.1f} MB, {3} hits, "
+                "{4} misses, {5} evictions").format(len(self.data),
+                self.nbytes / 2.0**20, self.maxbytes / 2.0**20, self.hits,
+                self.misses, self.evictions)
+
+PARSER_CACHE = ParserCache()
+utils.register_cache_counters(PARSER_CACHE.counters)
+utils.MEMORY_MONITOR.add_reliever('parser cache', lambda: PARSER_CACHE.evict(0))
+
+ARTIFACT_COUNTERS = utils.register_cache_counters(utils.CacheCounters('parse artifacts'))
+"""Counters for the parse artifacts in the build directory.  Misses which
+were then fetched from the shared cache are counted as 'shared hits'."""
+
+_GCCXML_ELEMENT_NBYTES = 1024
+_PYCPARSER_NODE_NBYTES = 512
+_DEFAULT_NBYTES = 2**20
+
+def estimate_nbytes(value):
+    """Estimates the in-memory size of a parse result, in bytes."""
+    if isinstance(value, GccxmlTree):
+        return value.nelems * _GCCXML_ELEMENT_NBYTES
+    nbytes = getattr(value, 'xdress_nbytes', None)
+    if nbytes is not None:
+        return nbytes
+    if pycparser is not None and isinstance(value, pycparser.c_ast.Node):
+        nnodes = 0
+        stack = [value]
+        while stack:
+            node = stack.pop()
+            nnodes += 1
+            stack.extend([child for _, child in node.children()])
+        return nnodes * _PYCPARSER_NODE_NBYTES
+    return _DEFAULT_NBYTES
+
 def _memoize_parser(f):
     # based off code from http://wiki.python.org/moin/PythonDecoratorLibrary
-    cache = f.cache = {}
+    cache = f.cache = PARSER_CACHE
     @functools.wraps(f)
     def memoizer(*args, **kwargs):
-        key = _makekey(args) + _makekey(kwargs)
-        if key in cache:
+        key = _memokey(f.__name__, args, kwargs)
+        try:
+            inside = key in cache
+        except TypeError:
+            inside = False
+        if inside:
+            cache.counters.incr('hits')
             value = cache[key]
         else:
-            value = f(*args, **kwargs)
+            cache.counters.incr('misses')
+            stage = f.__name__ if len(args) == 0 else \
+                    '{0}({1})'.format(f.__name__, os.path.basename(str(args[0])))
+            t0 = time.time()
+            with cache.counters.timer('compute'), utils.MEMORY_MONITOR.stage(stage):
+                value = f(*args, **kwargs)
             try:
-                cache[key] = value
+                cache.set(key, value, stamp=t0)
             except TypeError:
                 pass
         return value
@@ -143,15 +352,489 @@ def not_implemented(obj):
         raise NotImplementedError(msg)
     return func
 
+#
+# Parse artifact caching
+#
+
+_PARSER_VERSIONS = {}
+
+def parser_version(parser):
+    """Returns a version string for the given parser, or the empty string if
+    this cannot be determined.  The result is cached for the life of the process."""
+    if parser in _PARSER_VERSIONS:
+        return _PARSER_VERSIONS[parser]
+    version = ''
+    if parser == 'pycparser' and pycparser is not None:
+        version = getattr(pycparser, '__version__', '')
+    elif parser == 'gccxml':
+        try:
+            version = subprocess.check_output(['gccxml', '--version'])
+            version = version.decode('utf-8', 'replace').strip()
+        except (OSError, subprocess.CalledProcessError):
+            pass
+    elif parser == 'clang' and load_clang() is not None:
+        # libclang does not expose its version through our bindings, so use the
+        # identity of the shared library itself.
+        libfile = libclang.__file__
+        if os.path.isfile(libfile):
+            st = os.stat(libfile)
+            version = '{0} {1} {2}'.format(libfile, st.st_size, st.st_mtime)
+    _PARSER_VERSIONS[parser] = version
+    return version
+
+def artifact_filename(filename, builddir, ext, parser, flags):
+    """Computes the path of a parse artifact (GCC-XML output, pickled AST,
+    etc.) for a source file.  The name is based on the source path plus a hash
+    of the parser name, parser version, and the full set of parser flags, so
+    that changing any of these results in a different artifact.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the source file.
+    builddir : str
+        Location of -- often temporary -- build files.
+    ext : str
+        Artifact file extension, including the leading dot.
+    parser : str
+        Name of the parser producing the artifact.
+    flags : sequence
+        All arguments which affect the contents of the artifact.
+
+    Returns
+    -------
+    artname : str
+        Path to the artifact.
+
+    """
+    drive, base = os.path.splitdrive(filename)
+    if len(drive) > 0:
+        # Windows drive handling, 'C:' -> 'C_'
+        base = drive.replace(':', '_') + base
+    base = base.replace(os.path.sep, '_').rsplit('.', 1)[0]
+    key = repr((parser, parser_version(parser), os.path.abspath(filename),
+                _makekey(flags)))
+    key = md5(key.encode()).hexdigest()[:12]
+    return os.path.join(builddir, '{0}.{1}{2}'.format(base, key, ext))
+
+def _load_artifact_deps(artname):
+    depsname = artname + '.deps'
+    if not os.path.isfile(depsname):
+        return None
+    try:
+        with io.open(depsname, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+def artifact_isvalid(artname):
+    """Determines whether a parse artifact is still up to date with respect
+    to all of the files that went into producing it, i.e. the source file and
+    its transitive includes.  A cheap mtime and size check is performed first,
+    and files are only rehashed if these have changed.
+    """
+    with ARTIFACT_COUNTERS.timer('validate'):
+        current = _artifact_isvalid(artname)
+    ARTIFACT_COUNTERS.incr('hits' if current else 'misses')
+    return current
+
+def _artifact_isvalid(artname):
+    if not os.path.isfile(artname):
+        return False
+    deps = _load_artifact_deps(artname)
+    if deps is None:
+        return False
+    current, refreshed = utils.check_fingerprints(deps)
+    if current and refreshed:
+        _dump_artifact_deps(artname, deps)
+    return current
+
+def artifact_dependencies(artname, filenames):
+    """Records the files which a parse artifact was produced from, so that
+    artifact_isvalid() may later check them.  Names which are not regular files
+    (e.g. '<built-in>') are skipped."""
+    _dump_artifact_deps(artname, utils.file_fingerprints(filenames))
+
+def remove_artifact(artname):
+    """Removes a parse artifact and its record of dependencies, if present."""
+    for name in (artname, artname + '.deps'):
+        if os.path.isfile(name):
+            os.remove(name)
+
+def _dump_artifact_deps(artname, deps):
+    with io.open(artname + '.deps', 'wb') as f:
+        pickle.dump(deps, f, pickle.HIGHEST_PROTOCOL)
+
+def normalize_flags(includes=(), defines=(), undefines=(), extra_parser_args=(),
+                    clang_includes=()):
+    """Puts parser flags into a canonical, hashable form for keying shared
+    cache entries.  Whitespace and repeated flags are dropped, and macro
+    definitions are sorted unless some macro is given more than once (in
+    which case the order matters).
+    """
+    def uniq(flags):
+        seen = []
+        for flag in flags:
+            flag = flag.strip()
+            if flag not in seen:
+                seen.append(flag)
+        return seen
+    def sortmacros(macros):
+        names = [m.split('=', 1)[0] for m in macros]
+        return sorted(macros) if len(set(names)) == len(names) else macros
+    return (tuple(uniq(clang_includes)), tuple(uniq(includes)),
+            tuple(sortmacros(uniq(defines))), tuple(sortmacros(uniq(undefines))),
+            tuple(uniq(extra_parser_args)))
+
+def shared_cache_context(rc, language):
+    """Returns a hashable summary of everything in a run control, besides file
+    contents, which affects what the parsers produce for a language: the
+    parser selection, the versions of the available parsers, and the
+    normalized flags.
+    """
+    parsers = rc.parsers
+    if isinstance(parsers, collections.Mapping):
+        parsers = sorted(parsers.items())
+    versions = tuple([(p, parser_version(p)) for p in sorted(PARSERS_AVAILABLE)
+                      if PARSERS_AVAILABLE[p]])
+    flags = normalize_flags(rc.includes, rc.defines, rc.undefines,
+                            rc.extra_parser_args, rc.clang_includes)
+    return (repr(parsers), language, versions, flags)
+
+def _shared_artifact_key(filename, ext, parser, flags):
+    return utils.SharedCache.key('artifact', ext, parser, parser_version(parser),
+                                 flags, utils.file_digest(filename))
+
+def shared_artifact_fetch(artname, filename, ext, parser, flags):
+    """Copies a parse artifact for a file from the shared cache, if there is
+    one and it holds an artifact for the same file contents, parser, and
+    (normalized) flags whose dependencies all match the files here.
+
+    Returns
+    -------
+    fetched : bool
+        Whether artname is now a valid artifact.
+
+    """
+    shared = utils.SHARED_CACHE
+    if shared is None or not os.path.isfile(filename):
+        return False
+    key = _shared_artifact_key(filename, ext, parser, flags)
+    deps = shared.get(key)
+    if deps is None or not utils.check_digests(deps):
+        return False
+    if not shared.get_file(key, ext, artname):
+        return False
+    artifact_dependencies(artname, deps.keys())
+    ARTIFACT_COUNTERS.incr('shared hits')
+    return True
+
+def shared_artifact_store(artname, filename, ext, parser, flags):
+    """Stores a freshly made, valid parse artifact in the shared cache, if
+    any, see shared_artifact_fetch()."""
+    shared = utils.SHARED_CACHE
+    deps = _load_artifact_deps(artname)
+    if shared is None or deps is None:
+        return
+    key = _shared_artifact_key(filename, ext, parser, flags)
+    # the file goes first, since readers take the dependencies as the marker
+    shared.put_file(key, ext, artname)
+    shared.put(key, dict([(f, fp[2]) for f, fp in deps.items()]))
+
+_DEPENDENCIES = {}
+
+def _register_dependencies(filename, artname):
+    """Remembers the dependencies of the artifact for a parsed file, see
+    dependencies()."""
+    deps = _load_artifact_deps(artname) or {}
+    _DEPENDENCIES[os.path.abspath(filename)] = tuple(sorted([os.path.abspath(d)
+                                                             for d in deps]))
+
+def dependencies(filename):
+    """Returns the paths of the files which the most recent parse of a file in
+    this process depended on, i.e. the file itself and its transitive includes.
+    These are reported by the parsers themselves (the GCC-XML File nodes, the
+    clang inclusions, and the pycparser preprocessor line markers).  An empty
+    tuple is returned if the file has not been parsed.  All paths are absolute.
+    """
+    return _DEPENDENCIES.get(os.path.abspath(filename), ())
+
 #
 # GCC-XML Describers
 #
 
+class GccxmlTree(object):
+    """An indexed wrapper around a GCC-XML element tree.  GCC-XML output is
+    essentially a flat list of nodes which refer to each other by id.  Resolving
+    these references with XPath queries (``.//*[@id='_42']``) requires a full
+    scan of the tree per lookup.  This class builds id, name, tag, and file
+    indexes once so that all such lookups are constant time.  Unknown attributes
+    (find, iterfind, getroot, etc.) are forwarded to the underlying tree.
+    """
+
+    def __init__(self, tree):
+        """Parameters
+        -------------
+        tree : etree.ElementTree or etree.Element
+            The parsed GCC-XML document.
+
+        """
+        self.tree = tree
+        top = tree.getroot() if hasattr(tree, 'getroot') else tree
+        ids = self.ids = {}
+        names = self.names = {}
+        tags = self.tags = {}
+        files = self.files = {}
+        nelems = 0
+        for elem in top.iter():
+            if elem is top:
+                continue
+            nelems += 1
+            attrib = elem.attrib
+            tag = elem.tag
+            if tag in tags:
+                tags[tag].append(elem)
+            else:
+                tags[tag] = [elem]
+            if 'id' in attrib:
+                ids[attrib['id']] = elem
+            if 'name' in attrib:
+                name = attrib['name']
+                if name in names:
+                    names[name].append(elem)
+                else:
+                    names[name] = [elem]
+            if 'file' in attrib:
+                fid = attrib['file']
+                if fid in files:
+                    files[fid].append(elem)
+                else:
+                    files[fid] = [elem]
+        self.nelems = nelems
+
+    def __getattr__(self, key):
+        if key == 'tree':
+            raise AttributeError(key)
+        return getattr(self.tree, key)
+
+    def byid(self, id):
+        """Returns the element with the given id or None."""
+        return self.ids.get(id, None)
+
+    def byname(self, name, tags=None):
+        """Returns the list of elements with the given name attribute, in document
+        order.  If tags is given (str or sequence of str), only elements with
+        these tags are returned."""
+        elems = self.names.get(name, ())
+        if tags is None:
+            return list(elems)
+        tags = (tags,) if isinstance(tags, basestring) else tags
+        return [e for e in elems if e.tag in tags]
+
+    def findname(self, name, tags=None):
+        """Returns the first element with the given name (and optionally tag)
+        or None."""
+        elems = self.byname(name, tags=tags)
+        return elems[0] if 0 < len(elems) else None
+
+    def bytag(self, tag):
+        """Returns the list of elements with the given tag, in document order."""
+        return list(self.tags.get(tag, ()))
+
+    def byfile(self, fid):
+        """Returns the list of elements declared in the file with the given id,
+        in document order."""
+        return list(self.files.get(fid, ()))
+
+    def fileid(self, filename):
+        """Returns the GCC-XML id of a file, trying the './' prefixed version of
+        relative paths as well.  None is returned if the file is not present."""
+        fnode = self.findname(filename, 'File')
+        if fnode is None:
+            fnode = self.findname('./' + filename, 'File')
+        return None if fnode is None else fnode.attrib['id']
+
+
+def gccxml_tree(root):
+    """Ensures that root is an indexed GccxmlTree, wrapping it if needed."""
+    return root if isinstance(root, GccxmlTree) else GccxmlTree(root)
+
+_GCCXML_REF_ATTRS = ('type', 'returns', 'context', 'basetype', 'members', 'bases',
+                     'throw')
+_GCCXML_TYPE_TAGS = frozenset(['Class', 'Struct', 'Union', 'Enumeration', 'Typedef',
+                               'FundamentalType'])
+_GCCXML_TARG_NAMES = re.compile(r'[A-Za-z_][\w:]*')
+
+def _gccxml_feed(xmlname, target):
+    """Feeds a GCC-XML file through a parser target, returning the result of
+    target.close().  Parser targets receive the tag and attributes of each
+    element directly from the underlying C parser, so no elements are
+    created unless the target chooses to build them."""
+    parser = etree.XMLParser(target=target)
+    with io.open(xmlname, 'rb') as f:
+        for chunk in iter(functools.partial(f.read, 2**16), b''):
+            parser.feed(chunk)
+    return parser.close()
+
+
+class _GccxmlGraphTarget(object):
+    """Parser target which records a lightweight reference graph of the
+    top-level GCC-XML elements.  References made by children (arguments,
+    bases, etc.) are attributed to their top-level parent.  Namespace members
+    are not followed since that would make everything reachable from the
+    global namespace."""
+
+    def __init__(self):
+        self.depth = 0
+        self.refs = None
+        self.graph = {}      # id -> space separated referenced ids
+        self.templates = {}  # id -> names in template arguments
+        self.names = collections.defaultdict(list)   # type name -> ids
+        self.byfile = collections.defaultdict(list)  # file id -> ids
+        self.fileids = {}    # file name -> file id
+
+    def start(self, tag, attrib):
+        self.depth += 1
+        if self.depth == 2:
+            self.refs = None
+            eid = attrib.get('id', None)
+            if eid is None:
+                return
+            if tag == 'File':
+                self.fileids[attrib['name']] = eid
+                return
+            self.eid = eid
+            self.refs = refs = [attrib[a] for a in _GCCXML_REF_ATTRS if a in attrib]
+            if tag == 'Namespace' and 'members' in attrib:
+                refs.remove(attrib['members'])
+            if tag in _GCCXML_TYPE_TAGS and 'name' in attrib:
+                self.names[attrib['name']].append(eid)
+            if '<' in attrib.get('name', '') or '<' in attrib.get('demangled', ''):
+                self.templates[eid] = _gccxml_template_names(attrib)
+            if 'file' in attrib:
+                self.byfile[attrib['file']].append(eid)
+        elif self.depth > 2 and self.refs is not None:
+            self.refs.extend([attrib[a] for a in _GCCXML_REF_ATTRS if a in attrib])
+
+    def end(self, tag):
+        if self.depth == 2 and self.refs is not None:
+            self.graph[self.eid] = ' '.join(self.refs)
+            self.refs = None
+        self.depth -= 1
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        return self
+
+
+class _GccxmlPruneTarget(object):
+    """Parser target which builds a tree of only the root, the File nodes,
+    and the top-level elements whose ids are in keep."""
+
+    def __init__(self, keep):
+        self.keep = keep
+        self.depth = 0
+        self.keeping = True
+        self.builder = etree.TreeBuilder()
+
+    def start(self, tag, attrib):
+        self.depth += 1
+        if self.depth == 2:
+            self.keeping = tag == 'File' or attrib.get('id', None) in self.keep
+        if self.keeping:
+            self.builder.start(tag, dict(attrib))
+
+    def end(self, tag):
+        if self.keeping or self.depth == 1:
+            self.builder.end(tag)
+        if self.depth == 2:
+            self.keeping = True
+        self.depth -= 1
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        return self.builder.close()
+
+
+def _gccxml_template_names(attrib):
+    """Returns the names which occur in the template arguments of an element.
+    Describers look these up by name rather than by id."""
+    names = []
+    for key in ('name', 'demangled'):
+        value = attrib.get(key, '')
+        if '<' not in value:
+            continue
+        names.extend(utils.split_template_args(value))
+        inner = value.split('<', 1)[-1].rsplit('>', 1)[0]
+        names.extend(_GCCXML_TARG_NAMES.findall(inner))
+    return names
+
+def gccxml_load_pruned(xmlname, onlyin):
+    """Loads a GCC-XML file while keeping only the declarations from the onlyin
+    files and the nodes that are reachable from them (their types, contexts,
+    members, bases, and template arguments).  All File nodes are also kept.
+    Everything else, typically the bulk of the system headers, is dropped
+    while streaming so the full tree is never held in memory.
+
+    This makes two streaming passes with parser targets.  The first records
+    only a lightweight reference graph, the second builds just the reachable
+    elements.  If none of the
+    onlyin files are present in the GCC-XML output, the whole tree is loaded.
+
+    Parameters
+    ----------
+    xmlname : str
+        Path to the GCC-XML output.
+    onlyin : set of str
+        The paths to the files whose declarations are of interest.
+
+    Returns
+    -------
+    tree : etree.ElementTree
+        The pruned tree.
+
+    """
+    g = _gccxml_feed(xmlname, _GccxmlGraphTarget())
+    onlyfids = set()
+    for oi in onlyin:
+        for fname in (oi, './' + oi):
+            if fname in g.fileids:
+                onlyfids.add(g.fileids[fname])
+    if len(onlyfids) == 0:
+        with io.open(xmlname, 'rb') as f:
+            return etree.parse(f)
+    # find all reachable nodes
+    graph, templates, names = g.graph, g.templates, g.names
+    keep = set()
+    stack = [eid for fid in onlyfids if fid in g.byfile for eid in g.byfile[fid]]
+    del g
+    while stack:
+        eid = stack.pop()
+        if eid in keep or eid not in graph:
+            continue
+        keep.add(eid)
+        # bases may be prefixed by their access, eg 'private:_12'
+        stack.extend([r.rsplit(':', 1)[-1] for r in graph[eid].split()])
+        for tname in templates.get(eid, ()):
+            if tname in names:
+                stack.extend(names[tname])
+    del graph, templates, names
+    # load just these
+    root = _gccxml_feed(xmlname, _GccxmlPruneTarget(keep))
+    return etree.ElementTree(root)
+
 @_memoize_parser
 def gccxml_parse(filename, includes=(), defines=('XDRESS',), undefines=(),
                  extra_parser_args=(), verbose=False, debug=False, builddir='build',
-                 clang_includes=()):
+                 clang_includes=(), onlyin=None):
     """Use GCC-XML to parse a file. This function is automatically memoized.
+    If onlyin is given, the GCC-XML output is streamed and pruned down to the
+    declarations in these files and the nodes that they reference, see
+    gccxml_load_pruned().  The pruned tree is cached in the build directory.
 
     Parameters
     ----------
@@ -172,39 +855,67 @@ def gccxml_parse(filename, includes=(), defines=('XDRESS',), undefines=(),
     builddir : str, optional
         Location of -- often temporary -- build files.
     clang_includes : ignored
+    onlyin : set of str, optional
+        The paths to the files whose declarations are of interest.  If None,
+        the entire tree is loaded.
 
     Returns
     -------
-    root : XML etree
-        An in memory tree representing the parsed file.
+    root : GccxmlTree
+        An in memory, indexed tree representing the parsed file.
     """
-    drive, xmlname = os.path.splitdrive(filename)
-    if len(drive) > 0:
-        # Windows drive handling, 'C:' -> 'C_'
-        xmlname = drive.replace(':', '_') + xmlname
-    xmlname = xmlname.replace(os.path.sep, '_').rsplit('.', 1)[0] + '.xml'
-    xmlname = os.path.join(builddir, xmlname)
-    cmd = ['gccxml', filename, '-fxml=' + xmlname]
-    cmd += ['-I' + i for i in includes]
+    cmd = ['-I' + i for i in includes]
     cmd += ['-D' + d for d in defines]
     cmd += ['-U' + u for u in undefines]
     cmd += extra_parser_args
+    xmlname = artifact_filename(filename, builddir, '.xml', 'gccxml', cmd)
+    cmd = ['gccxml', filename, '-fxml=' + xmlname] + cmd
     if verbose:
         print(" ".join(cmd))
-    if os.path.isfile(xmlname):
-        f = io.open(xmlname, 'r+b')
-    else:
+    flags = normalize_flags(includes, defines, undefines, extra_parser_args)
+    prunedname = None
+    if onlyin is not None:
+        # the pruned tree is itself cached, and is only as fresh as the output
+        prunedname = artifact_filename(xmlname, builddir, '.pruned.xml',
+                                       'gccxml', sorted(onlyin))
+    fresh = not artifact_isvalid(xmlname) and \
+            not shared_artifact_fetch(xmlname, filename, '.xml', 'gccxml', flags)
+    if fresh:
+        # never let a failed run leave the output of a previous one behind
+        remove_artifact(xmlname)
+        if prunedname is not None:
+            remove_artifact(prunedname)
         ensuredirs(xmlname)
-        f = io.open(xmlname, 'w+b')
-        subprocess.call(cmd)
-    f.seek(0)
+        with ARTIFACT_COUNTERS.timer('compute'):
+            rtn = subprocess.call(cmd)
+        if rtn != 0:
+            raise RuntimeError("gccxml failed to parse {0} with exit code "
+                               "{1}".format(filename, rtn))
+    t0 = time.time()
     try:
-        root = etree.parse(f)
-    except etree.XMLSyntaxError:
+        if onlyin is None:
+            with io.open(xmlname, 'rb') as f:
+                root = etree.parse(f)
+        else:
+            if not fresh and artifact_isvalid(prunedname):
+                with io.open(prunedname, 'rb') as f:
+                    root = etree.parse(f)
+            else:
+                root = gccxml_load_pruned(xmlname, onlyin)
+                root.write(prunedname)
+                artifact_dependencies(prunedname, [xmlname])
+    except (IOError, OSError, etree.XMLSyntaxError):
         raise etree.XMLSyntaxError("failed to parse GCC-XML results, this likely "
                                    "means that the C/C++ code is not valid. please "
                                    "see the top most build error.")
-    f.close()
+    root = GccxmlTree(root)
+    ARTIFACT_COUNTERS.add_time('compute' if fresh else 'load', time.time() - t0)
+    if fresh:
+        # gccxml lists every file that went into the translation unit
+        deps = [filename] + [f.attrib['name'] for f in root.bytag('File')]
+        artifact_dependencies(xmlname, deps)
+        shared_artifact_store(xmlname, filename, '.xml', 'gccxml', flags)
+    _register_dependencies(filename, xmlname)
     return root
 
 #
@@ -214,7 +925,9 @@ def gccxml_parse(filename, includes=(), defines=('XDRESS',), undefines=(),
 def clang_parse(filename, includes=(), defines=('XDRESS',), undefines=(),
                 extra_parser_args=(), verbose=False, debug=False, builddir='build',
                 language='c++', clang_includes=()):
-    """Use clang to parse a file.
+    """Use clang to parse a file.  This function is automatically memoized.
+    If a precompiled header has been built with clang_build_pch() for this
+    language, it is used as the preamble.
 
     Parameters
     ----------
@@ -233,7 +946,9 @@ def clang_parse(filename, includes=(), defines=('XDRESS',), undefines=(),
     debug : bool, optional
         Flag to enable/disable debug mode.  Currently ignored.
     builddir : str, optional
-        Ignored.  Exists only for compatibility with gccxml_describe.
+        Location of -- often temporary -- build files.  Serialized translation
+        units are stored here and are reused until the file, its includes, or
+        the flags change.
     language : str
         Valid language flag.
     clang_includes : list of str, optional
@@ -243,15 +958,50 @@ def clang_parse(filename, includes=(), defines=('XDRESS',), undefines=(),
     -------
     tu : libclang TranslationUnit object
     """
-    index = cindex.Index.create()
+    args = ['-x', language] \
+         + ['-I' + i for i in tuple(clang_includes) + tuple(includes)] \
+         + ['-D' + d for d in defines] \
+         + ['-U' + u for u in undefines] \
+         + list(extra_parser_args)
+    pch = _CLANG_PCH.get(language, None)
+    if pch is not None:
+        args += ['-include-pch', pch]
+    astname = artifact_filename(filename, builddir, '.ast', 'clang', args)
+    # the pch is local to the build directory, so key on its contents instead
+    flags = (language, normalize_flags(includes, defines, undefines,
+                                       extra_parser_args, clang_includes),
+             None if pch is None else utils.file_digest(pch))
+    index = load_clang().Index.create()
+    if artifact_isvalid(astname) or \
+       shared_artifact_fetch(astname, filename, '.ast', 'clang', flags):
+        if verbose:
+            print("loading clang translation unit " + astname)
+        try:
+            with ARTIFACT_COUNTERS.timer('load'):
+                tu = index.read(astname)
+            tu.xdress_nbytes = os.path.getsize(astname)
+            _register_dependencies(filename, astname)
+            return tu
+        except cindex.TranslationUnitLoadError:
+            pass
     options = cindex.TranslationUnit.PARSE_SKIP_FUNCTION_BODIES
-    tu = index.parse(filename, options=options,
-                     args=['-x', language]
-                        + ['-I' + i for i in tuple(clang_includes) + tuple(includes)]
-                        + ['-D' + d for d in defines]
-                        + ['-U' + u for u in undefines]
-                        + list(extra_parser_args))
-    # Check for fatal errors
+    with ARTIFACT_COUNTERS.timer('compute'):
+        tu = index.parse(filename, options=options, args=args)
+    _clang_check_diagnostics(tu, filename)
+    ensuredirs(astname)
+    tu.save(astname)
+    tu.xdress_nbytes = os.path.getsize(astname)
+    deps = [filename] + [inc.include.name for inc in tu.get_includes()]
+    if pch is not None:
+        deps.append(pch)
+    artifact_dependencies(astname, deps)
+    shared_artifact_store(astname, filename, '.ast', 'clang', flags)
+    _register_dependencies(filename, astname)
+    return tu
+
+def _clang_check_diagnostics(tu, filename):
+    """Prints the errors for a translation unit and raises a RuntimeError if
+    there were any."""
     failed = False
     for d in tu.diagnostics:
         if d.severity >= cindex.Diagnostic.Error:
@@ -259,7 +1009,73 @@ def clang_parse(filename, includes=(), defines=('XDRESS',), undefines=(),
             failed = True
     if failed:
         raise RuntimeError('failed to parse {0}'.format(filename))
-    return tu
+
+_CLANG_PCH = {}
+
+def clang_build_pch(headers, includes=(), defines=('XDRESS',), undefines=(),
+                    extra_parser_args=(), verbose=False, debug=False,
+                    builddir='build', language='c++', clang_includes=()):
+    """Builds a precompiled header from a list of commonly included headers
+    and registers it so that every subsequent call to clang_parse() for this
+    language reuses it, rather than reparsing the same preamble for each
+    translation unit.  The precompiled header is itself cached in the build
+    directory and is only rebuilt when the headers or flags change.
+
+    Parameters
+    ----------
+    headers : list of str
+        Headers to precompile, as they would appear in an include directive.
+    includes: list of str, optional
+        The list of extra include directories to search for header files.
+    defines: list of str, optional
+        The list of extra macro definitions to apply.
+    undefines: list of str, optional
+        The list of extra macro undefinitions to apply.
+    extra_parser_args : list of str, optional
+        Further command line arguments to pass to the parser.
+    verbose : bool, optional
+        Flag to display extra information.
+    debug : bool, optional
+        Flag to enable/disable debug mode.  Currently ignored.
+    builddir : str, optional
+        Location of -- often temporary -- build files.
+    language : str
+        Valid language flag.
+    clang_includes : list of str, optional
+        clang-specific includes paths.
+
+    Returns
+    -------
+    pch : str or None
+        Path to the precompiled header, None if no headers were given.
+
+    """
+    _CLANG_PCH.pop(language, None)
+    if len(headers) == 0:
+        return None
+    ext = '.h' if language == 'c' else '.hpp'
+    hdrname = os.path.join(builddir, 'xdress_pch_' + language.replace('+', 'x') + ext)
+    ensuredirs(hdrname)
+    utils.newoverwrite('\n'.join(['#include "{0}"'.format(h) for h in headers]) + '\n',
+                       hdrname)
+    args = ['-x', language + '-header'] \
+         + ['-I' + i for i in tuple(clang_includes) + tuple(includes)] \
+         + ['-D' + d for d in defines] \
+         + ['-U' + u for u in undefines] \
+         + list(extra_parser_args)
+    pch = artifact_filename(hdrname, builddir, '.pch', 'clang', args)
+    if not artifact_isvalid(pch):
+        if verbose:
+            print("building precompiled header " + pch)
+        index = load_clang().Index.create()
+        tu = index.parse(hdrname, args=args,
+                         options=cindex.TranslationUnit.PARSE_INCOMPLETE)
+        _clang_check_diagnostics(tu, hdrname)
+        tu.save(pch)
+        deps = [hdrname] + [inc.include.name for inc in tu.get_includes()]
+        artifact_dependencies(pch, deps)
+    _CLANG_PCH[language] = pch
+    return pch
 
 #
 # pycparser Describers
@@ -297,12 +1113,6 @@ def pycparser_parse(filename, includes=(), defines=('XDRESS',), undefines=(),
         A pycparser abstract syntax tree.
 
     """
-    pklgzname = filename.replace(os.path.sep, '_').rsplit('.', 1)[0] + '.pkl.gz'
-    pklgzname = os.path.join(builddir, pklgzname)
-    if os.path.isfile(pklgzname):
-        with gzip.open(pklgzname, 'rb') as f:
-            root = pickle.loads(f.read())
-        return root
     kwargs = {'cpp_args': [r'-D__attribute__(x)=',  # Workaround for GNU libc
                 r'-D__asm__(x)=', r'-D__const=',
                 r'-D__builtin_va_list=int', # just fake this
@@ -313,11 +1123,40 @@ def pycparser_parse(filename, includes=(), defines=('XDRESS',), undefines=(),
     kwargs['cpp_args'] += ['-D' + d for d in defines]
     kwargs['cpp_args'] += ['-U' + u for u in undefines]
     kwargs['cpp_args'] += extra_parser_args
-    root = pycparser.parse_file(filename, use_cpp=True, **kwargs)
+    pklgzname = artifact_filename(filename, builddir, '.pkl.gz', 'pycparser',
+                                  kwargs['cpp_args'])
+    flags = normalize_flags(includes, defines, undefines, extra_parser_args)
+    if artifact_isvalid(pklgzname) or \
+       shared_artifact_fetch(pklgzname, filename, '.pkl.gz', 'pycparser', flags):
+        with ARTIFACT_COUNTERS.timer('load'):
+            with gzip.open(pklgzname, 'rb') as f:
+                root = pickle.loads(f.read())
+        _register_dependencies(filename, pklgzname)
+        return root
+    with ARTIFACT_COUNTERS.timer('compute'):
+        text = pycparser.preprocess_file(filename, **kwargs)
+        root = pycparser.CParser().parse(text, filename)
+    ensuredirs(pklgzname)
     with gzip.open(pklgzname, 'wb') as f:
         f.write(pickle.dumps(root, pickle.HIGHEST_PROTOCOL))
+    artifact_dependencies(pklgzname, [filename] + _cpp_line_files(text))
+    shared_artifact_store(pklgzname, filename, '.pkl.gz', 'pycparser', flags)
+    _register_dependencies(filename, pklgzname)
     return root
 
+_CPP_LINE_MARKER = re.compile(r'^#(?:line)?\s+\d+\s+"([^"]*)"', re.MULTILINE)
+
+def _cpp_line_files(text):
+    """Returns the unique file names in the line markers of preprocessed text,
+    i.e. the source file and all of its transitive includes."""
+    files = []
+    seen = set()
+    for name in _CPP_LINE_MARKER.findall(text):
+        if name not in seen:
+            seen.add(name)
+            files.append(name)
+    return files
+
 #
 #  General utilities
 #
@@ -397,6 +1236,7 @@ def dumpast(filename, parsers, sourcedir, includes=(), defines=('XDRESS',),
         root = gccxml_parse(filename, includes=includes, defines=defines,
                             undefines=undefines, verbose=verbose, debug=debug,
                             builddir=builddir)
+        root = root.tree
         if HAVE_LXML:
             print(etree.tostring(root, pretty_print=True))
         else:
@@ -428,9 +1268,12 @@ class ParserPlugin(Plugin):
         classes=(),
         parsers={'c': ['pycparser', 'clang', 'gccxml'],
                  'c++':['clang', 'gccxml', 'pycparser']},
-        clear_parser_cache_period=50,
+        clear_parser_cache_period=None,
+        parser_cache_mb=2048,
         dumpast=NotSpecified,
         extra_parser_args=(),
+        jobs=1,
+        clang_pch_includes=(),
         )
 
     rcupdaters = {'includes': (lambda old, new: list(new) + list(old)),
@@ -448,12 +1291,20 @@ class ParserPlugin(Plugin):
         'classes': ("A list of class names in sequence, mapping, "
                     "or apiname format"),
         'parsers': "Parser(s) name, list, or dict",
-        'clear_parser_cache_period': ("Number of parser calls to perform before "
-                                      "clearing the internal cache.  This prevents "
-                                      "nasty memory overflow issues."),
+        'clear_parser_cache_period': ("Deprecated, use parser_cache_mb. Number "
+                                      "of parser calls to perform before clearing "
+                                      "the internal cache, None to never clear it."),
+        'parser_cache_mb': ("Memory budget, in MB, of the least-recently-used "
+                            "cache of parsed translation units.  This prevents "
+                            "nasty memory overflow issues."),
         'dumpast': "Prints the abstract syntax tree of a file.",
         'clang_includes': "clang-specific include paths",
-        'extra_parser_args': "Further command line arguments to pass to the parser"
+        'extra_parser_args': "Further command line arguments to pass to the parser",
+        'jobs': ("Number of worker processes to use when parsing source files. "
+                 "Work is grouped by translation unit."),
+        'clang_pch_includes': ("Commonly included headers to build into a "
+                               "precompiled header which clang reuses for every "
+                               "C++ translation unit"),
         }
 
     def update_argparser(self, parser):
@@ -469,6 +1320,9 @@ class ParserPlugin(Plugin):
         parser.add_argument('--clear-parser-cache-period', action='store',
                             dest='clear_parser_cache_period', type=int,
                             help=rcdocs["clear_parser_cache_period"])
+        parser.add_argument('--parser-cache-mb', action='store',
+                            dest='parser_cache_mb', type=float,
+                            help=rcdocs["parser_cache_mb"])
         parser.add_argument('--dumpast', action='store', dest='dumpast',
                             metavar="FILE", help=rcdocs["dumpast"])
         parser.add_argument('--clang-includes', action='store', dest='clang_includes',
@@ -476,12 +1330,33 @@ class ParserPlugin(Plugin):
         parser.add_argument('--extra-parser-args', action='store',
                             dest='extra_parser_args', nargs="+",
                             help=rcdocs["extra_parser_args"])
+        parser.add_argument('--clang-pch-includes', action='store',
+                            dest='clang_pch_includes', nargs="+",
+                            help=rcdocs["clang_pch_includes"])
+        parser.add_argument('-j', '--jobs', action='store', dest='jobs', type=int,
+                            help=rcdocs["jobs"])
 
     def setup(self, rc):
         """Remember to call super() on subclasses!"""
         if isinstance(rc.parsers, basestring):
             if '[' in rc.parsers or '{' in rc.parsers:
                 rc.parsers = eval(rc.parsers)
+        PARSER_CACHE.maxbytes = int(rc.parser_cache_mb * 2**20)
+        PARSER_CACHE.verbose = rc.verbose
+        PARSER_CACHE.evict()
+        if rc.clear_parser_cache_period is not None:
+            warn("clear_parser_cache_period is deprecated, use parser_cache_mb",
+                 DeprecationWarning)
+        if 0 < len(rc.clang_pch_includes) and PARSERS_AVAILABLE['clang']:
+            clang_build_pch(rc.clang_pch_includes, includes=rc.includes,
+                            defines=rc.defines, undefines=rc.undefines,
+                            extra_parser_args=rc.extra_parser_args,
+                            verbose=rc.verbose, debug=rc.debug,
+                            builddir=rc.builddir, language='c++',
+                            clang_includes=rc.clang_includes)
+        else:
+            # don't reuse the precompiled header of an earlier project
+            _CLANG_PCH.pop('c++', None)
         # This should go last
         if rc.dumpast is not NotSpecified:
             dumpast(rc.dumpast, rc.parsers, rc.sourcedir, includes=rc.includes,
@@ -493,8 +1368,15 @@ class ParserPlugin(Plugin):
     def execute(self, rc):
         raise TypeError("ParserPlugin is not a complete plugin.  Do not use directly")
 
+    def invalidate(self, rc, paths):
+        """Remember to call super() on subclasses!  This drops the parse 
+        results of changed files from the parser cache."""
+        PARSER_CACHE.invalidate(paths)
+        return False
+
     def report_debug(self, rc):
         """Remember to call super() on subclasses!"""
         msg = 'Autodescriber parsers available:\n\n{0}\n\n'
         msg = msg.format(pformat(PARSERS_AVAILABLE))
+        msg += PARSER_CACHE.stats() + '\n\n'
         return msg
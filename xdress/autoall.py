@@ -30,33 +30,20 @@ Automatic Finder API
 """
 from __future__ import print_function
 import os
-import io
 import re
 import sys
-from hashlib import md5
 from pprint import pprint, pformat
 from warnings import warn
-try:
-    import cPickle as pickle
-except ImportError:
-    import pickle
-
-try:
-    import pycparser
-except ImportError:
-    pycparser = None
-
-try:
-    from . import clang
-    from .clang.cindex import CursorKind
-except ImportError:
-    clang = None
 
 from . import utils
 from . import astparsers
+from .astparsers import pycparser
+
+# clang bindings, loaded on first use
+cindex = utils.lazy_import('xdress.clang.cindex')
 
 from .utils import find_source, FORBIDDEN_NAMES, NotSpecified, RunControl, apiname, \
-    ensure_apiname
+    ensure_apiname, parallel_imap
 
 if os.name == 'nt':
     import ntpath
@@ -81,11 +68,11 @@ class GccxmlFinder(object):
 
         """
         self.verbose = verbose
-        self._root = root
+        self._root = root = astparsers.gccxml_tree(root)
         origonlyin = onlyin
         onlyin = [onlyin] if isinstance(onlyin, basestring) else onlyin
         onlyin = set() if onlyin is None else set(onlyin)
-        onlyin = [root.find("File[@name='{0}']".format(oi)) for oi in onlyin]
+        onlyin = [root.findname(oi, 'File') for oi in onlyin]
         self.onlyin = set([oi.attrib['id'] for oi in onlyin if oi is not None])
         if 0 == len(self.onlyin):
             msg = ("None of these files are present: {0!r}; "
@@ -118,7 +105,7 @@ class GccxmlFinder(object):
             top-level node is found and visited.
 
         """
-        node = node or self._root
+        node = self._root if node is None else node
         self.variables += self.visit_kinds(node, "Enumeration")
         self.functions += self.visit_kinds(node, "Function")
         self.classes += self.visit_kinds(node, ["Class", "Struct"])
@@ -147,7 +134,12 @@ class GccxmlFinder(object):
             names = [n for n in names if n not in FORBIDDEN_NAMES]
             return names
         names = set()
-        for child in node.iterfind(".//" + kinds):
+        if node is self._root:
+            children = [c for fid in self.onlyin for c in self._root.byfile(fid) 
+                        if c.tag == kinds]
+        else:
+            children = node.iterfind(".//" + kinds)
+        for child in children:
             if child.attrib.get('file', None) not in self.onlyin:
                 continue
             name = child.attrib.get('name', '_')
@@ -200,12 +192,12 @@ def gccxml_findall(filename, includes=(), defines=('XDRESS',), undefines=(),
     if os.name == 'nt':
         # GCC-XML and/or Cygwin wants posix paths on Windows.
         filename = posixpath.join(*ntpath.split(filename))
-    root = astparsers.gccxml_parse(filename, includes=includes, defines=defines,
-            undefines=undefines, extra_parser_args=extra_parser_args, verbose=verbose, 
-            debug=debug, builddir=builddir)
     basename = filename.rsplit('.', 1)[0]
     onlyin = set([filename] + 
                  [basename + '.' + h for h in utils._hdr_exts if h.startswith('h')])
+    root = astparsers.gccxml_parse(filename, includes=includes, defines=defines,
+            undefines=undefines, extra_parser_args=extra_parser_args, verbose=verbose, 
+            debug=debug, builddir=builddir, onlyin=onlyin)
     finder = GccxmlFinder(root, onlyin=onlyin, verbose=verbose)
     finder.visit()
     return finder.variables, finder.functions, finder.classes
@@ -257,14 +249,14 @@ def clang_findall(filename, includes=(), defines=('XDRESS',), undefines=(),
     variables, functions, classes = [],[],[]
     def visit(node):
         kind = node.kind
-        if kind == CursorKind.NAMESPACE:
+        if kind == cindex.CursorKind.NAMESPACE:
             for kid in node.get_children():
                 visit(kid)
-        elif kind == CursorKind.ENUM_DECL:
+        elif kind == cindex.CursorKind.ENUM_DECL:
             variables.append(node.spelling)
-        elif kind == CursorKind.FUNCTION_DECL:
+        elif kind == cindex.CursorKind.FUNCTION_DECL:
             functions.append(node.spelling)
-        elif kind in (CursorKind.CLASS_DECL,CursorKind.STRUCT_DECL):
+        elif kind in (cindex.CursorKind.CLASS_DECL,cindex.CursorKind.STRUCT_DECL):
             classes.append(node.spelling)
     for node in tu.cursor.get_children():
         file = node.extent.start.file
@@ -486,6 +478,26 @@ def findall(filename, includes=(), defines=('XDRESS',), undefines=(),
     return rtn
 
 
+_worker_state = {}
+
+def _findall_task(task):
+    """Finds all API elements in a single source file.  This is the unit of
+    work that the plugin hands to worker processes."""
+    filename, kwargs = task
+    state = _worker_state
+    with utils.TRACER.span(filename, 'autoall.findall'):
+        found = findall(filename, **kwargs)
+    deps = astparsers.dependencies(filename)
+    if os.name == 'nt':
+        # GCC-XML is given posix paths on Windows.
+        deps = deps or astparsers.dependencies(posixpath.join(*ntpath.split(filename)))
+    period = state['period']
+    if period and 0 == state['ncalls']%period:
+        astparsers.clearmemo()
+    state['ncalls'] += 1
+    return found, deps
+
+
 #
 # Persisted Cache for great speed up
 #
@@ -493,7 +505,8 @@ def findall(filename, includes=(), defines=('XDRESS',), undefines=(),
 class AutoNameCache(object):
     """A quick persistent cache for name lists automatically found in files.  
     The keys are (classname, filename, kind) tuples.  The values are 
-    (hashes-of-the-file, finder-results) tuples."""
+    (hashes-of-the-file, finder-results, dependency-fingerprints) tuples, 
+    where the dependencies are the transitive includes of the file."""
 
     def __init__(self, cachefile=os.path.join('build', 'autoname.cache')):
         """Parameters
@@ -503,45 +516,95 @@ class AutoNameCache(object):
 
         """
         self.cachefile = cachefile
-        if os.path.isfile(cachefile):
-            with io.open(cachefile, 'rb') as f:
-                self.cache = pickle.load(f)
-        else:
-            self.cache = {}
+        self.counters = utils.register_cache_counters(utils.CacheCounters('autonames'))
+        self.journal = utils.CacheJournal(cachefile)
+        with self.counters.timer('open'):
+            self.cache = self.journal.load()
 
-    def isvalid(self, filename):
+    def isvalid(self, filename, context=None):
         """Boolean on whether the cach value for a filename matches the state 
-        of the file on the system."""
+        of the file and its includes on the system.  If a context is given and
+        there is a shared cache, a missing or stale entry is looked up there 
+        as well, see fetch_shared()."""
         key = filename
-        if key not in self.cache:
+        entry = self.cache.get(key, None)
+        if entry is not None and len(entry) == 3:
+            cachehash, _, deps = entry
+            with self.counters.timer('validate'):
+                currhash = utils.file_digest(filename)
+                valid = cachehash == currhash and utils.check_fingerprints(deps)[0]
+            if valid:
+                self.counters.incr('hits')
+                return True
+            self.counters.incr('stale')
+        if context is not None and self.fetch_shared(filename, context):
+            self.counters.incr('hits')
+            self.counters.incr('shared hits')
+            return True
+        self.counters.incr('misses')
+        return False
+
+    def _shared_key(self, filename, context):
+        return utils.SharedCache.key('autoname', utils.file_digest(filename), 
+                                     context)
+
+    def fetch_shared(self, filename, context):
+        """Looks up the finder results for a file in the shared cache by the 
+        file's contents and a context -- a hashable summary of the parsers, 
+        flags, etc. that they were computed with.  On a hit whose dependencies
+        match the files here, the results are added to this cache and True is
+        returned."""
+        shared = utils.SHARED_CACHE
+        if shared is None:
             return False
-        cachehash = self.cache[key][0]
-        with io.open(filename, 'rb') as f:
-            filebytes = f.read()
-        currhash = md5(filebytes).hexdigest()
-        return cachehash == currhash
+        value = shared.get(self._shared_key(filename, context))
+        if value is None:
+            return False
+        found, deps = value
+        if not utils.check_digests(deps):
+            return False
+        self.set(filename, found, dependencies=deps.keys())
+        return True
 
     def __getitem__(self, key):
         return self.cache[key][1]  # return the results of the finder only
 
     def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value, dependencies=(), context=None):
+        """Sets the finder results for a file along with the paths of the files
+        which the results depend on, i.e. its transitive includes.  Changes to
+        any of these invalidate the entry.  If a context is given, the results
+        are also stored in the shared cache, if any, see fetch_shared()."""
         filename = key
-        with io.open(filename, 'rb') as f:
-            filebytes = f.read()
-        currhash = md5(filebytes).hexdigest()
-        self.cache[key] = (currhash, value)
+        with self.counters.timer('store'):
+            currhash = utils.file_digest(filename)
+            entry = (currhash, value, utils.file_fingerprints(dependencies))
+            self.cache[key] = entry
+            self.journal.append(key, entry)
+        if context is not None and utils.SHARED_CACHE is not None:
+            utils.SHARED_CACHE.put(self._shared_key(filename, context),
+                                   (value, utils.file_digests(dependencies)))
 
     def __delitem__(self, key):
         del self.cache[key]
+        self.journal.append(key, None)
+
+    def dependencies(self, filename):
+        """Returns the paths of the files which the cached results for a file
+        depend on, or an empty list if there are none."""
+        entry = self.cache.get(filename, None)
+        if entry is None or len(entry) < 3:
+            return []
+        return list(entry[2].keys())
 
     def dump(self):
-        """Writes the cache out to the filesystem."""
-        if not os.path.exists(self.cachefile):
-            pardir = os.path.split(self.cachefile)[0]
-            if not os.path.exists(pardir):
-                os.makedirs(pardir)
-        with io.open(self.cachefile, 'wb') as f:
-            pickle.dump(self.cache, f, pickle.HIGHEST_PROTOCOL)
+        """Compacts the cache and its journal into a single file.  Changes are
+        already journaled as they are made, so this need only be called once,
+        at the end of a run."""
+        with self.counters.timer('dump'):
+            self.journal.compact(self.cache)
 
     def __str__(self):
         return pformat(self.cache)
@@ -555,6 +618,9 @@ class XDressPlugin(astparsers.ParserPlugin):
     source files prio to describing them. 
     """
     allsrc = varhasstar = fnchasstar = clshasstar = None
+    autonamecache = None
+    apinames = None
+    reads = writes = ()
 
     def defaultrc(self):
         rc = RunControl()
@@ -581,6 +647,36 @@ class XDressPlugin(astparsers.ParserPlugin):
         # dummy
         pass
 
+    def teardown(self, rc):
+        """Compacts the name cache journal."""
+        super(XDressPlugin, self).teardown(rc)
+        if self.autonamecache is not None:
+            self.autonamecache.dump()
+
+    def watched(self, rc):
+        """The source files which are searched and their includes."""
+        paths = set(self.allsrc or ())
+        if self.autonamecache is not None:
+            for srcfile in self.allsrc:
+                paths.update(self.autonamecache.dependencies(srcfile))
+        return paths
+
+    def invalidate(self, rc, paths):
+        """Searches the source files which have changed again, and expands the
+        '*' names in the original variables, functions, and classes anew."""
+        super(XDressPlugin, self).invalidate(rc, paths)
+        if self.autonamecache is None:
+            return False
+        for srcfile in self.allsrc:
+            deps = [srcfile] + self.autonamecache.dependencies(srcfile)
+            if any([os.path.abspath(f) in paths for f in deps]):
+                break
+        else:
+            return False
+        rc.variables, rc.functions, rc.classes = [list(x) for x in self.apinames]
+        self.setup_heavy(rc)
+        return False
+
     # Helper methods
 
     def setup_basic(self, rc):
@@ -611,6 +707,7 @@ class XDressPlugin(astparsers.ParserPlugin):
         self.varhasstar = varhasstar
         self.fnchasstar = fnchasstar
         self.clshasstar = clshasstar
+        self.apinames = (list(rc.variables), list(rc.functions), list(rc.classes))
 
     def setup_heavy(self, rc):
         """Does the hard work of actually searching the source files."""
@@ -623,28 +720,44 @@ class XDressPlugin(astparsers.ParserPlugin):
 
         # second pass -- find all
         allfiles = {}
-        cachefile = os.path.join(rc.builddir, 'autoname.cache')
-        autonamecache = AutoNameCache(cachefile=cachefile)
-        for i, (srcfile, lang) in enumerate(allsrc.items()):
+        if self.autonamecache is None:
+            cachefile = os.path.join(rc.builddir, 'autoname.cache')
+            self.autonamecache = AutoNameCache(cachefile=cachefile)
+        autonamecache = self.autonamecache
+        srcfiles = list(allsrc.keys())
+        tasks = []
+        stale = set()
+        contexts = {}
+        if utils.SHARED_CACHE is not None:
+            for language in set(allsrc.values()):
+                contexts[language] = astparsers.shared_cache_context(rc, language)
+        for srcfile in srcfiles:
+            if autonamecache.isvalid(srcfile, context=contexts.get(allsrc[srcfile])):
+                continue
+            stale.add(srcfile)
+            kwargs = dict(includes=rc.includes, defines=rc.defines,
+                          undefines=rc.undefines,
+                          extra_parser_args=rc.extra_parser_args,
+                          parsers=rc.parsers, verbose=rc.verbose, debug=rc.debug,
+                          builddir=rc.builddir, language=allsrc[srcfile],
+                          clang_includes=rc.clang_includes)
+            tasks.append((srcfile, kwargs))
+        _worker_state.update(ncalls=0, period=rc.clear_parser_cache_period)
+        results = parallel_imap(_findall_task, tasks, jobs=rc.jobs)
+        for srcfile in srcfiles:
             print("autoall: searching {0}".format(srcfile))
-            if autonamecache.isvalid(srcfile):
-                found = autonamecache[srcfile]
+            if srcfile in stale:
+                with autonamecache.counters.timer('compute'):
+                    found, deps = next(results)
+                autonamecache.set(srcfile, found, dependencies=deps,
+                                  context=contexts.get(allsrc[srcfile]))
             else:
-                found = findall(srcfile, includes=rc.includes, defines=rc.defines, 
-                                undefines=rc.undefines, 
-                                extra_parser_args=rc.extra_parser_args, 
-                                parsers=rc.parsers, verbose=rc.verbose, 
-                                debug=rc.debug, builddir=rc.builddir, language=lang,
-                                clang_includes=rc.clang_includes)
-                autonamecache[srcfile] = found
-                autonamecache.dump()
+                found = autonamecache[srcfile]
             allfiles[srcfile] = found
             for k, kind in enumerate(kinds):
                 if 0 < len(found[k]):
                     fstr = ", ".join([str(_) for _ in found[k]])
                     print("autoall: found {0}: {1}".format(kind, fstr))
-            if 0 == i%rc.clear_parser_cache_period:
-                astparsers.clearmemo()
 
         # third pass -- replace *s
         if self.varhasstar:
@@ -230,6 +230,7 @@ import io
 import re
 import sys
 import ast
+import time
 from copy import deepcopy
 import linecache
 import subprocess
@@ -247,26 +248,17 @@ if os.name == 'nt':
     import ntpath
     import posixpath
 
-# pycparser conditional imports
-try:
-    import pycparser
-    PycparserNodeVisitor = pycparser.c_ast.NodeVisitor
-except ImportError:
-    pycparser = None
-    PycparserNodeVisitor = object  # fake this for class definitions
-
 from . import utils
 from .utils import exec_file, RunControl, NotSpecified, Arg, merge_descriptions, \
     find_source, FORBIDDEN_NAMES, find_filenames, warn_forbidden_name, apiname, \
-    ensure_apiname, c_literal, extra_filenames, newoverwrite, _lang_exts
+    ensure_apiname, c_literal, extra_filenames, newoverwrite, _lang_exts, \
+    parallel_imap, TRACER
 from . import astparsers
+from .astparsers import pycparser, PycparserNodeVisitor
 from .typesystem import TypeSystem
 
-try:
-    from . import clang
-    from .clang.cindex import CursorKind, TypeKind, AccessKind
-except ImportError:
-    clang = None
+# clang bindings, loaded on first use
+cindex = utils.lazy_import('xdress.clang.cindex')
 
 if sys.version_info[0] >= 3:
     basestring = str
@@ -317,41 +309,46 @@ def _make_c_to_xdress():
             c_to_xdress[c] = n
     return c_to_xdress
 
-_c_to_xdress = _make_c_to_xdress()
 _integer_types = frozenset(s+i for i in 'int16 int32 int64 short intc int longlong'.split() for s in ('','u'))
 _float_types = frozenset('float double float32 float64'.split())
 
-if clang is not None:
-    _clang_base_types = {
-        TypeKind.VOID       : 'void',
-        TypeKind.BOOL       : 'bool',
-        TypeKind.CHAR_U     : 'ubyte',
-        TypeKind.UCHAR      : 'ubyte',
-        TypeKind.USHORT     : 'ushort',
-        TypeKind.UINT       : 'uintc',
-        TypeKind.ULONG      : 'uint',
-        TypeKind.ULONGLONG  : 'ulonglong',
-        TypeKind.CHAR_S     : 'byte',
-        TypeKind.SCHAR      : 'byte',
-        TypeKind.SHORT      : 'short',
-        TypeKind.INT        : 'intc',
-        TypeKind.LONG       : 'int',
-        TypeKind.LONGLONG   : 'longlong',
-        TypeKind.FLOAT      : 'float32',
-        TypeKind.DOUBLE     : 'float64',
-        TypeKind.LONGDOUBLE : 'longdouble',
+def _make_clang_base_types():
+    return {
+        cindex.TypeKind.VOID       : 'void',
+        cindex.TypeKind.BOOL       : 'bool',
+        cindex.TypeKind.CHAR_U     : 'ubyte',
+        cindex.TypeKind.UCHAR      : 'ubyte',
+        cindex.TypeKind.USHORT     : 'ushort',
+        cindex.TypeKind.UINT       : 'uintc',
+        cindex.TypeKind.ULONG      : 'uint',
+        cindex.TypeKind.ULONGLONG  : 'ulonglong',
+        cindex.TypeKind.CHAR_S     : 'byte',
+        cindex.TypeKind.SCHAR      : 'byte',
+        cindex.TypeKind.SHORT      : 'short',
+        cindex.TypeKind.INT        : 'intc',
+        cindex.TypeKind.LONG       : 'int',
+        cindex.TypeKind.LONGLONG   : 'longlong',
+        cindex.TypeKind.FLOAT      : 'float32',
+        cindex.TypeKind.DOUBLE     : 'float64',
+        cindex.TypeKind.LONGDOUBLE : 'longdouble',
         }
 
-if 1:
-    # TODO: This step uses platform dependent details, and will need to be cleaned
-    # if we want to generate platform independent .pyx files.
-    from numpy import dtype
-    def hack_type(t):
-        t = dtype(t).name
-        return t[:-4]+'char' if t.endswith('int8') else t
-    _c_to_xdress = dict((k,hack_type(v)) for k,v in _c_to_xdress.items())
-    if clang is not None:
-        _clang_base_types = dict((k,hack_type(v)) for k,v in _clang_base_types.items())
+_base_type_maps = {}
+
+def _base_types(parser):
+    """Returns the map from C type names ('gccxml') or from clang type kinds
+    ('clang') to xdress types.  These are built on first use, since they need
+    numpy and the clang bindings."""
+    if parser not in _base_type_maps:
+        # TODO: This step uses platform dependent details, and will need to be 
+        # cleaned if we want to generate platform independent .pyx files.
+        from numpy import dtype
+        def hack_type(t):
+            t = dtype(t).name
+            return t[:-4]+'char' if t.endswith('int8') else t
+        make = _make_clang_base_types if parser == 'clang' else _make_c_to_xdress
+        _base_type_maps[parser] = dict((k,hack_type(v)) for k,v in make().items())
+    return _base_type_maps[parser]
 
 # Hard code knowledge of certain templated classes, so that allocator arguments
 # can be stripped.  TODO: This should be replaced by a more flexible mechanism
@@ -420,18 +417,62 @@ def gccxml_describe(filename, name, kind, includes=(), defines=('XDRESS',),
     # GCC-XML and/or Cygwin wants posix paths on Windows.
     posixfilename = posixpath.join(*ntpath.split(filename)) if os.name == 'nt' \
                     else filename
+    if onlyin is None:
+        onlyin = set([filename])
     root = astparsers.gccxml_parse(posixfilename, includes=includes, defines=defines,
                                    undefines=undefines,
                                    extra_parser_args=extra_parser_args,
-                                   verbose=verbose, debug=debug, builddir=builddir)
-    if onlyin is None:
-        onlyin = set([filename])
+                                   verbose=verbose, debug=debug, builddir=builddir,
+                                   onlyin=onlyin)
     describers = {'class': GccxmlClassDescriber, 'func': GccxmlFuncDescriber,
                   'var': GccxmlVarDescriber}
     describer = describers[kind](name, root, onlyin=onlyin, ts=ts, verbose=verbose)
     describer.visit()
     return describer.desc
 
+def gccxml_describe_many(filename, names_kinds, includes=(), defines=('XDRESS',),
+                         undefines=(), extra_parser_args=(), ts=None, verbose=False,
+                         debug=False, builddir='build', onlyin=None, language='c++',
+                         clang_includes=()):
+    """Use GCC-XML to describe many API elements from the same file.  The file
+    is parsed and indexed exactly once and every element is resolved against
+    this same tree.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the file.
+    names_kinds : sequence of (name, kind) tuples
+        The names to describe paired with the kind of each one, valid kinds are
+        'class', 'func', and 'var'.
+    includes, defines, undefines, extra_parser_args, ts, verbose, debug, builddir,
+    onlyin, language, clang_includes :
+        Same as for gccxml_describe().
+
+    Returns
+    -------
+    descs : list of dicts
+        The descriptions, in the same order as names_kinds.
+    """
+    posixfilename = posixpath.join(*ntpath.split(filename)) if os.name == 'nt' \
+                    else filename
+    if onlyin is None:
+        onlyin = set([filename])
+    root = astparsers.gccxml_parse(posixfilename, includes=includes, defines=defines,
+                                   undefines=undefines,
+                                   extra_parser_args=extra_parser_args,
+                                   verbose=verbose, debug=debug, builddir=builddir,
+                                   onlyin=onlyin)
+    describers = {'class': GccxmlClassDescriber, 'func': GccxmlFuncDescriber,
+                  'var': GccxmlVarDescriber}
+    descs = []
+    for name, kind in names_kinds:
+        describer = describers[kind](name, root, onlyin=onlyin, ts=ts,
+                                     verbose=verbose)
+        describer.visit()
+        descs.append(describer.desc)
+    return descs
+
 
 class GccxmlBaseDescriber(object):
     """Base class used to generate descriptions via GCC-XML output.
@@ -461,24 +502,20 @@ class GccxmlBaseDescriber(object):
         self.name = name
         self.ts = ts or TypeSystem()
         self.verbose = verbose
-        self._root = root
+        self._root = root = astparsers.gccxml_tree(root)
         origonlyin = onlyin
         onlyin = [onlyin] if isinstance(onlyin, basestring) else onlyin
         onlyin = set() if onlyin is None else set(onlyin)
         self.onlyin = set()
         self._filemap = {}
-        for fnode in root.iterfind("File"):
+        for fnode in root.bytag("File"):
             fid = fnode.attrib['id']
             fname = fnode.attrib['name']
-
             self._filemap[fid] = fname
         for fname in onlyin:
-            fnode = root.find("File[@name='{0}']".format(fname))
-            if fnode is None:
-                fnode = root.find("File[@name='./{0}']".format(fname))
-                if fnode is None:
-                    continue
-            fid = fnode.attrib['id']
+            fid = root.fileid(fname)
+            if fid is None:
+                continue
             self.onlyin.add(fid)
         if 0 == len(self.onlyin):
             msg = "{0!r} is not present in {1!r}; autodescribing will probably fail."
@@ -510,8 +547,7 @@ class GccxmlBaseDescriber(object):
         if m is None:
             return None
         enumname, val = m.groups()
-        query = ".//*[@name='{0}']"
-        node = self._root.find(query.format(enumname))
+        node = self._root.findname(enumname)
         if node is None:
             return None
         for child in node.iterfind('EnumValue'):
@@ -532,9 +568,8 @@ class GccxmlBaseDescriber(object):
         targ_nodes = []
         targ_islit = []
         # gross but string parsing of node name is needed.
-        query = ".//*[@name='{0}']"
         for targ in template_args:
-            targ_node = self._root.find(query.format(targ))
+            targ_node = self._root.findname(targ)
             if targ_node is None:
                 try:
                     targ_node = c_literal(targ)
@@ -566,8 +601,8 @@ class GccxmlBaseDescriber(object):
         name = node.attrib['name']
         members = node.attrib.get('members', '').strip().split()
         if 0 < len(members):
-            children = [child for m in members for child in \
-                        self._root.iterfind(".//*[@id='{0}']".format(m))]
+            children = [self._root.byid(m) for m in members]
+            children = [child for child in children if child is not None]
             tags = [child.tag for child in children]
             template_name = children[tags.index('Constructor')].attrib['name']  # 'map'
         else:
@@ -586,9 +621,8 @@ class GccxmlBaseDescriber(object):
         else:
             # gross but string parsing of node name is needed.
             targs = utils.split_template_args(name)
-            query = ".//*[@name='{0}']"
             for targ in targs:
-                targ_node = self._root.find(query.format(targ))
+                targ_node = self._root.findname(targ)
                 if targ_node is None:
                     targ_node = c_literal(targ)
                     targ_islit.append(True)
@@ -736,7 +770,7 @@ class GccxmlBaseDescriber(object):
     def visit_field(self, node):
         """visits a member variable."""
         self._pprint(node)
-        context = self._root.find(".//*[@id='{0}']".format(node.attrib['context']))
+        context = self._root.byid(node.attrib['context'])
         if context.attrib['name'] == self.name:
             # assert this field is member of the class we are trying to parse
             name = node.attrib['name']
@@ -767,7 +801,7 @@ class GccxmlBaseDescriber(object):
         type system."""
         self._pprint(node)
         tname = node.attrib['name']
-        t = _c_to_xdress.get(tname, None)
+        t = _base_types('gccxml').get(tname, None)
         return t
 
     _predicates = frozenset(['*', '&', 'const', 'volatile', 'restrict'])
@@ -835,7 +869,7 @@ class GccxmlBaseDescriber(object):
 
     def type(self, id):
         """Resolves the type from its id and information in the root element tree."""
-        node = self._root.find(".//*[@id='{0}']".format(id))
+        node = self._root.byid(id)
         tag = node.tag.lower()
         meth_name = 'visit_' + tag
         meth = getattr(self, meth_name, None)
@@ -854,7 +888,7 @@ class GccxmlBaseDescriber(object):
 
     def context(self, id):
         """Resolves the context from its id and information in the element tree."""
-        node = self._root.find(".//*[@id='{0}']".format(id))
+        node = self._root.byid(id)
         tag = node.tag.lower()
         meth_name = 'visit_' + tag
         meth = getattr(self, meth_name, None)
@@ -904,8 +938,7 @@ class GccxmlClassDescriber(GccxmlBaseDescriber):
     def _find_class_node(self):
         basename = self.name[0]
         namet = self.desc['type']
-        query = "Class"
-        for node in self._root.iterfind(query):
+        for node in self._root.bytag("Class"):
             if node.attrib['file'] not in self.onlyin:
                 continue
             nodename = node.attrib['name']
@@ -936,14 +969,11 @@ class GccxmlClassDescriber(GccxmlBaseDescriber):
             if not isinstance(self.name, basestring) and self.name not in self.ts.argument_kinds:
                 node = self._find_class_node()
             if node is None:
-                query = "Class[@name='{0}']".format(self.ts.gccxml_type(self.name))
-                node = self._root.find(query)
-            if node is None:
-                query = "Struct[@name='{0}']".format(self.ts.gccxml_type(self.name))
-                node = self._root.find(query)
-            if node is None:
-                query = "Union[@name='{0}']".format(self.ts.gccxml_type(self.name))
-                node = self._root.find(query)
+                gccxmlname = self.ts.gccxml_type(self.name)
+                for tag in ("Class", "Struct", "Union"):
+                    node = self._root.findname(gccxmlname, tag)
+                    if node is not None:
+                        break
             if node is None and not isinstance(self.name, basestring):
                 # Must be a template with some wacky argument values
                 node = self._find_class_node()
@@ -961,7 +991,7 @@ class GccxmlClassDescriber(GccxmlBaseDescriber):
             self.desc['construct'] = node.tag.lower()
             self.visit_class(node)
         members = node.attrib.get('members', '').strip().split()
-        children = [self._root.find(".//*[@id='{0}']".format(m)) for m in members]
+        children = [self._root.byid(m) for m in members]
         children = [c for c in children if c.attrib['access'] == 'public']
         self._level += 1
         for child in children:
@@ -1007,8 +1037,13 @@ class GccxmlVarDescriber(GccxmlBaseDescriber):
             top-level class node is found and visited.
 
         """
-        root = node or self._root
-        for n in root.iterfind("Variable[@name='{0}']".format(self.name)):
+        if node is None:
+            variables = self._root.byname(self.name, "Variable")
+            enums = self._root.byname(self.name, "Enumeration")
+        else:
+            variables = node.iterfind("Variable[@name='{0}']".format(self.name))
+            enums = node.iterfind("Enumeration[@name='{0}']".format(self.name))
+        for n in variables:
             if n.attrib['file'] in self.onlyin:
                 ns = self.context(n.attrib['context'])
                 if ns is not None and ns != "::":
@@ -1022,7 +1057,7 @@ class GccxmlVarDescriber(GccxmlBaseDescriber):
                 raise RuntimeError(msg)
 
         # Variables can also be enums
-        for n in root.iterfind("Enumeration[@name='{0}']".format(self.name)):
+        for n in enums:
             if n.attrib['file'] in self.onlyin:
                 ns = self.context(n.attrib['context'])
                 if ns is not None and ns != "::":
@@ -1074,7 +1109,6 @@ class GccxmlFuncDescriber(GccxmlBaseDescriber):
             top-level class node is found and visited.
 
         """
-        root = node or self._root
         name = self.name
         ts = self.ts
         if isinstance(name, basestring):
@@ -1093,7 +1127,11 @@ class GccxmlFuncDescriber(GccxmlBaseDescriber):
             namet = tuple(namet)
         if not isinstance(name, basestring):
             pattern = re.compile(r'(?: |::)'+basename+'.*>')
-        for n in root.iterfind("Function[@name='{0}']".format(basename)):
+        if node is None:
+            funcs = self._root.byname(basename, "Function")
+        else:
+            funcs = node.iterfind("Function[@name='{0}']".format(basename))
+        for n in funcs:
             if not isinstance(name, basestring):
                 # Must be a template function
                 if n.attrib['file'] not in self.onlyin:
@@ -1165,6 +1203,49 @@ def clang_describe(filename, name, kind, includes=(), defines=('XDRESS',),
     if onlyin is None:
         onlyin = None if filename is None else frozenset([filename])
     onlyin = clang_fix_onlyin(onlyin)
+    desc = _clang_describe_decl(tu, name, kind, ts, filename, onlyin)
+    linecache.clearcache() # Clean up results of clang_range_str
+    return desc
+
+def clang_describe_many(filename, names_kinds, includes=(), defines=('XDRESS',),
+                        undefines=(), extra_parser_args=(), ts=None, verbose=False,
+                        debug=False, builddir=None, onlyin=None, language='c++',
+                        clang_includes=()):
+    """Use Clang to describe many API elements from the same file.  The
+    translation unit is parsed and its declarations are indexed exactly once,
+    see clang_decl_index().
+
+    Parameters
+    ----------
+    filename : str
+        The path to the file.
+    names_kinds : sequence of (name, kind) tuples
+        The names to describe paired with the kind of each one, valid kinds are
+        'class', 'func', and 'var'.
+    includes, defines, undefines, extra_parser_args, ts, verbose, debug, builddir,
+    onlyin, language, clang_includes :
+        Same as for clang_describe().
+
+    Returns
+    -------
+    descs : list of dicts
+        The descriptions, in the same order as names_kinds.
+    """
+    tu = astparsers.clang_parse(filename, includes=includes, defines=defines,
+                                undefines=undefines,
+                                extra_parser_args=extra_parser_args, verbose=verbose,
+                                debug=debug, language=language,
+                                clang_includes=clang_includes)
+    ts = ts or TypeSystem()
+    if onlyin is None:
+        onlyin = None if filename is None else frozenset([filename])
+    onlyin = clang_fix_onlyin(onlyin)
+    descs = [_clang_describe_decl(tu, name, kind, ts, filename, onlyin)
+             for name, kind in names_kinds]
+    linecache.clearcache() # Clean up results of clang_range_str
+    return descs
+
+def _clang_describe_decl(tu, name, kind, ts, filename, onlyin):
     if kind == 'class':
         cls = clang_find_class(tu, name, ts=ts, filename=filename, onlyin=onlyin)
         desc = clang_describe_class(cls)
@@ -1176,7 +1257,6 @@ def clang_describe(filename, name, kind, includes=(), defines=('XDRESS',),
         desc = clang_describe_var(var)
     else:
         raise ValueError('bad description kind {0}, name {1}'.format(kind,name))
-    linecache.clearcache() # Clean up results of clang_range_str
     return desc
 
 def clang_fix_onlyin(onlyin):
@@ -1208,7 +1288,7 @@ def clang_range_str(source_range):
 
 def clang_find_scopes(tu, onlyin, namespace=None):
     """Find all 'toplevel' scopes, optionally restricting to a given namespace"""
-    namespace_kind = CursorKind.NAMESPACE
+    namespace_kind = cindex.CursorKind.NAMESPACE
     if namespace is None:
         def all_namespaces(node):
             for n in node.get_children():
@@ -1226,16 +1306,71 @@ def clang_find_scopes(tu, onlyin, namespace=None):
                     scopes.append(n)
         return scopes
 
+class ClangDeclIndex(object):
+    """An index of all declarations in the toplevel scopes of a translation
+    unit which live in the onlyin files.  This is built with a single
+    traversal, so that looking up the declarations of any name -- optionally
+    restricted to a toplevel namespace -- is a dictionary hit rather than a walk
+    over every child of every namespace through libclang.  Declarations are
+    kept in the same order that such a walk would have found them.
+    """
+
+    def __init__(self, tu, onlyin=None):
+        """Parameters
+        -------------
+        tu : libclang TranslationUnit object
+            The translation unit to index.
+        onlyin : set of str, optional
+            The paths to the files that the declarations must exist in.
+
+        """
+        self.decls = {}    # spelling -> declarations in any scope
+        self.nsdecls = {}  # (namespace, spelling) -> declarations
+        namespace_kind = cindex.CursorKind.NAMESPACE
+        def all_namespaces(node, toplevel):
+            for n in node.get_children():
+                if n.kind == namespace_kind:
+                    if onlyin is None or n.location.file.name in onlyin:
+                        yield n, toplevel
+                    for c in all_namespaces(n, False):
+                        yield c
+        scopes = [(tu.cursor, False)] + list(all_namespaces(tu.cursor, True))
+        for s, toplevel in scopes[::-1]:
+            for c in s.get_children():
+                if onlyin is not None:
+                    f = c.location.file
+                    if f is None or f.name not in onlyin:
+                        continue
+                spelling = c.spelling
+                self.decls.setdefault(spelling, []).append(c)
+                if toplevel:
+                    self.nsdecls.setdefault((s.spelling, spelling), []).append(c)
+
+    def find(self, name, kinds, namespace=None):
+        """Returns the declarations of a name which are of the given kinds,
+        optionally restricted to a toplevel namespace."""
+        if namespace is None:
+            decls = self.decls.get(name, ())
+        else:
+            decls = self.nsdecls.get((namespace, name), ())
+        return [c for c in decls if c.kind in kinds]
+
+def clang_decl_index(tu, onlyin=None):
+    """Returns the declaration index of a translation unit for the given onlyin
+    files.  The index is cached on the translation unit itself, so that it lives
+    exactly as long as the memoized translation unit does."""
+    indices = getattr(tu, 'xdress_decl_indices', None)
+    if indices is None:
+        indices = tu.xdress_decl_indices = {}
+    if onlyin not in indices:
+        indices[onlyin] = ClangDeclIndex(tu, onlyin=onlyin)
+    return indices[onlyin]
+
 def clang_find_decls(tu, name, kinds, onlyin, namespace=None):
-    """Find all declarations of the given name and kind in the given scopes."""
-    scopes = clang_find_scopes(tu, onlyin, namespace=namespace)
-    decls = []
-    for s in scopes[::-1]:
-        for c in s.get_children():
-            if c.kind in kinds and c.spelling == name:
-                if onlyin is None or c.location.file.name in onlyin:
-                    decls.append(c)
-    return decls
+    """Find all declarations of the given name and kind in the toplevel scopes,
+    optionally restricting to a given namespace.  This uses the index of the
+    translation unit, see clang_decl_index()."""
+    return clang_decl_index(tu, onlyin).find(name, kinds, namespace=namespace)
 
 # TODO: This functionality belongs in TypeSystem
 def canon_template_arg(ts, kind, arg):
@@ -1259,11 +1394,12 @@ def clang_find_class(tu, name, ts, namespace=None, filename=None, onlyin=None):
         if name[-1] != 0:
             raise NotImplementedError('no predicate support in clang class description')
         args = name[1:-1]
-        kinds = CursorKind.CLASS_TEMPLATE,
+        kinds = cindex.CursorKind.CLASS_TEMPLATE,
     else:
         basename = name
-        kinds = CursorKind.CLASS_DECL, CursorKind.STRUCT_DECL, CursorKind.UNION_DECL
-    decls = clang_find_decls(tu, basename, kinds=kinds, onlyin=onlyin, namespace=namespace)
+        kinds = cindex.CursorKind.CLASS_DECL, cindex.CursorKind.STRUCT_DECL, cindex.CursorKind.UNION_DECL
+    decls = clang_find_decls(tu, basename, kinds=kinds, onlyin=onlyin,
+                             namespace=namespace)
     decls = frozenset(c.get_definition() or c for c in decls) # Use definitions if available
     if len(decls)==1:
         decl, = decls
@@ -1295,11 +1431,12 @@ def clang_find_function(tu, name, ts, namespace=None, filename=None, onlyin=None
     if templated:
         basename = name[0]
         args = name[1:]
-        kinds = CursorKind.FUNCTION_TEMPLATE,
+        kinds = cindex.CursorKind.FUNCTION_TEMPLATE,
     else:
         basename = name
-        kinds = CursorKind.FUNCTION_DECL,
-    decls = clang_find_decls(tu, basename, kinds=kinds, onlyin=onlyin, namespace=namespace)
+        kinds = cindex.CursorKind.FUNCTION_DECL,
+    decls = clang_find_decls(tu, basename, kinds=kinds, onlyin=onlyin,
+                             namespace=namespace)
     if decls:
         if not templated:
             # No templates, so we're done
@@ -1326,8 +1463,9 @@ def clang_find_function(tu, name, ts, namespace=None, filename=None, onlyin=None
 def clang_find_var(tu, name, ts, namespace=None, filename=None, onlyin=None):
     """Find the node for a given var."""
     assert isinstance(name, basestring)
-    kinds = CursorKind.ENUM_DECL,
-    decls = clang_find_decls(tu, name, kinds=kinds, onlyin=onlyin, namespace=namespace)
+    kinds = cindex.CursorKind.ENUM_DECL,
+    decls = clang_find_decls(tu, name, kinds=kinds, onlyin=onlyin,
+                             namespace=namespace)
     decls = list(set(c.get_definition() or c for c in decls)) # Use definitions if available
     if len(decls)==1:
         return decls[0]
@@ -1345,7 +1483,7 @@ def clang_dump(node, indent=0, onlyin=None, file=sys.stdout):
     except AttributeError:
         spelling = '<unknown-spelling>'
     s = '%*s%s %s'%(indent,'',node.kind.name,spelling)
-    if node.kind == CursorKind.CXX_ACCESS_SPEC_DECL:
+    if node.kind == cindex.CursorKind.CXX_ACCESS_SPEC_DECL:
         s += ' '+node.access.name
     r = node.extent
     if r.start.line == r.end.line:
@@ -1364,7 +1502,7 @@ def clang_dump(node, indent=0, onlyin=None, file=sys.stdout):
                 clang_dump(c,indent+2,file=file)
 
 def clang_parent_namespace(node):
-    if node.semantic_parent.kind == CursorKind.NAMESPACE:
+    if node.semantic_parent.kind == cindex.CursorKind.NAMESPACE:
         return node.semantic_parent.spelling
     # Otherwise, return none
 
@@ -1378,11 +1516,11 @@ def clang_describe_class(cls):
     parents = []
     attrs = {}
     methods = {}
-    if cls.kind == CursorKind.CLASS_DECL:
+    if cls.kind == cindex.CursorKind.CLASS_DECL:
         construct = 'class'
-    elif cls.kind == CursorKind.STRUCT_DECL:
+    elif cls.kind == cindex.CursorKind.STRUCT_DECL:
         construct = 'struct'
-    elif cls.kind == CursorKind.UNION_DECL:
+    elif cls.kind == cindex.CursorKind.UNION_DECL:
         construct = 'union'
     else:
         raise ValueError('bad class kind {0}'.format(cls.kind.name))
@@ -1397,21 +1535,21 @@ def clang_describe_class(cls):
         cons = typ
     for kid in cls.get_children(all_spec_bodies=1):
         kind = kid.kind
-        if kind == CursorKind.CXX_BASE_SPECIFIER:
+        if kind == cindex.CursorKind.CXX_BASE_SPECIFIER:
             parents.append(clang_describe_type(kid.type, kid.location))
-        elif kid.access == AccessKind.PUBLIC:
-            if kind == CursorKind.CXX_METHOD:
+        elif kid.access == cindex.AccessKind.PUBLIC:
+            if kind == cindex.CursorKind.CXX_METHOD:
                 # TODO: For now, we ignore operators
                 if not _operator_pattern.match(kid.spelling):
                     sig, defaults = clang_describe_args(kid)
                     methods[sig] = {'return': clang_describe_type(kid.result_type, kid.location),
                                     'defaults': defaults}
-            elif kind == CursorKind.CONSTRUCTOR:
+            elif kind == cindex.CursorKind.CONSTRUCTOR:
                 sig, defaults = clang_describe_args(kid)
                 methods[(cons,)+sig[1:]] = {'return': None, 'defaults': defaults}
-            elif kind == CursorKind.DESTRUCTOR:
+            elif kind == cindex.CursorKind.DESTRUCTOR:
                 methods[(dest,)] = _none_return
-            elif kind == CursorKind.FIELD_DECL:
+            elif kind == cindex.CursorKind.FIELD_DECL:
                 attrs[kid.spelling] = clang_describe_type(kid.type, kid.location)
     # Make sure defaulted methods are described
     if cls.has_default_constructor():
@@ -1434,7 +1572,7 @@ def clang_describe_class(cls):
 
 def clang_describe_var(var):
     """Describe the var at the given clang AST node"""
-    if var.kind == CursorKind.ENUM_DECL:
+    if var.kind == cindex.CursorKind.ENUM_DECL:
         return {'name': var.spelling, 'namespace': clang_parent_namespace(var),
                 'type': clang_describe_enum(var)}
     else:
@@ -1493,7 +1631,7 @@ def clang_describe_functions(funcs):
 
 def clang_describe_function(func):
     """Describe the function at the given clang AST node."""
-    assert func.kind == CursorKind.FUNCTION_DECL
+    assert func.kind == cindex.CursorKind.FUNCTION_DECL
     sig, defaults = clang_describe_args(func)
     signatures = {sig: {'return': clang_describe_type(func.result_type, func.location),
                         'defaults': defaults}}
@@ -1517,9 +1655,9 @@ def clang_describe_type(typ, loc):
     typ = typ.get_canonical()
     kind = typ.kind
     try:
-        desc = _clang_base_types[kind]
+        desc = _base_types('clang')[kind]
     except KeyError:
-        if kind == TypeKind.RECORD:
+        if kind == cindex.TypeKind.RECORD:
             decl = typ.get_declaration()
             cls = decl.spelling
             if cls == 'basic_string':
@@ -1528,23 +1666,23 @@ def clang_describe_type(typ, loc):
                 desc = (cls,) + clang_describe_template_args(decl) + (0,)
             else:
                 desc = cls
-        elif kind == TypeKind.LVALUEREFERENCE:
+        elif kind == cindex.TypeKind.LVALUEREFERENCE:
             desc = (clang_describe_type(typ.get_pointee(), loc), '&')
-        elif kind == TypeKind.POINTER:
+        elif kind == cindex.TypeKind.POINTER:
             p = typ.get_pointee()
-            if p.kind == TypeKind.FUNCTIONPROTO:
+            if p.kind == cindex.TypeKind.FUNCTIONPROTO:
                 desc = ('function_pointer',
                         tuple(('_{0}'.format(i),clang_describe_type(arg, loc)) for i,arg in enumerate(p.argument_types())),
                         clang_describe_type(p.get_result(), loc))
             else:
                 desc = (clang_describe_type(p, loc), '*')
-        elif kind == TypeKind.FUNCTIONPROTO:
+        elif kind == cindex.TypeKind.FUNCTIONPROTO:
             desc = ('function',
                     tuple(('_{0}'.format(i),clang_describe_type(arg, loc)) for i,arg in enumerate(typ.argument_types())),
                     clang_describe_type(typ.get_result(), loc))
-        elif kind == TypeKind.ENUM:
+        elif kind == cindex.TypeKind.ENUM:
             return clang_describe_enum(typ.get_declaration())
-        elif kind == TypeKind.CONSTANTARRAY:
+        elif kind == cindex.TypeKind.CONSTANTARRAY:
             array_size = typ.get_array_size()
             element_type = typ.get_array_element_type()
             desc = (clang_describe_type(element_type, loc), array_size)
@@ -1565,7 +1703,7 @@ if 0:
     def clang_template_arg_info(node):
         count = 0
         defaults = []
-        kinds = CursorKind.TEMPLATE_TYPE_PARAMETER, CursorKind.TEMPLATE_NON_TYPE_PARAMETER
+        kinds = cindex.CursorKind.TEMPLATE_TYPE_PARAMETER, cindex.CursorKind.TEMPLATE_NON_TYPE_PARAMETER
         for kid in node.get_children():
             if kid.kind in kinds:
                 count += 1
@@ -1580,9 +1718,9 @@ def clang_template_param_kinds(node):
     '''Find the Arg kind of each template argument of node'''
     kinds = []
     for kid in node.get_children():
-        if kid.kind == CursorKind.TEMPLATE_TYPE_PARAMETER:
+        if kid.kind == cindex.CursorKind.TEMPLATE_TYPE_PARAMETER:
             kinds.append(Arg.TYPE)
-        elif kid.kind == CursorKind.TEMPLATE_NON_TYPE_PARAMETER:
+        elif kid.kind == cindex.CursorKind.TEMPLATE_NON_TYPE_PARAMETER:
             typ = clang_describe_type(kid.type, kid.location)
             kinds.append(Arg.VAR if isinstance(typ, tuple) and typ[0]=='enum' else Arg.LIT)
         else:
@@ -1627,7 +1765,7 @@ def clang_expand_template_args(node, args):
 def clang_describe_template_arg(arg, loc):
     '''Describe a template argument'''
     kind = arg.kind
-    if kind == CursorKind.TYPE_TEMPLATE_ARG:
+    if kind == cindex.CursorKind.TYPE_TEMPLATE_ARG:
         return clang_describe_type(arg.type, loc)
     try:
         s = arg.spelling.strip()
@@ -1635,7 +1773,7 @@ def clang_describe_template_arg(arg, loc):
     except:
         pass
     else:
-        if kind == CursorKind.INTEGRAL_TEMPLATE_ARG:
+        if kind == cindex.CursorKind.INTEGRAL_TEMPLATE_ARG:
             typ = clang_describe_type(arg.type, loc)
             if isinstance(typ, tuple) and typ[0]=='enum':
                 # Convert integers to enum names
@@ -1647,11 +1785,11 @@ def clang_describe_template_arg(arg, loc):
                     raise RuntimeError('template argument {0} is invalid, expected one of {1} at {2}'
                         .format(lit, ', '.join('%s=%s'%(n,v) for n,v in typ[2]), clang_str_location(loc)))
         return lit
-    if kind == CursorKind.EXPRESSION_TEMPLATE_ARG:
+    if kind == cindex.CursorKind.EXPRESSION_TEMPLATE_ARG:
         exp, = arg.get_children()
         if exp.referenced:
             exp = exp.referenced
-        if exp.kind == CursorKind.ENUM_CONSTANT_DECL:
+        if exp.kind == cindex.CursorKind.ENUM_CONSTANT_DECL:
             return s
     # Nothing worked, so bail
     raise NotImplementedError('template argument {0}, kind {1} at {2}'
@@ -1667,7 +1805,7 @@ def clang_describe_expression(exp):
         pass
     if exp.referenced:
         exp = exp.referenced
-    if exp.kind == CursorKind.ENUM_CONSTANT_DECL:
+    if exp.kind == cindex.CursorKind.ENUM_CONSTANT_DECL:
         return Arg.VAR, s.strip()
     # Nothing worked, so bail
     kind = exp.kind.name
@@ -1970,18 +2108,25 @@ class PycparserVarDescriber(PycparserBaseDescriber):
         if node is None:
             self.load_basetypes()
             for child_name, child in self._root.children():
-                if getattr(child, 'name', None) == self.name:
-                    if isinstance(child, pycparser.c_ast.FuncDef):
-                        raise TypeError(self._type_error_msg.format(
-                            self.name, 'function', 'PycparserFuncDescriber'))
-                    if isinstance(child, pycparser.c_ast.Struct):
-                        raise TypeError(self._type_error_msg.format(
-                            self.name, 'struct', 'PycparserClassDescriber'))
-                    self.desc['type'] = self.type(child)
+                if self.visit_toplevel(child):
                     break
         else:
             super(PycparserVarDescriber, self).visit(node)
 
+    def visit_toplevel(self, child):
+        """Visits a top-level node of the AST, returning whether or not the
+        variable has been fully described."""
+        if getattr(child, 'name', None) != self.name:
+            return False
+        if isinstance(child, pycparser.c_ast.FuncDef):
+            raise TypeError(self._type_error_msg.format(
+                self.name, 'function', 'PycparserFuncDescriber'))
+        if isinstance(child, pycparser.c_ast.Struct):
+            raise TypeError(self._type_error_msg.format(
+                self.name, 'struct', 'PycparserClassDescriber'))
+        self.desc['type'] = self.type(child)
+        return True
+
 class PycparserFuncDescriber(PycparserBaseDescriber):
 
     _funckey = 'signatures'
@@ -2020,15 +2165,22 @@ class PycparserFuncDescriber(PycparserBaseDescriber):
         if node is None:
             self.load_basetypes()
             for child_name, child in self._root.children():
-                if isinstance(child, pycparser.c_ast.FuncDef) and \
-                   child.decl.name == self.name:
-                    self.visit(child)
-                elif isinstance(child, pycparser.c_ast.Decl) and \
-                     child.name == self.name:
-                    self.visit(child)
+                self.visit_toplevel(child)
         else:
             super(PycparserFuncDescriber, self).visit(node)
 
+    def visit_toplevel(self, child):
+        """Visits a top-level node of the AST, returning whether or not the
+        function has been fully described.  Since functions may be declared
+        many times, this is always False."""
+        if isinstance(child, pycparser.c_ast.FuncDef) and \
+           child.decl.name == self.name:
+            self.visit(child)
+        elif isinstance(child, pycparser.c_ast.Decl) and \
+             child.name == self.name:
+            self.visit(child)
+        return False
+
 class PycparserClassDescriber(PycparserBaseDescriber):
 
     _funckey = 'methods'
@@ -2072,27 +2224,34 @@ class PycparserClassDescriber(PycparserBaseDescriber):
             top-level struct (class) node is found and visited.
 
         """
-        construct_typemap = {
-            pycparser.c_ast.Struct: 'struct',
-            pycparser.c_ast.Union: 'union',
-        }
-        construct_types = tuple(construct_typemap.keys())
         if node is None:
             self.load_basetypes()
             for child_name, child in self._root.children():
-                if isinstance(child, pycparser.c_ast.Typedef) and \
-                   isinstance(child.type, pycparser.c_ast.TypeDecl) and \
-                   isinstance(child.type.type, construct_types):
-                    child = child.type.type
-                if not isinstance(child, construct_types):
-                    continue
-                if child.name != self.name:
-                    continue
-                self.desc['construct'] = construct_typemap[type(child)]
-                self.visit_members(child)
+                self.visit_toplevel(child)
         else:
             super(PycparserClassDescriber, self).visit(node)
 
+    def visit_toplevel(self, child):
+        """Visits a top-level node of the AST, returning whether or not the
+        struct has been fully described.  Since structs may be declared
+        many times, this is always False."""
+        construct_typemap = {
+            pycparser.c_ast.Struct: 'struct',
+            pycparser.c_ast.Union: 'union',
+        }
+        construct_types = tuple(construct_typemap.keys())
+        if isinstance(child, pycparser.c_ast.Typedef) and \
+           isinstance(child.type, pycparser.c_ast.TypeDecl) and \
+           isinstance(child.type.type, construct_types):
+            child = child.type.type
+        if not isinstance(child, construct_types):
+            return False
+        if child.name != self.name:
+            return False
+        self.desc['construct'] = construct_typemap[type(child)]
+        self.visit_members(child)
+        return False
+
 _pycparser_describers = {
     'var': PycparserVarDescriber,
     'func': PycparserFuncDescriber,
@@ -2153,6 +2312,70 @@ def pycparser_describe(filename, name, kind, includes=(), defines=('XDRESS',),
     describer.visit()
     return describer.desc
 
+def _pycparser_toplevel_names(node):
+    """Returns the names that a top-level pycparser node may declare."""
+    names = set([getattr(node, 'name', None)])
+    if isinstance(node, pycparser.c_ast.FuncDef):
+        names.add(node.decl.name)
+    elif isinstance(node, pycparser.c_ast.Typedef) and \
+         isinstance(node.type, pycparser.c_ast.TypeDecl):
+        names.add(getattr(node.type.type, 'name', None))
+    names.discard(None)
+    return names
+
+def pycparser_describe_many(filename, names_kinds, includes=(), defines=('XDRESS',),
+                            undefines=(), extra_parser_args=(), ts=None,
+                            verbose=False, debug=False, builddir='build',
+                            onlyin=None, language='c', clang_includes=()):
+    """Use pycparser to describe many fucntions, variables, or structs from
+    the same file.  The base types are loaded once and the top-level nodes of
+    the AST are visited in a single pass, dispatching to every describer whose
+    name matches.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the file.
+    names_kinds : sequence of (name, kind) tuples
+        The names to describe paired with the kind of each one, valid kinds are
+        'class', 'func', and 'var'.
+    includes, defines, undefines, extra_parser_args, ts, verbose, debug, builddir,
+    onlyin, language, clang_includes :
+        Same as for pycparser_describe().
+
+    Returns
+    -------
+    descs : list of dicts
+        The descriptions, in the same order as names_kinds.
+    """
+    assert language=='c'
+    root = astparsers.pycparser_parse(filename, includes=includes, defines=defines,
+                                      undefines=undefines,
+                                      extra_parser_args=extra_parser_args,
+                                      verbose=verbose, debug=debug, builddir=builddir)
+    if onlyin is None:
+        onlyin = set([filename])
+    describers = [_pycparser_describers[kind](name, root, onlyin=onlyin, ts=ts,
+                                              verbose=verbose)
+                  for name, kind in names_kinds]
+    if 0 == len(describers):
+        return []
+    describers[0].load_basetypes()
+    basetypes = describers[0]._basetypes
+    bynames = {}
+    for describer in describers:
+        describer._basetypes = dict(basetypes)
+        bynames.setdefault(describer.name, []).append(describer)
+    done = set()
+    for child_name, child in root.children():
+        for name in _pycparser_toplevel_names(child):
+            for describer in bynames.get(name, ()):
+                if id(describer) in done:
+                    continue
+                if describer.visit_toplevel(child):
+                    done.add(id(describer))
+    return [describer.desc for describer in describers]
+
 
 #
 #  General utilities
@@ -2163,17 +2386,19 @@ def _make_includer(filenames, builddir, language, verbose=False):
     all of the files in filenames.  Returns the path to the newly made file.
     """
     newfile = ""
-    newnames = []
     for filename in filenames:
-        newnames.append(filename.replace(os.path.sep, '_'))
         newfile += '#include "{0}"\n'.format(filename)
-    newnames = "-".join(newnames)
+    newname = _includer_name(filenames, builddir, language)
+    newoverwrite(newfile, newname, verbose=verbose)
+    return newname
+
+def _includer_name(filenames, builddir, language):
+    """Returns the path of the file that _make_includer() makes."""
+    newnames = "-".join([filename.replace(os.path.sep, '_') for filename in filenames])
     if len(newnames) > 250:
         # this is needed to prevent 'IOError: [Errno 36] File name too long'
         newnames = md5(newnames).hexdigest()
-    newname = os.path.join(builddir, newnames + '.' + _lang_exts[language])
-    newoverwrite(newfile, newname, verbose=verbose)
-    return newname
+    return os.path.join(builddir, newnames + '.' + _lang_exts[language])
 
 _describers = {
     'clang': clang_describe,
@@ -2248,6 +2473,127 @@ def describe(filename, name=None, kind='class', includes=(), defines=('XDRESS',)
                      language=language, clang_includes=clang_includes)
     return desc
 
+_many_describers = {
+    'clang': clang_describe_many,
+    'gccxml': gccxml_describe_many,
+    'pycparser': pycparser_describe_many,
+    }
+
+def describe_many(filename, names_kinds, includes=(), defines=('XDRESS',),
+                  undefines=(), extra_parser_args=(), parsers='gccxml', ts=None,
+                  verbose=False, debug=False, builddir='build', language='c++',
+                  clang_includes=()):
+    """Automatically describes many API elements which live in the same file(s).
+    This parses the file(s) once and collects all of the requested declarations
+    from a single traversal, rather than once per name as with describe().
+
+    Parameters
+    ----------
+    filename : str or container of strs
+        The path to the file or a list of file paths, see describe().
+    names_kinds : sequence of (name, kind) tuples
+        The names to describe paired with the kind of each one, valid kinds are
+        'class', 'func', and 'var'.
+    includes, defines, undefines, extra_parser_args, parsers, ts, verbose, debug,
+    builddir, language, clang_includes :
+        Same as for describe().
+
+    Returns
+    -------
+    descs : list of dicts
+        The descriptions, in the same order as names_kinds.
+    """
+    if isinstance(filename, basestring):
+        onlyin = set([filename])
+    else:
+        onlyin = set(filename)
+        filename = filename[0] if len(filename) == 0 \
+                   else _make_includer(filename, builddir, language, verbose=verbose)
+    parser = astparsers.pick_parser(language, parsers)
+    describer = _many_describers[parser]
+    descs = describer(filename, names_kinds, includes=includes, defines=defines,
+                      undefines=undefines, extra_parser_args=extra_parser_args,
+                      ts=ts, verbose=verbose, debug=debug, builddir=builddir,
+                      onlyin=onlyin, language=language,
+                      clang_includes=clang_includes)
+    return descs
+
+
+def describe_dependencies(filename, builddir='build', language='c++'):
+    """Returns the paths of the files that the descriptions from a file
+    depend on, i.e. the file itself and all of its transitive includes, as
+    reported by the parser during the most recent describe() or describe_many()
+    of this file in this process.
+
+    Parameters
+    ----------
+    filename : str or container of strs
+        The path to the file or a list of file paths, as given to describe().
+    builddir : str, optional
+        Location of -- often temporary -- build files.
+    language : str
+        Valid language flag.
+
+    Returns
+    -------
+    deps : tuple of str
+        The dependencies, including the source files themselves.
+
+    """
+    if isinstance(filename, basestring):
+        filenames = (filename,)
+    else:
+        filenames = tuple(filename)
+        filename = _includer_name(filename, builddir, language)
+    deps = astparsers.dependencies(filename)
+    if os.name == 'nt':
+        # GCC-XML is given posix paths on Windows.
+        deps = deps or astparsers.dependencies(posixpath.join(*ntpath.split(filename)))
+    return filenames + tuple(d for d in deps if d not in filenames)
+
+def ts_signature(ts):
+    """A digest of the parts of a type system which describers consult when
+    canonicalizing types, so that descriptions are only shared between runs
+    whose type systems agree on these."""
+    parts = (sorted(ts.base_types), sorted(map(repr, ts.template_types.items())),
+             sorted(map(repr, ts.refined_types.items())),
+             sorted(map(repr, ts.type_aliases.items())),
+             sorted(map(repr, ts.argument_kinds.items())))
+    return md5(repr(parts).encode('utf-8')).hexdigest()
+
+def intern_types(desc, ts):
+    """Returns a copy of a description in which all of the tuples, i.e. the types
+    and the method signatures, are interned in a type system.  Equal types in
+    different descriptions are then the same object, see TypeSystem.intern().
+    """
+    if type(desc) in (dict, collections.OrderedDict):
+        return desc.__class__([(intern_types(k, ts), intern_types(v, ts))
+                               for k, v in desc.items()])
+    elif isinstance(desc, list):
+        return [intern_types(x, ts) for x in desc]
+    elif isinstance(desc, tuple):
+        return ts.intern(desc)
+    return desc
+
+_worker_state = {}
+
+def _describe_task(task):
+    """Describes all of the names in a single translation unit.  This is the
+    unit of work that the plugin hands to worker processes, which take the type
+    system from the module state that they were forked with."""
+    srcfiles, names_kinds, kwargs = task
+    state = _worker_state
+    with TRACER.span(', '.join(srcfiles), 'autodescribe.parse',
+                     names=[str(n) for n, k in names_kinds]):
+        descs = describe_many(srcfiles, names_kinds, ts=state['ts'], **kwargs)
+        deps = describe_dependencies(srcfiles, builddir=kwargs['builddir'],
+                                     language=kwargs['language'])
+    period = state['period']
+    if period and 0 == state['ncalls']%period:
+        astparsers.clearmemo()
+    state['ncalls'] += 1
+    return descs, deps
+
 
 #
 # Plugin
@@ -2257,9 +2603,22 @@ class XDressPlugin(astparsers.ParserPlugin):
     """This plugin creates automatic description dictionaries of all souce and
     target files."""
 
+    reads = ('variables', 'functions', 'classes', 'parsers', 'includes', 
+             'defines', 'undefines', 'extra_parser_args', 'clang_includes', 
+             'builddir', 'package', 'jobs', 'make_dtypes', 'env', 'ts', 
+             'verbose', 'debug')
+    writes = ('env', 'ts', 'stale_modules')
+
     def __init__(self):
         super(XDressPlugin, self).__init__()
         self.pysrcenv = {}
+        self.ts_sidecars = set()  # sidecars which update the type system
+        self.descs = None  # kept descriptions, by (apiname, kind), see invalidate()
+        self.described = set()  # (apiname, kind)s of the last execution
+        self.previous = set()  # (apiname, kind)s of the execution before that
+        self.stale = None  # (apiname, kind)s to describe again, None for all
+        self.alltypes = False  # whether a changed sidecar updates the type system
+        self.stale_modules = set()
 
     def defaultrc(self):
         """This plugin adds the env dictionary to the rc."""
@@ -2267,6 +2626,7 @@ class XDressPlugin(astparsers.ParserPlugin):
         rc._update(super(XDressPlugin, self).defaultrc)
         # target enviroment made up of module dicts made up of descriptions
         rc.env = {}
+        rc.stale_modules = None
         return rc
 
     def rcdocs(self):
@@ -2274,40 +2634,104 @@ class XDressPlugin(astparsers.ParserPlugin):
         docs = {}
         docs.update(super(XDressPlugin, self).rcdocs)
         docs['env'] = "The target environment computed by the autodescriber."
+        docs['stale_modules'] = ("The names of the target modules in env whose "
+                                 "descriptions changed when re-run in watch "
+                                 "mode, or None if all of them did.")
         return docs
 
     def setup(self, rc):
         """Expands variables, functions, and classes in the rc based on
         copying src filenames to tar filename."""
         super(XDressPlugin, self).setup(rc)
-        for i, var in enumerate(rc.variables):
-            rc.variables[i] = ensure_apiname(var)
-        for i, fnc in enumerate(rc.functions):
-            rc.functions[i] = ensure_apiname(fnc)
-        for i, cls in enumerate(rc.classes):
-            rc.classes[i] = cls = ensure_apiname(cls)
-            if not isinstance(cls.srcname, basestring) and cls.srcname[-1] is not 0:
-                # ensure the predicate is a scalar for template specializations
-                rc.classes[i] = cls = cls._replace(srcname=tuple(cls.srcname) + (0,))
-            if not isinstance(cls.tarname, basestring) and cls.tarname[-1] is not 0:
-                # ensure the predicate is a scalar for template specializations
-                rc.classes[i] = cls = cls._replace(tarname=tuple(cls.tarname) + (0,))
+        self.setup_apinames(rc)
         if 'make_dtypes' not in rc:
             rc.make_dtypes = False
         self.register_classes(rc)
 
     def execute(self, rc):
         print("autodescribe: scraping C/C++ APIs from source")
+        if self.stale is not None:
+            rc.env = {}
+        self.stale_modules = set()
+        self.previous, self.described = self.described, set()
         self.load_sidecars(rc)
         self.compute_classes(rc)
         self.compute_functions(rc)
         self.compute_variables(rc)
+        if self.stale is None or self.alltypes:
+            rc.stale_modules = None
+        else:
+            # elements which are no longer present
+            for name, kind in self.previous - self.described:
+                self.stale_modules.add(name.tarbase)
+            rc.stale_modules = self.stale_modules
+        self.stale = None
+
+    def watched(self, rc):
+        """The source files, sidecars, and included files of all API elements."""
+        paths = set()
+        for kind, names in self._kinds(rc):
+            for name in names:
+                paths.update(name.srcfiles)
+                paths.update(name.sidecars)
+                paths.update(rc._cache.dependencies(name, kind))
+        return paths
+
+    def invalidate(self, rc, paths):
+        """Marks the API elements whose source files, sidecars, or includes have
+        changed as stale, so that only these are described again and only their 
+        target modules are listed in rc.stale_modules.  Changed sidecars are 
+        reloaded, and if any of them updates the type system then all modules 
+        are considered stale.  The other descriptions are kept from here on."""
+        super(XDressPlugin, self).invalidate(rc, paths)
+        alltypes = False
+        for sidecar in list(self.pysrcenv.keys()):
+            if os.path.abspath(sidecar) in paths:
+                del self.pysrcenv[sidecar]
+                alltypes = alltypes or sidecar in self.ts_sidecars
+        classes = list(rc.classes)
+        self.setup_apinames(rc)
+        if classes != rc.classes:
+            self.register_classes(rc)
+        if self.descs is None:
+            self.descs = {}
+        stale = set()
+        current = set()
+        for kind, names in self._kinds(rc):
+            for name in names:
+                current.add((name, kind))
+                files = list(name.srcfiles) + list(name.sidecars) + \
+                        rc._cache.dependencies(name, kind)
+                if any([os.path.abspath(f) in paths for f in files]):
+                    stale.add((name, kind))
+        self.stale = stale
+        self.alltypes = alltypes
+        return alltypes or 0 < len(stale) or current != self.described
 
     def report_debug(self, rc):
-        super(XDressPlugin, self).report_debug(rc)
+        return super(XDressPlugin, self).report_debug(rc)
 
     # Helper methods below
 
+    def _kinds(self, rc):
+        return (('class', rc.classes), ('func', rc.functions), 
+                ('var', rc.variables))
+
+    def setup_apinames(self, rc):
+        """Ensures that the variables, functions, and classes are apinames."""
+        for i, var in enumerate(rc.variables):
+            rc.variables[i] = ensure_apiname(var)
+        for i, fnc in enumerate(rc.functions):
+            rc.functions[i] = ensure_apiname(fnc)
+        for i, cls in enumerate(rc.classes):
+            rc.classes[i] = cls = ensure_apiname(cls)
+            if not isinstance(cls.srcname, basestring) and cls.srcname[-1] is not 0:
+                # ensure the predicate is a scalar for template specializations
+                rc.classes[i] = cls = cls._replace(srcname=tuple(cls.srcname) + (0,))
+            if not isinstance(cls.tarname, basestring) and cls.tarname[-1] is not 0:
+                # ensure the predicate is a scalar for template specializations
+                rc.classes[i] = cls = cls._replace(tarname=tuple(cls.tarname) + (0,))
+
     def register_classes(self, rc):
         """Registers classes with the type system.  This can and should be done
         trying to describe the class."""
@@ -2338,8 +2762,10 @@ class XDressPlugin(astparsers.ParserPlugin):
                 pymod = locs['mod']
             if 'ts' in locs:
                 rc.ts.update(locs['ts'])
+                self.ts_sidecars.add(sidecar)
             elif 'type_system' in locs:
                 rc.ts.update(locs['type_system'])
+                self.ts_sidecars.add(sidecar)
         else:
             pymod = {}
         self.pysrcenv[sidecar] = pymod
@@ -2356,7 +2782,77 @@ class XDressPlugin(astparsers.ParserPlugin):
         for sidecar in sidecars:
             self.load_pysrcmod(sidecar, rc)
 
-    def compute_desc(self, name, kind, rc):
+    def describe_srcfiles(self, names, kind, rc):
+        """Describes all of the API elements which are not already present in
+        the description cache.  The names are grouped by their source files and
+        language so that each translation unit is parsed and traversed only once
+        for all of the names that it declares.
+
+        Parameters
+        ----------
+        names : sequence of apinames
+            API element names to describe.
+        kind : str
+            The kind of type to describe, valid flags are 'class', 'func', and 'var'.
+        rc : xdress.utils.RunControl
+            Run contoler for this xdress execution.
+
+        Returns
+        -------
+        srcdescs : dict
+            Maps apinames to their source descriptions, whether freshly
+            computed or valid in the cache.
+
+        """
+        cache = rc._cache
+        contexts = {}
+        if utils.SHARED_CACHE is not None:
+            tssig = ts_signature(rc.ts)
+            for language in set([name.language for name in names]):
+                contexts[language] = (astparsers.shared_cache_context(rc, language),
+                                      tssig)
+        groups = collections.OrderedDict()
+        srcdescs = {}
+        for name in names:
+            if name in srcdescs:
+                continue
+            if cache.isvalid(name, kind, context=contexts.get(name.language)):
+                srcdescs[name] = cache[name, kind]
+                continue
+            key = (name.srcfiles, name.language)
+            groups.setdefault(key, [])
+            if name not in groups[key]:
+                groups[key].append(name)
+        tasks = []
+        for (srcfiles, language), group in groups.items():
+            srcnames = []
+            for name in group:
+                if name.srcname not in srcnames:
+                    srcnames.append(name.srcname)
+            kwargs = dict(includes=rc.includes, defines=rc.defines,
+                          undefines=rc.undefines,
+                          extra_parser_args=rc.extra_parser_args,
+                          parsers=rc.parsers, verbose=rc.verbose, debug=rc.debug,
+                          builddir=rc.builddir, language=language,
+                          clang_includes=rc.clang_includes)
+            tasks.append((srcfiles, [(n, kind) for n in srcnames], kwargs))
+        _worker_state.update(ts=rc.ts, ncalls=0,
+                             period=rc.clear_parser_cache_period)
+        results = parallel_imap(_describe_task, tasks, jobs=rc.jobs)
+        t0 = time.time()
+        for group, task, (descs, deps) in zip(groups.values(), tasks, results):
+            cache.counters.add_time('compute', time.time() - t0)
+            descs = dict(zip([n for n, k in task[1]], descs))
+            for name in group:
+                srcdesc = dict(descs[name.srcname])
+                srcdesc['name'] = dict(zip(name._fields, name))
+                cache.set((name, kind), srcdesc, dependencies=deps,
+                          context=contexts.get(name.language))
+                srcdescs[name] = srcdesc
+            t0 = time.time()
+        return srcdescs
+
+    def compute_desc(self, name, kind, rc, srcdesc=None):
         """Returns a description dictionary for a class or function
         implemented in a source file and bound into a target file.
 
@@ -2368,6 +2864,9 @@ class XDressPlugin(astparsers.ParserPlugin):
             The kind of type to describe, valid flags are 'class', 'func', and 'var'.
         rc : xdress.utils.RunControl
             Run contoler for this xdress execution.
+        srcdesc : dict, optional
+            The source description of this element, if it has already been
+            computed, e.g. by describe_srcfiles().
 
         Returns
         -------
@@ -2376,7 +2875,9 @@ class XDressPlugin(astparsers.ParserPlugin):
 
         """
         cache = rc._cache
-        if cache.isvalid(name, kind):
+        if srcdesc is not None:
+            pass
+        elif cache.isvalid(name, kind):
             srcdesc = cache[name, kind]
         else:
             srcdesc = describe(name.srcfiles, name=name.srcname, kind=kind,
@@ -2428,49 +2929,61 @@ class XDressPlugin(astparsers.ParserPlugin):
             for key in extrajoinkeys:
                 modextra[key] += pyextra.get(key, '')
 
+    def describe_names(self, names, kind, rc):
+        """Yields (apiname, description) pairs for API elements of a kind.  Once
+        the plugin has been invalidated, only the stale elements are described
+        again and the descriptions of the others are copies of their previous 
+        ones, see invalidate().  The target modules of the elements which are
+        described are added to the stale modules."""
+        descs = self.descs
+        todo = set()
+        for name in names:
+            if descs is None or self.stale is None or (name, kind) in self.stale \
+                             or (name, kind) not in descs:
+                todo.add(name)
+        srcdescs = self.describe_srcfiles([n for n in names if n in todo], kind, rc)
+        for name in names:
+            key = (name, kind)
+            self.described.add(key)
+            if name not in todo:
+                yield name, deepcopy(descs[key])
+                continue
+            print("autodescribe: describing {0}".format(name.srcname))
+            with TRACER.span(name.srcname, 'autodescribe.' + kind):
+                desc = self.compute_desc(name, kind, rc, srcdesc=srcdescs.get(name))
+                desc = intern_types(desc, rc.ts)
+            if self.stale is not None and (key in self.stale or 
+                                           key not in self.previous):
+                self.stale_modules.add(name.tarbase)
+            if descs is not None:
+                descs[key] = deepcopy(desc)
+            yield name, desc
+
     def compute_variables(self, rc):
         """Computes variables descriptions and loads them into the environment."""
         ts = rc.ts
         env = rc.env
-        cache = rc._cache
-        for i, var in enumerate(rc.variables):
-            print("autodescribe: describing {0}".format(var.srcname))
-            desc = self.compute_desc(var, 'var', rc)
+        for var, desc in self.describe_names(rc.variables, 'var', rc):
             if rc.verbose:
                 pprint(desc)
-            cache.dump()
             self.adddesc2env(desc, env, var)
             ts.register_variable_namespace(desc['name']['srcname'], desc['namespace'],
                                            desc['type'])
-            if 0 == i%rc.clear_parser_cache_period:
-                astparsers.clearmemo()
 
     def compute_functions(self, rc):
         """Computes function descriptions and loads them into the environment."""
         env = rc.env
-        cache = rc._cache
-        for i, fnc in enumerate(rc.functions):
-            print("autodescribe: describing {0}".format(fnc.srcname))
-            desc = self.compute_desc(fnc, 'func', rc)
+        for fnc, desc in self.describe_names(rc.functions, 'func', rc):
             if rc.verbose:
                 pprint(desc)
-            cache.dump()
             self.adddesc2env(desc, env, fnc)
-            if 0 == i%rc.clear_parser_cache_period:
-                astparsers.clearmemo()
 
     def compute_classes(self, rc):
         """Computes class descriptions and loads them into the environment."""
         # compute all class descriptions first
-        cache = rc._cache
         env = rc.env  # target environment, not source one
-        for i, cls in enumerate(rc.classes):
-            print("autodescribe: describing {0}".format(cls.srcname))
-            desc = self.compute_desc(cls, 'class', rc)
-            cache.dump()
+        for cls, desc in self.describe_names(rc.classes, 'class', rc):
             if rc.verbose:
                 pprint(desc)
             self.adddesc2env(desc, env, cls)
-            if 0 == i%rc.clear_parser_cache_period:
-                astparsers.clearmemo()
 
@@ -9,42 +9,65 @@ Base Plugin API
 """
 from __future__ import print_function
 import os
+import io
 import sys
+import json
 from warnings import warn
 
 from .utils import RunControl, NotSpecified, writenewonly, DescriptionCache, \
-    DEFAULT_RC_FILE, DEFAULT_PLUGINS, nyansep, indent
+    DEFAULT_RC_FILE, DEFAULT_PLUGINS, nyansep, indent, FILE_DIGESTS, \
+    set_shared_cache, cache_report, CACHE_COUNTERS, MEMORY_MONITOR
 from .plugins import Plugin
 from .typesystem import TypeSystem
 from .version import report_versions
 
 if sys.version_info[0] >= 3:
-    basestring = str
+    basestring = unicode = str
 
 class XDressPlugin(Plugin):
     """This class provides base functionality for xdress itself."""
 
-    defaultrc = RunControl(
-        rc=DEFAULT_RC_FILE,
-        plugins=DEFAULT_PLUGINS,
-        debug=False,
-        ts=TypeSystem(),
-        verbose=False,
-        version=False,
-        dumpdesc=False,
-        package=NotSpecified,
-        packagedir=NotSpecified,
-        testdir=NotSpecified,
-        sourcedir=NotSpecified,
-        builddir='build',
-        bash_completion=True,
-        dtypes_module='dtypes',
-        stlcontainers_module='stlcontainers',
-        )
+    def defaultrc(self):
+        """A new default run control each time, so that every run has its own
+        type system."""
+        return RunControl(
+            rc=DEFAULT_RC_FILE,
+            plugins=DEFAULT_PLUGINS,
+            debug=False,
+            ts=TypeSystem(),
+            verbose=False,
+            version=False,
+            dumpdesc=False,
+            package=NotSpecified,
+            packagedir=NotSpecified,
+            testdir=NotSpecified,
+            sourcedir=NotSpecified,
+            builddir='build',
+            shared_cache_dir=NotSpecified,
+            shared_cache_evict=None,
+            cache_report=False,
+            cache_report_json=False,
+            timings=False,
+            max_memory_mb=None,
+            plugin_jobs=1,
+            profile=None,
+            profile_top=30,
+            watch=False,
+            watch_interval=0.5,
+            serve=None,
+            projects=None,
+            project_jobs=1,
+            bash_completion=True,
+            dtypes_module='dtypes',
+            stlcontainers_module='stlcontainers',
+            )
 
     # Sweet hack because ts.update() returns None
     rcupdaters = {'ts': (lambda old, new: old.update(new) or old)}
 
+    reads = writes = ()
+    """The base plugin has nothing to execute."""
+
     rcdocs = {
         'rc': "Path to run control file",
         'plugins': "Plugins to include",
@@ -58,6 +81,46 @@ class XDressPlugin(Plugin):
         'testdir': "Path to root directory for tests (tests are placed in root/tests), same as 'package' if not specified",
         'sourcedir': "Path to source directory (deprecated)",
         'builddir': "Path to build directory",
+        'shared_cache_dir': ("Path to a content-addressed cache directory which "
+                             "may be shared between projects and machines.  "
+                             "Defaults to the XDRESS_CACHE_DIR environment "
+                             "variable, if set."),
+        'cache_report': ("Print the hits, misses, timings, and estimated time "
+                         "saved of each cache layer at the end of the run."),
+        'cache_report_json': ("Write the cache report as JSON to "
+                              "cache_report.json in the build directory."),
+        'timings': ("Record the wall time, CPU time, and peak RSS of each "
+                    "plugin phase and API element, and write them as a Chrome "
+                    "trace to xdress_trace.json in the build directory."),
+        'max_memory_mb': ("Memory budget for xdress, in MB.  The parser cache "
+                          "is evicted and the type system memos are cleared "
+                          "as this is approached.  With --debug, the memory "
+                          "used by each plugin and parser call is reported."),
+        'plugin_jobs': ("Number of plugins that may execute at the same time. "
+                        "Plugins which only write build artifacts are run in "
+                        "forked processes alongside the plugins they do not "
+                        "depend on."),
+        'profile': ("Profile the setup and execute phases of these plugins, "
+                    "or of all plugins if none are given, and write the stats "
+                    "to the profile directory in the build directory."),
+        'profile_top': "The number of functions to list in profile summaries.",
+        'watch': ("Keep running after generating the wrappers, and re-run the "
+                  "affected plugins whenever the source files, sidecars, their "
+                  "includes, or the run control file change."),
+        'watch_interval': "Seconds between polls for changes in watch mode.",
+        'serve': ("Keep the plugins set up and serve describe, generate, and "
+                  "invalidate requests on this Unix socket, build/xdress.sock "
+                  "if no path is given, see xdress.session."),
+        'projects': ("Run control files of several projects to run in one "
+                     "batch, each from its own directory.  The projects share "
+                     "parse results, name searches, and descriptions, but each "
+                     "has its own type system and outputs.  Other command line "
+                     "arguments are passed on to every project."),
+        'project_jobs': ("Number of processes to run the projects of a batch "
+                         "in.  Processes share results through the shared cache."),
+        'shared_cache_evict': ("Evict the least recently used entries from the "
+                               "shared cache until it is no larger than this "
+                               "many MB, and exit."),
         'bash_completion': ("Flag for enabling / disabling BASH completion. "
                             "This is only relevant when using argcomplete."),
         'dtypes_module': "Module name for numpy dtype wrappers.",
@@ -86,6 +149,37 @@ class XDressPlugin(Plugin):
                             help=self.rcdocs["sourcedir"])
         parser.add_argument('--builddir', action='store', dest='builddir',
                             help=self.rcdocs["builddir"])
+        parser.add_argument('--shared-cache-dir', action='store',
+                            dest='shared_cache_dir',
+                            help=self.rcdocs["shared_cache_dir"])
+        parser.add_argument('--shared-cache-evict', action='store', type=float,
+                            dest='shared_cache_evict', metavar='MB',
+                            help=self.rcdocs["shared_cache_evict"])
+        parser.add_argument('--cache-report', action='store_true',
+                            dest='cache_report', help=self.rcdocs["cache_report"])
+        parser.add_argument('--cache-report-json', action='store_true',
+                            dest='cache_report_json',
+                            help=self.rcdocs["cache_report_json"])
+        parser.add_argument('--timings', action='store_true', dest='timings',
+                            help=self.rcdocs["timings"])
+        parser.add_argument('--max-memory-mb', type=float, dest='max_memory_mb',
+                            help=self.rcdocs["max_memory_mb"])
+        parser.add_argument('--plugin-jobs', type=int, dest='plugin_jobs',
+                            help=self.rcdocs["plugin_jobs"])
+        parser.add_argument('--profile', nargs='*', dest='profile',
+                            metavar='PLUGIN', help=self.rcdocs["profile"])
+        parser.add_argument('--profile-top', type=int, dest='profile_top',
+                            help=self.rcdocs["profile_top"])
+        parser.add_argument('--watch', action='store_true', dest='watch',
+                            help=self.rcdocs["watch"])
+        parser.add_argument('--watch-interval', type=float, dest='watch_interval',
+                            metavar='SECONDS', help=self.rcdocs["watch_interval"])
+        parser.add_argument('--serve', nargs='?', const='', dest='serve',
+                            metavar='SOCKET', help=self.rcdocs["serve"])
+        parser.add_argument('--projects', nargs='+', dest='projects',
+                            metavar='RC', help=self.rcdocs["projects"])
+        parser.add_argument('--project-jobs', type=int, dest='project_jobs',
+                            help=self.rcdocs["project_jobs"])
         parser.add_argument('--bash-completion', action='store_true',
                             help="enable bash completion", dest="bash_completion")
         parser.add_argument('--no-bash-completion', action='store_false',
@@ -101,10 +195,27 @@ class XDressPlugin(Plugin):
             print(report_versions())
             sys.exit()
 
+        if rc.shared_cache_dir is NotSpecified:
+            rc.shared_cache_dir = os.environ.get('XDRESS_CACHE_DIR', None)
+        shared = set_shared_cache(rc.shared_cache_dir)
+        if rc.shared_cache_evict is not None:
+            if shared is None:
+                sys.exit("no shared cache directory given; please set "
+                         "'shared_cache_dir' or XDRESS_CACHE_DIR")
+            nremoved, nbytes = shared.evict(int(rc.shared_cache_evict * 2**20))
+            print("xdress: evicted {0} files ({1:.1f} MB) from {2}".format(
+                  nremoved, nbytes / 2.0**20, shared.dirname))
+            sys.exit()
+
         # This should be done ASAP after the ts is set
         rc.ts.dtypes = rc.dtypes_module
         rc.ts.stlcontainers = rc.stlcontainers_module
 
+        if rc.debug:
+            MEMORY_MONITOR.start()
+        MEMORY_MONITOR.max_mb = rc.max_memory_mb
+        MEMORY_MONITOR.add_reliever('type system memo', rc.ts.clearmemo)
+
         if rc.package is NotSpecified:
             msg = "no package name given; please add 'package' to {0}"
             sys.exit(msg.format(rc.rc))
@@ -123,12 +234,31 @@ class XDressPlugin(Plugin):
             os.makedirs(rc.builddir)
         writenewonly("", os.path.join(rc.packagedir, '__init__.py'), rc.verbose)
         writenewonly("", os.path.join(rc.packagedir, '__init__.pxd'), rc.verbose)
+        FILE_DIGESTS.load(os.path.join(rc.builddir, 'filedigest.cache'))
         rc._cache = DescriptionCache(cachefile=os.path.join(rc.builddir, 'desc.cache'))
 
         if rc.dumpdesc:
             print(str(rc._cache))
             sys.exit()
 
+    def teardown(self, rc):
+        """Checkpoints the description cache, persists file digests, and
+        reports on the caches if requested."""
+        rc._cache.dump()
+        FILE_DIGESTS.dump()
+        if rc.cache_report:
+            print("xdress: cache report\n" + cache_report())
+        if rc.cache_report_json:
+            report = dict([(name, c.todict()) for name, c in CACHE_COUNTERS.items()])
+            with io.open(os.path.join(rc.builddir, 'cache_report.json'), 'w') as f:
+                f.write(unicode(json.dumps(report, indent=1, sort_keys=True)))
+        if rc.debug and MEMORY_MONITOR.tracing:
+            print("xdress: memory report\n" + MEMORY_MONITOR.report())
+
+    def watched(self, rc):
+        """The run control file."""
+        return (rc.rc,) if isinstance(rc.rc, basestring) else ()
+
     def report_debug(self, rc):
         msg = 'Version Information:\n\n{0}\n\n'
         msg += nyansep + "\n\n"
@@ -136,5 +266,8 @@ class XDressPlugin(Plugin):
         msg = msg.format(indent(report_versions()), str(rc._cache))
         msg += nyansep + "\n\n"
         msg += "Current type system contents:\n\n" + str(rc.ts) + "\n\n"
+        if MEMORY_MONITOR.tracing:
+            msg += nyansep + "\n\n"
+            msg += "Memory usage:\n\n" + MEMORY_MONITOR.report() + "\n\n"
         return msg
 
@@ -16,6 +16,7 @@ Cython Generation API
 from __future__ import print_function
 import os
 import sys
+import functools
 import math
 import warnings
 from copy import deepcopy
@@ -23,10 +24,9 @@ from pprint import pprint
 from numbers import Number
 
 from .utils import indent, indentstr, expand_default_args, isclassdesc, isfuncdesc, \
-    isvardesc, newoverwrite, sortedbytype, _lang_exts, Arg
+    isvardesc, newoverwrite, sortedbytype, _lang_exts, Arg, TRACER
 from .plugins import Plugin
 from .typesystem import TypeSystem, TypeMatcher, MatchAny
-from .version import cython_version, cython_version_info
 
 if sys.version_info[0] >= 3:
     basestring = str
@@ -161,14 +161,15 @@ def modcpppxd(mod, exceptions=True, ts=None):
             elif 1 < len(incfiles):
                 msg = "multiple include files found for {0}, choosing the first: {1}"
                 warnings.warn(msg.format(name, incfiles[0]), RuntimeWarning)
-            if isvardesc(desc):
-                ci_tup, attr_str = varcpppxd(desc, exceptions, ts)
-            elif isfuncdesc(desc):
-                ci_tup, attr_str = funccpppxd(desc, exceptions, ts)
-            elif isclassdesc(desc):
-                ci_tup, attr_str = classcpppxd(desc, exceptions, ts)
-            else:
-                continue
+            with TRACER.span(name, 'cythongen.cpppxd'):
+                if isvardesc(desc):
+                    ci_tup, attr_str = varcpppxd(desc, exceptions, ts)
+                elif isfuncdesc(desc):
+                    ci_tup, attr_str = funccpppxd(desc, exceptions, ts)
+                elif isclassdesc(desc):
+                    ci_tup, attr_str = classcpppxd(desc, exceptions, ts)
+                else:
+                    continue
             cimport_tups |= ci_tup
             attrs.append(attr_str)
     if mod.get('language', None) == 'c':
@@ -534,12 +535,12 @@ def modpxd(mod, classes=(), ts=None, max_callbacks=8):
     with ts.local_classes(classnames):
         for name in pxd_sorted_names(mod):
             desc = mod[name]
-            if isclassdesc(desc):
-                ci_tup, attr_str = classpxd(desc, classes, ts=ts,
-                                            max_callbacks=max_callbacks)
-            else:
+            if not isclassdesc(desc):
                 # no need to wrap functions again
                 continue
+            with TRACER.span(name, 'cythongen.pxd'):
+                ci_tup, attr_str = classpxd(desc, classes, ts=ts,
+                                            max_callbacks=max_callbacks)
             cimport_tups |= ci_tup
             attrs.append(attr_str)
     cimport_tups.discard((mod["name"],))
@@ -732,14 +733,16 @@ def modpyx(mod, classes=None, ts=None, max_callbacks=8):
     with ts.local_classes(classnames):
         for name, desc in mod.items():
             if isvardesc(desc):
-                i_tup, ci_tup, attr_str = varpyx(desc, ts=ts)
+                gen = varpyx
             elif isfuncdesc(desc):
-                i_tup, ci_tup, attr_str = funcpyx(desc, ts=ts)
+                gen = funcpyx
             elif isclassdesc(desc):
-                i_tup, ci_tup, attr_str = classpyx(desc, classes=classes, ts=ts,
-                                                   max_callbacks=max_callbacks)
+                gen = functools.partial(classpyx, classes=classes,
+                                        max_callbacks=max_callbacks)
             else:
                 continue
+            with TRACER.span(name, 'cythongen.pyx'):
+                i_tup, ci_tup, attr_str = gen(desc, ts=ts)
             import_tups |= i_tup
             cimport_tups |= ci_tup
             attrs.append(attr_str)
@@ -1579,6 +1582,10 @@ class XDressPlugin(Plugin):
     requires = ('xdress.autodescribe',)
     """This plugin requires autodescribe."""
 
+    reads = ('env', 'stale_modules', 'ts', 'max_callbacks', 'packagedir', 
+             'verbose')
+    writes = ('xdress.cythongen:wrappers',)
+
     defaultrc = {'max_callbacks': 8}
 
     rcdocs = {
@@ -1590,6 +1597,7 @@ class XDressPlugin(Plugin):
                     help=self.rcdocs["max_callbacks"])
 
     def setup(self, rc):
+        from .version import cython_version, cython_version_info
         if rc.max_callbacks < 1:
             raise ValueError("max_callbacks must be greater than or equal to 1")
         if cython_version is None:
@@ -1608,7 +1616,12 @@ class XDressPlugin(Plugin):
                 if isclassdesc(desc):
                     classes[name] = desc
 
-        # generate all files
+        # generate all files, or only those of the stale modules in watch mode
+        stale = rc.stale_modules if 'stale_modules' in rc else None
+        if stale is not None:
+            env = dict([(k, v) for k, v in env.items() if k in stale])
+            print("cythongen: regenerating {0} of {1} modules".format(len(env),
+                  len(rc.env)))
         cpppxds = gencpppxd(env, ts=rc.ts)
         pxds = genpxd(env, classes, ts=rc.ts, max_callbacks=rc.max_callbacks)
         pyxs = genpyx(env, classes, ts=rc.ts, max_callbacks=rc.max_callbacks)
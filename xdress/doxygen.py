@@ -91,30 +91,16 @@ import sys
 from collections import OrderedDict
 from textwrap import TextWrapper
 from .plugins import Plugin
-from .utils import newoverwrite, parse_template
+from .utils import newoverwrite, parse_template, lazy_import
 from .typesystem import TypeMatcher, MatchAny
 
-# XML conditional imports
-try:
-    from lxml import etree
-except ImportError:
-    try:
-        # Python 2.5
-        import xml.etree.cElementTree as etree
-    except ImportError:
-        try:
-            # Python 2.5
-            import xml.etree.ElementTree as etree
-        except ImportError:
-            try:
-                # normal cElementTree install
-                import cElementTree as etree
-            except ImportError:
-                try:
-                    # normal ElementTree install
-                    import elementtree.ElementTree as etree
-                except ImportError:
-                    pass
+# XML conditional imports, loaded on first use
+for _etree_name in ('lxml.etree', 'xml.etree.cElementTree', 
+                    'xml.etree.ElementTree', 'cElementTree', 
+                    'elementtree.ElementTree'):
+    etree = lazy_import(_etree_name)
+    if etree is not None:
+        break
 
 if sys.version_info[0] >= 3:
     basestring = str
@@ -662,6 +662,11 @@ class XDressPlugin(Plugin):
 
     requires = ('xdress.base', 'xdress.extratypes')
 
+    reads = ('make_dtypes', 'dtypes', 'dtypes_module', 'package', 'packagedir',
+             'testdir', 'ts', 'verbose')
+    writes = ('xdress.dtypes:wrappers',)
+    """The type system is only modified locally, while generating wrappers."""
+
     defaultrc = RunControl(
         dtypes=[],
         make_dtypes=True,
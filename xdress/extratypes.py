@@ -23,6 +23,9 @@ class XDressPlugin(Plugin):
 
     requires = ('xdress.base',)
 
+    reads = ('make_extra_types', 'extra_types', 'packagedir', 'verbose')
+    writes = ('xdress.extratypes:files',)
+
     defaultrc = RunControl(
         extra_types='xdress_extra_types',
         make_extra_types=True,
@@ -165,7 +165,9 @@ from __future__ import print_function
 import os
 import io
 import sys
+import shutil
 import argparse
+import tempfile
 import warnings
 from pprint import pprint, pformat
 
@@ -175,7 +177,7 @@ except ImportError:
     argcomplete = None
 
 from .utils import NotSpecified, RunControl, DEFAULT_RC_FILE, DEFAULT_PLUGINS, \
-    exec_file, parse_global_rc
+    exec_file, parse_global_rc, FileWatcher
 
 from .plugins import Plugins
 
@@ -183,9 +185,23 @@ if sys.version_info[0] >= 3:
     basestring = str
 
 
-def main():
-    """Entry point for xdress API generation."""
-    warnings.simplefilter('default')
+def load_plugins(args=None):
+    """Loads the plugins named on the command line or in the run control file,
+    builds the command line interface, and merges the run control parameters
+    from the plugin defaults, the global and local run control files, and the
+    command line.
+
+    Parameters
+    ----------
+    args : list of str, optional
+        The command line arguments, sys.argv[1:] if not given.
+
+    Returns
+    -------
+    plugins : xdress.plugins.Plugins
+        The plugins, ready for setup.  Their run controller is plugins.rc.
+
+    """
     # Preprocess plugin names, which entails preprocessing the rc file
     preparser = argparse.ArgumentParser("XDress Pre-processor", add_help=False)
     preparser.add_argument('--rc', default=NotSpecified, 
@@ -196,7 +212,7 @@ def main():
                            help="enable bash completion", dest="bash_completion")
     preparser.add_argument('--no-bash-completion', action='store_false',
                            help="disable bash completion", dest="bash_completion")
-    prens = preparser.parse_known_args()[0]
+    prens = preparser.parse_known_args(args)[0]
     predefaultrc = RunControl(rc=DEFAULT_RC_FILE, plugins=DEFAULT_PLUGINS)
     prerc = RunControl()
     prerc._update(predefaultrc)
@@ -208,19 +224,186 @@ def main():
         prerc.plugins = rcdict['plugins'] if 'plugins' in rcdict else NotSpecified
     prerc._update([(k, v) for k, v in prens.__dict__.items()])    
 
-    # run plugins
+    # load plugins
     plugins = Plugins(prerc.plugins)
     parser = plugins.build_cli()
     if argcomplete is not None and prerc.bash_completion:
         argcomplete.autocomplete(parser)
-    ns = parser.parse_args()
+    ns = parser.parse_args(args)
     rc = plugins.merge_rcs()
     rc._update(parse_global_rc())
     rc._update(rcdict)
     rc._update([(k, v) for k, v in ns.__dict__.items()])
+    return plugins
+
+def watch(plugins):
+    """Polls the files which the plugins' results depend on and re-runs the 
+    affected plugins whenever these change, until interrupted.  A change to the
+    run control file reloads the plugins and runs them in full.  Failed runs 
+    are reported and watching continues.
+
+    Parameters
+    ----------
+    plugins : xdress.plugins.Plugins
+        Plugins which have been run once.
+
+    Returns
+    -------
+    plugins : xdress.plugins.Plugins
+        The current plugins, which may have been reloaded.
+
+    """
+    rc = plugins.rc
+    watcher = FileWatcher(plugins.watched())
+    print("xdress: watching {0} files for changes, press Ctrl+C to "
+          "stop".format(len(watcher.stats)))
+    try:
+        while True:
+            changed = watcher.wait(rc.watch_interval)
+            print("xdress: changed " + ", ".join([os.path.relpath(p) 
+                                                  for p in changed]))
+            try:
+                if os.path.abspath(rc.rc) in changed:
+                    reloaded = load_plugins()
+                    reloaded.setup()
+                    reloaded.execute()
+                    reloaded.teardown()
+                    plugins = reloaded
+                else:
+                    modnames = plugins.rerun(changed)
+                    print("xdress: re-ran " + (", ".join(modnames) or "nothing"))
+            except SystemExit as e:
+                print("xdress: run failed: {0}".format(e.code))
+            except Exception as e:
+                print("xdress: run failed: {0}: {1}".format(e.__class__.__name__, e))
+            rc = plugins.rc
+            watcher.watch(plugins.watched())
+    except KeyboardInterrupt:
+        print("xdress: stopped watching")
+    return plugins
+
+def run_project(rcfile, args=()):
+    """Runs the plugins for a project from the directory of its run control
+    file, as if xdress had been run there.  The parse results in this process
+    are shared with the other projects which it runs.
+
+    Parameters
+    ----------
+    rcfile : str
+        Path to the project's run control file.
+    args : list of str, optional
+        Further command line arguments.
+
+    Returns
+    -------
+    err : str or None
+        The error message if the run failed.
+
+    """
+    if not os.path.isfile(rcfile):
+        return "run control file not found"
+    cwd = os.getcwd()
+    rcdir, rcname = os.path.split(os.path.abspath(rcfile))
+    print("xdress: running " + rcfile)
+    os.chdir(rcdir)
+    try:
+        plugins = load_plugins(['--rc', rcname] + list(args))
+        plugins.setup()
+        plugins.execute()
+        plugins.teardown()
+    except SystemExit as e:
+        return None if e.code is None or e.code == 0 else str(e.code)
+    except Exception as e:
+        # e.g. errors in the run control file, or any error under --debug
+        return "{0}: {1}".format(e.__class__.__name__, e)
+    finally:
+        os.chdir(cwd)
+    return None
+
+def _run_project(rcfile_args):
+    return run_project(*rcfile_args)
+
+def run_projects(rcfiles, args=(), jobs=1):
+    """Runs several projects one after another in this process, or across a
+    pool of processes.  Unless a shared cache directory is given by the 
+    XDRESS_CACHE_DIR environment variable, a temporary one is used for the
+    batch, so that the name searches and descriptions of identical files,
+    flags, and names are shared between the projects and processes.  Each
+    project still has its own type system and build directory.
+
+    Parameters
+    ----------
+    rcfiles : list of str
+        Paths to the projects' run control files.
+    args : list of str, optional
+        Further command line arguments for every project.
+    jobs : int, optional
+        Number of processes to run the projects in.
+
+    Returns
+    -------
+    failed : list of (str, str) tuples
+        The run control files of the projects which failed, with their errors.
+
+    """
+    tmpdir = None
+    if not os.environ.get('XDRESS_CACHE_DIR', None):
+        tmpdir = os.environ['XDRESS_CACHE_DIR'] = tempfile.mkdtemp(
+                                                        prefix='xdress-cache-')
+    tasks = [(rcfile, list(args)) for rcfile in rcfiles]
+    try:
+        if jobs > 1 and len(tasks) > 1 and hasattr(os, 'fork'):
+            import multiprocessing
+            ctx = multiprocessing.get_context('fork') \
+                  if hasattr(multiprocessing, 'get_context') else multiprocessing
+            sys.stdout.flush()
+            pool = ctx.Pool(min(jobs, len(tasks)))
+            try:
+                errs = pool.map(_run_project, tasks, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            errs = [_run_project(task) for task in tasks]
+    finally:
+        if tmpdir is not None:
+            del os.environ['XDRESS_CACHE_DIR']
+            shutil.rmtree(tmpdir, ignore_errors=True)
+    return [(rcfile, err) for rcfile, err in zip(rcfiles, errs) if err is not None]
+
+def _project_args(args):
+    # the command line arguments which are passed on to each project
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--rc')
+    parser.add_argument('--projects', nargs='+')
+    parser.add_argument('--project-jobs')
+    return parser.parse_known_args(args)[1]
+
+def main():
+    """Entry point for xdress API generation."""
+    warnings.simplefilter('default')
+    plugins = load_plugins()
+    rc = plugins.rc
+    if rc.projects is not None:
+        failed = run_projects(rc.projects, _project_args(sys.argv[1:]), 
+                              rc.project_jobs)
+        for rcfile, err in failed:
+            print("xdress: {0} failed: {1}".format(rcfile, err))
+        if 0 < len(failed):
+            sys.exit("ERROR: {0} of {1} projects failed".format(len(failed), 
+                                                               len(rc.projects)))
+        return
+    if plugins.rc.serve is not None:
+        from .session import Session, serve
+        session = Session(args=None, plugins=plugins)
+        serve(session, plugins.rc.serve)
+        session.plugins.exit()
+        return
     plugins.setup()
     plugins.execute()
     plugins.teardown()
+    if plugins.rc.watch:
+        plugins = watch(plugins)
     plugins.exit()
 
 if __name__ == '__main__':
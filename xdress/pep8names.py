@@ -108,6 +108,8 @@ def ensure_pep8name(name, kind):
 class XDressPlugin(Plugin):
     """This class provides PEP-8 naming functionality for xdress."""
 
+    reads = writes = ()
+
     def setup(self, rc):
         for i, var in enumerate(rc.variables):
             rc.variables[i] = ensure_pep8name(var, 'var')
@@ -115,3 +117,9 @@ class XDressPlugin(Plugin):
             rc.functions[i] = ensure_pep8name(fnc, 'func')
         for i, cls in enumerate(rc.classes):
             rc.classes[i] = ensure_pep8name(cls, 'class')
+
+    def invalidate(self, rc, paths):
+        """Renames the API elements again, since they may have been expanded 
+        anew."""
+        self.setup(rc)
+        return False
@@ -43,6 +43,14 @@ Interface
     The names in this list will be loaded and executed in order prior to this plugin.
     If multiple plugins require the same upstream plugin, the upstream on will only
     be run once.
+:reads: This is a list of the run control parameter names, and of the names of
+    any build artifacts, that the execute() method reads, or a function that returns
+    such a list.  If this is None, the default, the plugin is assumed to read
+    everything.  See "Concurrent Execution" below.
+:writes: This is a list of the run control parameter names, and of the names of
+    any build artifacts, that the execute() method writes, or a function that
+    returns such a list.  If this is None, the default, the plugin is assumed to
+    write everything.
 :defaultrc: This is a dictionary or run control instance that maps run control
     parameters to their default values if they are otherwise not specified.  To
     make a parameter have to be given by the user, set the value to the singleton
@@ -91,7 +99,42 @@ Interface
 :report_debug(rc):  Generates and returns a message to report in the ``debug.txt``
     file in the event that execute() fails and additional debugging information is
     requested.  This message is a string.
-
+:watched(rc): Returns the paths of the files which the plugin's results depend
+    on, so that they may be watched for changes.
+:invalidate(rc, paths): Forgets any state derived from the files at the given
+    paths, which have changed, and returns whether execute() must be called again.
+
+
+Watch Mode
+----------
+With ``--watch``, xdress keeps running after the plugins have been torn down and
+polls the files returned by the plugins' watched() methods.  When some of these
+change, invalidate() is called on every plugin in plugin order.  The plugins
+which return True, along with every plugin that depends on them according to
+the dependency graph described below, are executed again and then all of the
+plugins are torn down.  setup() is not called again, so plugins whose setup
+derives state from files should redo the relevant part in invalidate().  A 
+change to the run control file itself reloads and re-runs all of the plugins.
+
+
+Concurrent Execution
+--------------------
+By default the execute() methods of all plugins are run one after another in
+plugin order.  If the ``plugin_jobs`` run control parameter is greater than one,
+the plugins are instead scheduled according to a dependency graph: a plugin 
+waits for the plugins that it requires and for the earlier plugins which write
+something that it reads or writes.  Plugins which do not declare their reads 
+and writes wait for, and are waited on by, all other plugins.
+
+Plugins whose writes are all build artifacts, rather than run control
+parameters, are run in a forked process on a snapshot of the run control and 
+may overlap with each other and with later plugins.  All other plugins are run
+in plugin order in the xdress process itself, so run control updates are always
+applied in the same order.  Artifact names are free-form, by convention they are
+the plugin module name followed by a colon and a description, such as 
+``'xdress.dtypes:wrappers'``.  Changes that a forked plugin makes to the run 
+control or to its own attributes are discarded, so such plugins should not keep
+state for teardown().
 
 Example
 -------
@@ -148,8 +191,10 @@ import warnings
 import importlib
 import argparse
 import textwrap
+import cProfile
+import pstats
 
-from .utils import RunControl, NotSpecified, nyansep
+from .utils import RunControl, NotSpecified, nyansep, TRACER, MEMORY_MONITOR
 
 if sys.version_info[0] >= 3:
     basestring = str
@@ -163,6 +208,18 @@ class Plugin(object):
     lists the module names of other plugins that this plugin requires.
     """
 
+    reads = None
+    """This is a sequence of strings, or a function which returns such, that 
+    lists the run control parameters and build artifacts that execute() reads.
+    None means that execute() may read anything.
+    """
+
+    writes = None
+    """This is a sequence of strings, or a function which returns such, that 
+    lists the run control parameters and build artifacts that execute() writes.
+    None means that execute() may write anything.
+    """
+
     defaultrc = {}
     """This may be a dict, RunControl instance, or other mapping or a function
     which returns any of these.  The keys are string names of the run control
@@ -243,6 +300,41 @@ class Plugin(object):
         """
         pass
 
+    def watched(self, rc):
+        """The files which this plugin's results depend on.  In watch mode, 
+        changes to these files cause the plugins to be re-run, see invalidate().
+
+        Parameters
+        ----------
+        rc : xdress.utils.RunControl
+
+        Returns
+        -------
+        paths : iterable of str
+
+        """
+        return ()
+
+    def invalidate(self, rc, paths):
+        """Forgets any state which was derived from files which have changed, 
+        and updates the run controller to match.  This is called for every 
+        plugin, in order, before the plugins are re-run in watch mode.
+
+        Parameters
+        ----------
+        rc : xdress.utils.RunControl
+        paths : set of str
+            The absolute paths of the files which have changed.
+
+        Returns
+        -------
+        rerun : bool
+            Whether execute() must be called again.  Plugins which depend on a
+            plugin that is re-executed are re-executed as well.
+
+        """
+        return False
+
     def report_debug(self, rc):
         """A message to report in the event that execute() fails and additional
         debugging information is requested.
@@ -293,6 +385,7 @@ class Plugins(object):
         self.rc = None
         self.rcdocs = {}
         self.warnings = []
+        self.profilers = {}
 
     def _load(self, modnames, loaddeps=True):
         for modname in modnames:
@@ -355,32 +448,233 @@ class Plugins(object):
         self._setshowwarning()
         return rc
 
-    def setup(self):
-        """Performs all plugin setup tasks."""
+    def _phase(self, phase, plugins):
         rc = self.rc
         try:
-            for plugin in self.plugins:
-                plugin.setup(rc)
+            with TRACER.span(phase, 'phase'):
+                for plugin in plugins:
+                    name = plugin.__class__.__module__
+                    method = getattr(plugin, phase)
+                    prof = self.profilers.get(name, None)
+                    with TRACER.span(name + '.' + phase, 'plugin'), \
+                         MEMORY_MONITOR.stage(name + '.' + phase):
+                        if prof is None or phase == 'teardown':
+                            method(rc)
+                        else:
+                            prof.runcall(method, rc)
         except Exception as e:
             self.exit(e)
 
-    def execute(self):
-        """Preforms all plugin executions."""
+    def _setup_profilers(self):
         rc = self.rc
+        self.profilers = {}
+        selected = rc.profile if 'profile' in rc else None
+        if selected is None or selected is NotSpecified:
+            return
+        for plugin in self.plugins:
+            name = plugin.__class__.__module__
+            if len(selected) == 0 or any([name == s or name.endswith('.' + s)
+                                          for s in selected]):
+                self.profilers[name] = cProfile.Profile()
+
+    def _dump_profiles(self):
+        rc = self.rc
+        profdir = os.path.join(rc.builddir, 'profile')
+        if 0 < len(self.profilers) and not os.path.isdir(profdir):
+            os.makedirs(profdir)
+        top = rc.profile_top if 'profile_top' in rc else 30
+        for name, prof in sorted(self.profilers.items()):
+            base = os.path.join(profdir, name)
+            prof.dump_stats(base + '.pstats')
+            with open(base + '.txt', 'w') as f:
+                stats = pstats.Stats(prof, stream=f)
+                stats.sort_stats('cumulative').print_stats(top)
+                stats.sort_stats('tottime').print_stats(top)
+            print("xdress: wrote profile to " + base + '.pstats')
+
+    def setup(self):
+        """Performs all plugin setup tasks.  If the 'timings' option is set, 
+        each plugin phase is traced from here on, and the plugins selected by
+        the 'profile' option have their setup and execute phases profiled, see
+        teardown()."""
+        rc = self.rc
+        if 'timings' in rc and rc.timings:
+            TRACER.enable()
+        self._setup_profilers()
+        self._phase('setup', self.plugins)
+
+    def dependency_graph(self):
+        """Computes which plugins' execute() phases must wait on which others.
+
+        Returns
+        -------
+        deps : list of sets of ints
+            For each plugin, the indices of the earlier plugins that must have 
+            finished executing before it may start.
+        detached : list of bools
+            For each plugin, whether it writes build artifacts and nothing else,
+            and so may be run in a separate process.
+
+        """
+        rc = self.rc
+        declared = []
+        for plugin in self.plugins:
+            rw = []
+            for attr in ('reads', 'writes'):
+                names = getattr(plugin, attr, None)
+                names = names() if callable(names) else names
+                rw.append(None if names is None else frozenset(names))
+            declared.append(tuple(rw))
+        deps = []
+        detached = []
+        for j, plugin in enumerate(self.plugins):
+            req = plugin.requires() if callable(plugin.requires) else plugin.requires
+            rj, wj = declared[j]
+            d = set()
+            for i in range(j):
+                ri, wi = declared[i]
+                if self.modnames[i] in req or None in (ri, wi, rj, wj) or \
+                   len(wi & rj) > 0 or len(wi & wj) > 0:
+                    d.add(i)
+            deps.append(d)
+            detached.append(None not in (rj, wj) and len(wj) > 0 and
+                            not any([w in rc for w in wj]))
+        return deps, detached
+
+    def _fork_execute(self, plugin, conn):
+        # runs in the forked process
+        mark = len(TRACER.events)
+        err = None
         try:
-            for plugin in self.plugins:
-                plugin.execute(rc)
+            name = plugin.__class__.__module__
+            with TRACER.span(name + '.execute', 'plugin'):
+                plugin.execute(self.rc)
+        except Exception:
+            import traceback
+            err = traceback.format_exc()
+        sys.stdout.flush()
+        conn.send((err, TRACER.events[mark:]))
+        conn.close()
+
+    def _join(self, j, running):
+        proc, conn, name = running.pop(j)
+        err, events = conn.recv()
+        proc.join()
+        TRACER.events.extend(events)
+        if err is not None:
+            raise RuntimeError("plugin {0} failed:\n\n{1}".format(name, err))
+
+    def _execute_concurrently(self, jobs):
+        import multiprocessing
+        ctx = multiprocessing.get_context('fork') \
+              if hasattr(multiprocessing, 'get_context') else multiprocessing
+        rc = self.rc
+        deps, detached = self.dependency_graph()
+        running = {}
+        try:
+            with TRACER.span('execute', 'phase'):
+                for j, plugin in enumerate(self.plugins):
+                    for i in sorted(deps[j]):
+                        if i in running:
+                            self._join(i, running)
+                    name = plugin.__class__.__module__
+                    if not detached[j]:
+                        with TRACER.span(name + '.execute', 'plugin'), \
+                             MEMORY_MONITOR.stage(name + '.execute'):
+                            plugin.execute(rc)
+                        continue
+                    while len(running) >= max(jobs - 1, 1):
+                        self._join(min(running), running)
+                    sys.stdout.flush()
+                    recv, send = ctx.Pipe(duplex=False)
+                    proc = ctx.Process(target=self._fork_execute, 
+                                       args=(plugin, send))
+                    proc.start()
+                    send.close()
+                    running[j] = (proc, recv, name)
+                for i in sorted(running):
+                    self._join(i, running)
         except Exception as e:
+            for proc, conn, name in running.values():
+                proc.terminate()
             self.exit(e)
 
-    def teardown(self):
-        """Preforms all plugin teardown tasks."""
+    def execute(self):
+        """Preforms all plugin executions.  If the 'plugin_jobs' option is 
+        greater than one, independent plugins are executed concurrently, see
+        dependency_graph()."""
         rc = self.rc
+        jobs = rc.plugin_jobs if 'plugin_jobs' in rc else 1
+        if jobs > 1 and hasattr(os, 'fork') and len(self.profilers) == 0:
+            self._execute_concurrently(jobs)
+        else:
+            self._phase('execute', self.plugins)
+
+    def watched(self):
+        """Returns the set of absolute paths of the files which the plugins' 
+        results depend on, see Plugin.watched()."""
+        rc = self.rc
+        paths = set()
+        for plugin in self.plugins:
+            paths.update([os.path.abspath(p) for p in plugin.watched(rc)])
+        return paths
+
+    def invalidate(self, paths):
+        """Invalidates every plugin for changes to the files at the given paths,
+        see Plugin.invalidate().
+
+        Returns
+        -------
+        affected : list of ints
+            The indices of the plugins which asked to be re-executed, along
+            with those of all of the plugins that depend on them according to 
+            dependency_graph().
+
+        """
+        rc = self.rc
+        paths = frozenset([os.path.abspath(p) for p in paths])
+        deps, _ = self.dependency_graph()
+        affected = []
         try:
-            for plugin in self.plugins:
-                plugin.teardown(rc)
+            with TRACER.span('invalidate', 'phase'):
+                for j, plugin in enumerate(self.plugins):
+                    if plugin.invalidate(rc, paths) or \
+                       any([i in affected for i in deps[j]]):
+                        affected.append(j)
         except Exception as e:
             self.exit(e)
+        return affected
+
+    def rerun(self, paths):
+        """Re-executes the plugins which are affected by changes to the files at
+        the given paths, and then tears all of the plugins down, see 
+        invalidate().
+
+        Returns
+        -------
+        modnames : list of str
+            The module names of the plugins which were re-executed.
+
+        """
+        rerun = self.invalidate(paths)
+        self._phase('execute', [self.plugins[j] for j in rerun])
+        self.teardown()
+        return [self.modnames[j] for j in rerun]
+
+    def teardown(self):
+        """Preforms all plugin teardown tasks, in the reverse order of setup so
+        that plugins are torn down before the plugins that they require.  If 
+        tracing, the trace is then written to 'xdress_trace.json' in the build 
+        directory.  If profiling, the stats for each profiled plugin are 
+        written to 'profile/<plugin>.pstats' in the build directory along with
+        a text summary of the top functions in 'profile/<plugin>.txt'."""
+        self._phase('teardown', reversed(self.plugins))
+        rc = self.rc
+        if TRACER.enabled:
+            tracefile = os.path.join(rc.builddir, 'xdress_trace.json')
+            TRACER.dump(tracefile)
+            print("xdress: wrote trace to " + tracefile)
+        self._dump_profiles()
 
     def exit(self, err=0):
         """Exits the process, possibly printing debug info."""
@@ -0,0 +1,333 @@
+"""Long-lived xdress sessions, which keep the run control, the type system, the
+plugins, and their caches loaded between runs.
+
+:author: Anthony Scopatz <scopatz@gmail.com>
+
+Sessions
+========
+Every xdress invocation normally sets up its plugins from scratch: the run
+control and sidecar files are executed, the type system is rebuilt, and the
+caches are loaded from the build directory.  A Session does this once and then
+keeps the plugins set up, so that the descriptions may be computed and the
+wrappers generated again and again for only the cost of what has changed::
+
+    from xdress.session import Session
+
+    s = Session(['--rc', 'xdressrc.py'])
+    env = s.describe()                 # descriptions, keyed by module
+    s.generate()                       # writes the wrappers
+    s.invalidate(['src/hoover.h'])     # forgets what hoover.h went into
+    s.generate(modules=['hoover'])     # regenerates only the hoover module
+
+Plugins are split into two stages.  The describing stage consists of the
+plugins which update the run control, such as autoall and autodescribe.  The
+generating stage consists of the plugins whose writes are all build artifacts,
+such as cythongen, see xdress.plugins.Plugins.dependency_graph().  Each stage
+only re-executes the plugins which have been invalidated since they last ran,
+see xdress.plugins.Plugin.invalidate().  The plugins are torn down after every
+run so that the caches in the build directory are always up to date.
+
+Serving
+=======
+With ``--serve [SOCKET]``, xdress sets up a session and then serves it over a
+Unix domain socket, ``build/xdress.sock`` by default, until it is asked to shut
+down.  This lets the build steps of many packages share one warm process.  The
+requests and responses are single lines of JSON, such as::
+
+    {"op": "invalidate", "paths": ["/abs/path/to/src/hoover.h"]}
+    {"ok": true, "result": ["xdress.autodescribe", "xdress.cythongen"]}
+
+The operations are ``describe``, which returns the names of the API elements in
+each module rather than their full descriptions, ``generate``, which takes
+optional ``modules``, ``invalidate``, which takes optional ``paths``, and
+``shutdown``.  Failures are reported as ``{"ok": false, "error": "..."}``.  The
+request() function is a small client for this protocol.
+
+Session API
+===========
+"""
+from __future__ import print_function
+import os
+import sys
+import json
+import socket
+
+from .utils import FileWatcher
+from .main import load_plugins
+
+if sys.version_info[0] >= 3:
+    basestring = str
+
+DEFAULT_SOCKET = 'xdress.sock'
+"""Default name of the socket file in the build directory."""
+
+class Session(object):
+    """A set of xdress plugins which have been set up once and which may then
+    be run many times.
+    """
+
+    def __init__(self, args=(), plugins=None):
+        """Parameters
+        ----------
+        args : list of str, optional
+            Command line arguments for xdress, such as ['--rc', 'xdressrc.py'].
+            If None, these are taken from sys.argv.
+        plugins : xdress.plugins.Plugins, optional
+            Plugins which have been loaded with args but have not been set up,
+            see xdress.main.load_plugins().
+
+        """
+        self.args = None if args is None else list(args)
+        self.plugins = None
+        self.watcher = FileWatcher()
+        self._load(plugins)
+
+    def _load(self, plugins=None):
+        if plugins is None:
+            plugins = load_plugins(self.args)
+        plugins.setup()
+        self.plugins = plugins
+        self.current = set()
+        self.pending = None
+        self.watcher.watch(plugins.watched())
+
+    @property
+    def rc(self):
+        """The run controller of the plugins."""
+        return self.plugins.rc
+
+    @property
+    def ts(self):
+        """The type system of the plugins."""
+        return self.plugins.rc.ts
+
+    def _execute(self, indices):
+        # executes the plugins which are not current and tears all plugins down
+        plugins = self.plugins
+        rc = self.rc
+        indices = [j for j in indices if j not in self.current]
+        if len(indices) == 0:
+            return []
+        try:
+            for j in indices:
+                plugins._phase('execute', [plugins.plugins[j]])
+                self.current.add(j)
+                writes = plugins.plugins[j].writes
+                writes = writes() if callable(writes) else writes
+                if writes is not None and 'stale_modules' in writes:
+                    stale = rc.stale_modules
+                    self.pending = None if stale is None or self.pending is None\
+                                   else self.pending | set(stale)
+            plugins.teardown()
+        except SystemExit as e:
+            raise RuntimeError(e.code)
+        self.watcher.watch(plugins.watched())
+        return [plugins.modnames[j] for j in indices]
+
+    def describe(self):
+        """Executes the describing plugins which are not up to date.
+
+        Returns
+        -------
+        env : dict
+            The descriptions of the API elements, keyed by module name and then
+            by element name, i.e. rc.env.
+
+        """
+        _, detached = self.plugins.dependency_graph()
+        self._execute([j for j, d in enumerate(detached) if not d])
+        return self.rc.env if 'env' in self.rc else {}
+
+    def generate(self, modules=None):
+        """Describes the API, see describe(), and then executes the generating
+        plugins which are not up to date.
+
+        Parameters
+        ----------
+        modules : list of str, optional
+            The modules to regenerate, even if they are up to date.  By default,
+            only the modules whose descriptions have changed since they were
+            last generated are regenerated.
+
+        Returns
+        -------
+        modnames : list of str
+            The module names of the plugins which were executed.
+
+        """
+        self.describe()
+        _, detached = self.plugins.dependency_graph()
+        gen = [j for j, d in enumerate(detached) if d]
+        if modules is None:
+            self.rc.stale_modules = self.pending
+        else:
+            modules = set(modules)
+            self.current.difference_update(gen)
+            self.rc.stale_modules = modules
+        modnames = self._execute(gen)
+        if modules is None:
+            self.pending = set()
+        elif self.pending is not None:
+            self.pending -= modules
+        return modnames
+
+    def invalidate(self, paths=None):
+        """Forgets the state derived from files which have changed, so that the
+        affected plugins are re-executed by the next describe() or generate().
+        A change to the run control file reloads the session.
+
+        Parameters
+        ----------
+        paths : list of str, optional
+            The paths of the files which have changed.  By default, these are
+            the watched files of the plugins which have changed since the last
+            check, see xdress.plugins.Plugin.watched().
+
+        Returns
+        -------
+        modnames : list of str
+            The module names of the plugins which are now out of date.
+
+        """
+        if paths is None:
+            paths = self.watcher.changed()
+        paths = set([os.path.abspath(p) for p in paths])
+        rcfile = self.rc.rc
+        if isinstance(rcfile, basestring) and os.path.abspath(rcfile) in paths:
+            try:
+                self._load()
+            except SystemExit as e:
+                raise RuntimeError(e.code)
+            return list(self.plugins.modnames)
+        try:
+            affected = self.plugins.invalidate(paths)
+        except SystemExit as e:
+            raise RuntimeError(e.code)
+        self.current.difference_update(affected)
+        return [self.plugins.modnames[j] for j in affected]
+
+    def handle(self, req):
+        """Performs a request of the serving protocol.
+
+        Parameters
+        ----------
+        req : dict
+            The request, with the operation under the 'op' key.
+
+        Returns
+        -------
+        result : JSON-serializable object or None
+
+        """
+        op = req.get('op', None)
+        if op == 'describe':
+            env = self.describe()
+            return dict([(modname, sorted([name for name in mod
+                                           if isinstance(name, basestring)]))
+                         for modname, mod in env.items()])
+        elif op == 'generate':
+            return self.generate(modules=req.get('modules', None))
+        elif op == 'invalidate':
+            return self.invalidate(paths=req.get('paths', None))
+        elif op == 'shutdown':
+            return None
+        raise ValueError("unknown operation {0!r}".format(op))
+
+def _socket_path(rc, path=None):
+    if not path:
+        path = os.path.join(rc.builddir, DEFAULT_SOCKET)
+    return os.path.abspath(path)
+
+def serve(session, path=None):
+    """Serves a session over a Unix domain socket until a shutdown request is
+    received.  Requests are handled one at a time, in the order received.
+
+    Parameters
+    ----------
+    session : Session
+    path : str, optional
+        Path to the socket file, build/xdress.sock by default.
+
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise RuntimeError("serving requires Unix domain sockets")
+    path = _socket_path(session.rc, path)
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except socket.error:
+            os.remove(path)
+        else:
+            raise RuntimeError("xdress is already serving on " + path)
+        finally:
+            probe.close()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(8)
+    print("xdress: serving on " + path)
+    running = True
+    try:
+        while running:
+            conn, _ = server.accept()
+            f = conn.makefile('rwb')
+            try:
+                for line in f:
+                    try:
+                        req = json.loads(line.decode('utf-8'))
+                        resp = {'ok': True, 'result': session.handle(req)}
+                        running = req.get('op', None) != 'shutdown'
+                    except Exception as e:
+                        resp = {'ok': False, 'error': '{0}: {1}'.format(
+                                e.__class__.__name__, e)}
+                    sys.stdout.flush()
+                    f.write((json.dumps(resp) + '\n').encode('utf-8'))
+                    f.flush()
+                    if not running:
+                        break
+            except socket.error:
+                pass
+            finally:
+                f.close()
+                conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.remove(path)
+    print("xdress: stopped serving")
+
+def request(path, op, **kwargs):
+    """Sends a request to an xdress server, see serve().
+
+    Parameters
+    ----------
+    path : str
+        Path to the server's socket file.
+    op : str
+        The operation, 'describe', 'generate', 'invalidate', or 'shutdown'.
+    kwargs : optional
+        The arguments of the operation.  Relative 'paths' are made absolute.
+
+    Returns
+    -------
+    result : object
+        The result of the operation.
+
+    """
+    if kwargs.get('paths', None) is not None:
+        kwargs['paths'] = [os.path.abspath(p) for p in kwargs['paths']]
+    kwargs['op'] = op
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+        f = conn.makefile('rwb')
+        f.write((json.dumps(kwargs) + '\n').encode('utf-8'))
+        f.flush()
+        resp = json.loads(f.readline().decode('utf-8'))
+        f.close()
+    finally:
+        conn.close()
+    if not resp['ok']:
+        raise RuntimeError(resp['error'])
+    return resp['result']
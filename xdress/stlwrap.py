@@ -934,6 +934,11 @@ class XDressPlugin(Plugin):
 
     requires = ('xdress.base', 'xdress.extratypes', 'xdress.dtypes')
 
+    reads = ('make_stlcontainers', 'stlcontainers', 'stlcontainers_module', 
+             'package', 'packagedir', 'testdir', 'ts', 'verbose')
+    writes = ('xdress.stlwrap:wrappers',)
+    """The type system is only modified locally, while generating wrappers."""
+
     defaultrc = RunControl(
         stlcontainers=[],
         #stlcontainers_module='stlcontainers',  # Moved to base plugin
@@ -262,6 +262,7 @@ from numbers import Number
 from pprint import pprint, pformat
 from warnings import warn
 import gzip
+import weakref
 try:
     import cPickle as pickle
 except ImportError:
@@ -271,6 +272,7 @@ from .utils import Arg, flatten, indent, memoize_method, infer_format
 
 if sys.version_info[0] >= 3:
     basestring = str
+    intern = sys.intern
 
 class TypeSystem(object):
     """A class representing a type system.
@@ -1188,6 +1190,7 @@ class TypeSystem(object):
             }, self)
 
         self.typestr = typestring or typestr
+        self._interned = {}
 
     @classmethod
     def empty(cls):
@@ -1415,7 +1418,11 @@ class TypeSystem(object):
 
     @memoize_method
     def canon(self, t):
-        """Turns the type into its canonical form. See module docs for more information."""
+        """Turns the type into its canonical form. See module docs for more information.
+        Canonical types are interned, see intern()."""
+        return self.intern(self._canon(t))
+
+    def _canon(self, t):
         if isinstance(t, basestring):
             if t in self.base_types:
                 return t
@@ -1501,6 +1508,26 @@ class TypeSystem(object):
         else:
             _raise_type_error(t)
 
+    def intern(self, t):
+        """Returns the single shared instance of a type, or of any other nested
+        tuple, that is equal to t.  Interned types take less memory, and
+        comparing them, or looking them up in the memos of this type system,
+        short-circuits on identity rather than walking the tuples.  Unhashable
+        values are returned as is.
+        """
+        if isinstance(t, str):
+            return intern(t)
+        elif type(t) is not tuple:
+            return t
+        interned = self._interned
+        try:
+            return interned[t]
+        except KeyError:
+            t = tuple([self.intern(x) for x in t])
+            return interned.setdefault(t, t)
+        except TypeError:
+            return t
+
     ###########################   C/C++ Methods   #############################
 
     def _cpp_type_add_predicate(self, t, last):
@@ -2642,17 +2669,22 @@ class TypeSystem(object):
     #################### Type system helpers ###################################
 
     def clearmemo(self):
-        """Clears all method memoizations on this type system instance."""
-        # see utils.memozie_method
-        if hasattr(self, '_cache'):
-            self._cache.clear()
+        """Clears all method memoizations on this type system instance, along
+        with its interned types and the flatmatches() memos of type matchers."""
+        # see utils.memoize_method
+        for cache in self.__dict__.get('_cache', {}).values():
+            cache.clear()
+        self._interned.clear()
+        TypeMatcher.clearmemo()
 
     def delmemo(self, meth, *args, **kwargs):
         """Deletes a single key from a method on this type system instance."""
-        # see utils.memozie_method
-        if hasattr(self, '_cache'):
-            meth = getattr(self, meth )if isinstance(meth, basestring) else meth
-            del self._cache[meth.func.meth, args, tuple(sorted(kwargs.items()))]
+        # see utils.memoize_method
+        if isinstance(meth, basestring):
+            meth = getattr(self.__class__, meth)
+        meth = getattr(meth, 'meth', meth)  # memoized methods of instances
+        cache = self.__dict__.get('_cache', {}).get(meth, {})
+        cache.pop(memoize_method.key(args, kwargs), None)
 
     @contextmanager
     def swap_dtypes(self, s):
@@ -2777,9 +2809,33 @@ class TypeMatcher(object):
                 return False
         return True
 
+    _flatmemo = None
+    _memoized = weakref.WeakValueDictionary()  # id -> matchers with a memo
+
+    @classmethod
+    def clearmemo(cls):
+        """Clears the flatmatches() memos of all type matchers."""
+        for tm in list(cls._memoized.values()):
+            tm._flatmemo = None
+        cls._memoized.clear()
+
     def flatmatches(self, t):
         """Flattens t and then sees if any part of it matches self.pattern.
+        The results are remembered for each type, which makes repeated checks
+        of interned types, see TypeSystem.intern(), a single identity lookup.
         """
+        if self._flatmemo is None:
+            self._flatmemo = {}
+            TypeMatcher._memoized[id(self)] = self
+        try:
+            return self._flatmemo[t]
+        except KeyError:
+            m = self._flatmemo[t] = self._flatmatches(t)
+            return m
+        except TypeError:
+            return self._flatmatches(t)
+
+    def _flatmatches(self, t):
         try:
             # See if user gave entire type
             if self.matches(t):
@@ -2911,10 +2967,100 @@ class _LazyImportDict(MutableMapping):
     def __repr__(self):
         return self.__class__.__name__ + "(" + repr(self._d) + ", TypeSystem())"
 
+def _preorder(t, tokens, ends):
+    # flattens t into tokens, where a sequence of length n is the token ('(', n)
+    # followed by its elements, and ends[i] is the index after the i-th subtype.
+    i = len(tokens)
+    ends.append(None)
+    if isinstance(t, (tuple, list)):
+        tokens.append(('(', len(t)))
+        for x in t:
+            _preorder(x, tokens, ends)
+    else:
+        tokens.append(t)
+    ends[i] = len(tokens)
+    return tokens, ends
+
+class _TypeMatcherIndex(object):
+    """A discrimination tree of type matchers, which returns the matchers that
+    may match a type without checking every one of them.  Patterns are stored
+    by their lengths and fixed elements, in order, and MatchAny skips a whole
+    subtype of the type being looked up.  Candidates are returned in the order
+    that they were added.
+    """
+
+    def __init__(self, tms=()):
+        self._root = ({}, [])  # (children by token, matchers ending here)
+        self._order = {}       # matcher -> insertion count
+        self._count = 0
+        for tm in tms:
+            self.add(tm)
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        return iter(sorted(self._order, key=self._order.__getitem__))
+
+    def __contains__(self, tm):
+        return tm in self._order
+
+    def add(self, tm):
+        if tm in self._order:
+            return
+        self._order[tm] = self._count
+        self._count += 1
+        node = self._root
+        for token in _preorder(tm.pattern, [], [])[0]:
+            node = node[0].setdefault(token, ({}, []))
+        node[1].append(tm)
+
+    def remove(self, tm):
+        del self._order[tm]
+        node = self._root
+        for token in _preorder(tm.pattern, [], [])[0]:
+            node = node[0][token]
+        node[1].remove(tm)
+
+    def update(self, tms):
+        for tm in tms:
+            self.add(tm)
+
+    def candidates(self, t):
+        """Returns the matchers which may match the type t."""
+        tokens, ends = _preorder(t, [], [])
+        n = len(tokens)
+        cands = []
+        stack = [(self._root, 0)]
+        while len(stack) > 0:
+            (children, tms), i = stack.pop()
+            if i == n:
+                cands.extend(tms)
+                continue
+            if MatchAny in children:
+                stack.append((children[MatchAny], ends[i]))
+            try:
+                child = children.get(tokens[i], None)
+            except TypeError:
+                child = None  # unhashable, which no pattern can contain
+            if child is not None:
+                stack.append((child, i + 1))
+        if len(cands) > 1:
+            cands.sort(key=self._order.__getitem__)
+        return cands
+
+    def match(self, t):
+        """Returns the first matcher which matches the type t, or None."""
+        for tm in self.candidates(t):
+            if tm.matches(t):
+                return tm
+        return None
+
 class _LazyConverterDict(MutableMapping):
     def __init__(self, items, ts):
         self._d = items if isinstance(items, MutableMapping) else dict(items)
-        self._tms = set([k for k in self._d if isinstance(k, TypeMatcher)])
+        self._tms = _TypeMatcherIndex([k for k in self._d
+                                       if isinstance(k, TypeMatcher)])
         self._ts = ts
 
     def __len__(self):
@@ -2925,12 +3071,11 @@ class _LazyConverterDict(MutableMapping):
             return True  # Check if key is present
         else:
             # check if any TypeMatcher keys actually match
-            for tm in self._tms:
-                if tm.matches(key):
-                    self[key] = self._d[tm]
-                    return True
-            else:
+            tm = self._tms.match(key)
+            if tm is None:
                 return False
+            self[key] = self._d[tm]
+            return True
 
     def __iter__(self):
         for k in self._d:
@@ -2941,13 +3086,11 @@ class _LazyConverterDict(MutableMapping):
             value = self._d[key]  # Check if key is present
         else:
             # check if any TypeMatcher keys actually match
-            for tm in self._tms:
-                if tm.matches(key):
-                    value = self._d[tm]
-                    self[key] = value
-                    break
-            else:
+            tm = self._tms.match(key)
+            if tm is None:
                 raise KeyError("{0} not found".format(key))
+            value = self._d[tm]
+            self[key] = value
         if value is None or value is NotImplemented or callable(value):
             return value
         kw = {'extra_types': _ensuremoddot(self._ts.extra_types),
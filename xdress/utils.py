@@ -12,8 +12,16 @@ import re
 import ast
 import sys
 import glob
+import gc
+import json
+import time
+import sqlite3
+import shutil
+import tempfile
 import functools
+import importlib
 from copy import deepcopy
+from contextlib import contextmanager
 from pprint import pformat
 from collections import Mapping, Iterable, Hashable, Sequence, namedtuple
 from hashlib import md5
@@ -29,11 +37,84 @@ try:
 except ImportError:
     from ._enum import Enum, IntEnum
 
-import numpy as np
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    from concurrent.futures import ProcessPoolExecutor
+except ImportError:
+    ProcessPoolExecutor = None
 
 if sys.version_info[0] >= 3:
     basestring = str
 
+class LazyModule(object):
+    """Stands in for a module until one of its attributes is first accessed, 
+    which is when the module is actually imported."""
+
+    def __init__(self, name):
+        self.__dict__['_lazy_name'] = name
+        self.__dict__['_lazy_module'] = None
+
+    def _lazy_load(self):
+        mod = self.__dict__['_lazy_module']
+        if mod is None:
+            mod = importlib.import_module(self.__dict__['_lazy_name'])
+            self.__dict__['_lazy_module'] = mod
+        return mod
+
+    def __getattr__(self, key):
+        return getattr(self._lazy_load(), key)
+
+    def __setattr__(self, key, value):
+        setattr(self._lazy_load(), key, value)
+
+    def __repr__(self):
+        return "LazyModule({0!r})".format(self.__dict__['_lazy_name'])
+
+def lazy_import(name):
+    """Returns a module that will only be imported when it is first used, or 
+    None if the module cannot be found.  This keeps heavy optional dependencies,
+    such as parser backends, from slowing down startup.  Modules which have 
+    already been imported are returned as is.
+
+    Parameters
+    ----------
+    name : str
+        The absolute name of the module, e.g. 'lxml.etree'.
+
+    Returns
+    -------
+    mod : module, LazyModule, or None
+
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        from importlib.util import find_spec
+    except ImportError:
+        # Python 2, which has no module specs
+        from pkgutil import find_loader as find_spec
+    try:
+        spec = find_spec(name)
+    except (ImportError, ValueError):
+        spec = None
+    return None if spec is None else LazyModule(name)
+
+np = lazy_import('numpy')
+
 DEFAULT_RC_FILE = "xdressrc.py"
 """Default run control file name."""
 
@@ -112,7 +193,7 @@ _c_literal_int = re.compile(r'^([+-]?([1-9][0-9]*|0o?[0-7]+|0x[0-9a-f]+|'
 _c_int_bases = {'0x': 16, '0o': 8, '0b': 2, '0': 8,
                 '00': 8, '01': 8, '02': 8, '03': 8, '04': 8, '05': 8, '06': 8, '07': 8}
 _c_float = re.compile(r'^([+-]?([0-9]+\.[0-9]*|\.[0-9]+)(e[+-]?[0-9]+)?)([lf]?)$')
-_c_float_types = {'': float, 'f': np.float32, 'l': np.longfloat}
+_c_float_types = {'': float, 'f': 'float32', 'l': 'longfloat'}  # numpy names
 
 def c_literal(s):
     """Convert a C/C++ literal to the corresponding Python value."""
@@ -133,7 +214,9 @@ def c_literal(s):
         return int(m.group(1), base)
     m = _c_float.match(lo)
     if m:
-        return _c_float_types[m.group(4)](m.group(1))
+        ftype = _c_float_types[m.group(4)]
+        ftype = getattr(np, ftype) if isinstance(ftype, basestring) else ftype
+        return ftype(m.group(1))
     raise ValueError('unknown literal: {0!r}'.format(s))
 
 def newoverwrite(s, filename, verbose=False):
@@ -536,10 +619,432 @@ def sortedbytype(iterable):
 nyansep = r'~\_/' * 17 + '~=[,,_,,]:3'
 """WAT?!"""
 
+class CacheCounters(object):
+    """Counters and cumulative timings, in seconds, for a single cache layer.
+    By convention the counters include 'hits' and 'misses', and the 'compute'
+    timer holds the time spent producing values on misses while the 'load'
+    timer holds the time spent reading values on hits.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = {}
+        self.times = {}
+
+    def __getitem__(self, counter):
+        return self.counts.get(counter, 0)
+
+    def incr(self, counter, n=1):
+        """Increments a counter."""
+        self.counts[counter] = self.counts.get(counter, 0) + n
+
+    def add_time(self, timer, dt):
+        """Adds dt seconds to a timer."""
+        self.times[timer] = self.times.get(timer, 0.0) + dt
+
+    @contextmanager
+    def timer(self, timer):
+        """Adds the time spent in a with-block to a timer."""
+        t0 = time.time()
+        try:
+            yield
+        finally:
+            self.add_time(timer, time.time() - t0)
+
+    def saved(self):
+        """Estimates the time that hits saved: the number of hits times the
+        mean time to compute a miss, less the time spent loading hits."""
+        hits, misses = self['hits'], self['misses']
+        if hits == 0 or misses == 0 or 'compute' not in self.times:
+            return None
+        return hits * self.times['compute'] / misses - self.times.get('load', 0.0)
+
+    def clear(self):
+        """Resets all counters and timers."""
+        self.counts.clear()
+        self.times.clear()
+
+    def todict(self):
+        """Returns the counters and timers as a JSON-able dict."""
+        return {'counts': dict(self.counts), 'times': dict(self.times),
+                'saved': self.saved()}
+
+CACHE_COUNTERS = {}
+"""The counters of the cache layers in use by this process, by layer name."""
+
+def register_cache_counters(counters):
+    """Registers a layer's counters for cache_report(), replacing any others
+    of the same name."""
+    CACHE_COUNTERS[counters.name] = counters
+    return counters
+
+def cache_report():
+    """Returns a table summarizing the hits, misses, timings, and estimated
+    time saved of every registered cache layer."""
+    lines = ["{0:<16} {1:>8} {2:>8} {3:>6} {4:>10} {5:>10}  {6}".format('cache',
+             'hits', 'misses', 'hit %', 'time [s]', 'saved [s]', 'details')]
+    for name in sorted(CACHE_COUNTERS):
+        c = CACHE_COUNTERS[name]
+        hits, misses = c['hits'], c['misses']
+        rate = '-' if hits + misses == 0 else \
+               '{0:.1f}'.format(100.0 * hits / (hits + misses))
+        saved = c.saved()
+        saved = '-' if saved is None else '{0:.3f}'.format(saved)
+        details = ["{0}={1}".format(k, v) for k, v in sorted(c.counts.items())
+                   if k not in ('hits', 'misses')]
+        details += ["{0}={1:.3f}s".format(k, v) for k, v in sorted(c.times.items())]
+        lines.append("{0:<16} {1:>8} {2:>8} {3:>6} {4:>10.3f} {5:>10}  {6}".format(
+                     name, hits, misses, rate, sum(c.times.values()), saved,
+                     ", ".join(details)))
+    return "\n".join(lines)
+
+def _ensure_pardir(filename):
+    pardir = os.path.dirname(filename)
+    if pardir and not os.path.exists(pardir):
+        os.makedirs(pardir)
+
+def _replace_file(src, dst):
+    # os.replace() is atomic on all platforms, but is py3.3+ only
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+    else:
+        if os.name == 'nt' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+def _stat_key(st):
+    mtime_ns = getattr(st, 'st_mtime_ns', None)
+    if mtime_ns is None:
+        mtime_ns = int(st.st_mtime * 1e9)
+    return (mtime_ns, st.st_size, st.st_ino)
+
+class FileDigests(object):
+    """A process-wide service for the md5 digests of files.  Each file is read
+    and hashed at most once for as long as its (mtime_ns, size, inode) stat
+    info is unchanged.  This table may be persisted to disk so that later
+    runs need not rehash files which have not been touched.
+
+    Files modified within the last couple of seconds are not persisted, since
+    a further write within the same mtime tick would go unnoticed.
+    """
+
+    racy_window = 2.0
+    """Age in seconds below which a digest is only trusted within this run."""
+
+    def __init__(self):
+        self.digests = {}
+        self.cachefile = None
+        self.counters = CacheCounters('file digests')
+
+    @property
+    def hashed(self):
+        """The number of files which have been read and hashed."""
+        return self.counters['misses']
+
+    def load(self, cachefile):
+        """Loads persisted digests from a cachefile, which is also where
+        dump() will write to."""
+        self.cachefile = cachefile
+        if not os.path.isfile(cachefile):
+            return
+        try:
+            with self.counters.timer('load'):
+                with io.open(cachefile, 'rb') as f:
+                    self.digests.update(pickle.load(f))
+        except Exception:
+            pass  # a corrupt table only costs rehashing
+
+    def dump(self):
+        """Atomically writes the persistable digests to the cachefile."""
+        if self.cachefile is None:
+            return
+        t0 = time.time()
+        limit = (t0 - self.racy_window) * 1e9
+        digests = dict([(k, v) for k, v in self.digests.items() if v[0][0] < limit])
+        _ensure_pardir(self.cachefile)
+        tmpfile = self.cachefile + '.tmp'
+        with io.open(tmpfile, 'wb') as f:
+            pickle.dump(digests, f, pickle.HIGHEST_PROTOCOL)
+        _replace_file(tmpfile, self.cachefile)
+        self.counters.add_time('dump', time.time() - t0)
+
+    def digest(self, filename, st=None):
+        """Returns the md5 hexdigest of a file.  The stat info may be passed
+        in if it is already known."""
+        st = os.stat(filename) if st is None else st
+        key = _stat_key(st)
+        path = os.path.abspath(filename)
+        entry = self.digests.get(path, None)
+        if entry is not None and entry[0] == key:
+            self.counters.incr('hits')
+            return entry[1]
+        t0 = time.time()
+        with io.open(filename, 'rb') as f:
+            digest = md5(f.read()).hexdigest()
+        self.counters.add_time('compute', time.time() - t0)
+        self.counters.incr('misses')
+        self.digests[path] = (key, digest)
+        return digest
+
+    def clear(self):
+        """Forgets all digests."""
+        self.digests.clear()
+
+FILE_DIGESTS = FileDigests()
+"""The process-wide file digest service."""
+
+register_cache_counters(FILE_DIGESTS.counters)
+
+def file_digest(filename):
+    """Returns the md5 hexdigest of a file via FILE_DIGESTS."""
+    return FILE_DIGESTS.digest(filename)
+
+def file_fingerprint(filename):
+    """Returns the (mtime, size, md5-hexdigest) of a file, or None if it does
+    not exist."""
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return (st.st_mtime, st.st_size, FILE_DIGESTS.digest(filename, st=st))
+
+def file_fingerprints(filenames):
+    """Returns a dictionary mapping file names to their fingerprints, see
+    file_fingerprint().  Names which are not regular files, such as
+    '<built-in>', are skipped."""
+    fps = {}
+    for filename in filenames:
+        if filename in fps or not os.path.isfile(filename):
+            continue
+        fps[filename] = file_fingerprint(filename)
+    return fps
+
+def check_fingerprints(fps):
+    """Checks whether the files in a mapping of file names to fingerprints are
+    unchanged.  A cheap mtime and size check is performed first, and files are
+    only rehashed if these differ.  Fingerprints of files whose stat info
+    changed but whose contents did not are refreshed in-place.
+
+    Returns
+    -------
+    current : bool
+        Whether all of the files are unchanged.
+    refreshed : bool
+        Whether any of the fingerprints were refreshed.
+
+    """
+    refreshed = False
+    for filename, (mtime, size, digest) in list(fps.items()):
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return False, refreshed
+        if st.st_mtime == mtime and st.st_size == size:
+            continue
+        fp = file_fingerprint(filename)
+        if fp is None or fp[2] != digest:
+            return False, refreshed
+        fps[filename] = fp
+        refreshed = True
+    return True, refreshed
+
+class FileWatcher(object):
+    """Polls a set of files for changes to their (mtime_ns, size, inode) stat
+    info.  Files which do not exist are watched for their creation.
+    """
+
+    def __init__(self, paths=()):
+        """Parameters
+        -------------
+        paths : iterable of str, optional
+            Paths of the files to watch.
+
+        """
+        self.stats = {}
+        self.watch(paths)
+
+    def _stat(self, path):
+        try:
+            return _stat_key(os.stat(path))
+        except OSError:
+            return None
+
+    def watch(self, paths):
+        """Sets the paths of the files to watch.  Changes to files which were
+        already being watched and which have not been seen yet are kept."""
+        stats = {}
+        for path in paths:
+            path = os.path.abspath(path)
+            stats[path] = self.stats[path] if path in self.stats else \
+                          self._stat(path)
+        self.stats = stats
+
+    def changed(self):
+        """Returns the sorted absolute paths of the files which have changed
+        since they were last checked."""
+        changed = []
+        for path, st in self.stats.items():
+            curr = self._stat(path)
+            if curr != st:
+                self.stats[path] = curr
+                changed.append(path)
+        return sorted(changed)
+
+    def wait(self, interval=0.5):
+        """Blocks until some of the files change and returns their paths, see
+        changed().  Once a change is seen, polling continues until a full
+        interval passes without further changes, so that an editor saving
+        several files counts as one change."""
+        changed = self.changed()
+        while len(changed) == 0:
+            time.sleep(interval)
+            changed = self.changed()
+        more = changed
+        while 0 < len(more):
+            time.sleep(interval)
+            more = self.changed()
+            changed = sorted(set(changed) | set(more))
+        return changed
+
+class CacheJournal(object):
+    """Persists a dictionary cache as a compacted pickle plus an append-only
+    journal of the changes made since.  Each change is appended and flushed
+    as soon as it is made, so an interrupted run keeps everything it computed,
+    while the (possibly large) compacted pickle is only rewritten by compact().
+    """
+
+    def __init__(self, cachefile):
+        """Parameters
+        -------------
+        cachefile : str
+            Path to the compacted cachefile.  The journal lives next to it
+            with a '.journal' suffix.
+
+        """
+        self.cachefile = cachefile
+        self.journalfile = cachefile + '.journal'
+        self.nrecords = 0
+        self._f = None
+
+    def load(self):
+        """Reads the compacted cache and replays the journal on top of it.
+        A torn final record, left by a crash mid-write, is truncated away."""
+        cache = {}
+        if os.path.isfile(self.cachefile):
+            with io.open(self.cachefile, 'rb') as f:
+                cache = pickle.load(f)
+        if not os.path.isfile(self.journalfile):
+            return cache
+        with io.open(self.journalfile, 'r+b') as f:
+            good = 0
+            size = os.fstat(f.fileno()).st_size
+            while good < size:
+                try:
+                    key, entry = pickle.load(f)
+                except Exception:
+                    # anything past the last good record is a torn tail, which
+                    # is usually an EOFError, and which the next append()
+                    # would otherwise be glued onto
+                    f.truncate(good)
+                    break
+                good = f.tell()
+                self.nrecords += 1
+                if entry is None:
+                    cache.pop(key, None)
+                else:
+                    cache[key] = entry
+        return cache
+
+    def append(self, key, entry):
+        """Records that key was set to entry, or deleted if entry is None."""
+        if self._f is None:
+            _ensure_pardir(self.journalfile)
+            self._f = io.open(self.journalfile, 'ab')
+        pickle.dump((key, entry), self._f, pickle.HIGHEST_PROTOCOL)
+        self._f.flush()
+        self.nrecords += 1
+
+    def compact(self, cache):
+        """Atomically rewrites the cachefile from cache and removes the
+        journal.  Nothing is written if there have been no changes."""
+        self.close()
+        if self.nrecords == 0 and os.path.isfile(self.cachefile):
+            return
+        _ensure_pardir(self.cachefile)
+        tmpfile = self.cachefile + '.tmp'
+        with io.open(tmpfile, 'wb') as f:
+            pickle.dump(cache, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace_file(tmpfile, self.cachefile)
+        if os.path.exists(self.journalfile):
+            os.remove(self.journalfile)
+        self.nrecords = 0
+
+    def close(self):
+        """Closes the journal file, if open."""
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+_SQLITE_HEADER = b'SQLite format 3\x00'
+
+def _open_cache_db(cachefile, table):
+    """Opens (creating if needed) an sqlite3 database with a single key-entry
+    table.  A cachefile in the older pickle-and-journal format is migrated.
+    A corrupt database is discarded, since it is only a cache."""
+    legacy = None
+    if os.path.isfile(cachefile):
+        with io.open(cachefile, 'rb') as f:
+            header = f.read(len(_SQLITE_HEADER))
+        if header != _SQLITE_HEADER:
+            try:
+                legacy = CacheJournal(cachefile).load()
+            except Exception:
+                legacy = {}
+            os.remove(cachefile)
+            if os.path.isfile(cachefile + '.journal'):
+                os.remove(cachefile + '.journal')
+    _ensure_pardir(cachefile)
+    try:
+        db = _connect_cache_db(cachefile, table)
+    except sqlite3.DatabaseError:
+        for ext in ('', '-wal', '-shm'):
+            if os.path.isfile(cachefile + ext):
+                os.remove(cachefile + ext)
+        db = _connect_cache_db(cachefile, table)
+    if legacy:
+        sql = 'INSERT OR REPLACE INTO {0} VALUES (?, ?, ?)'.format(table)
+        db.executemany(sql, [(repr(k), _blob(k), _blob(v)) for k, v in
+                             legacy.items()])
+        db.commit()
+    return db
+
+def _connect_cache_db(cachefile, table):
+    db = sqlite3.connect(cachefile)
+    # WAL with normal syncing makes each commit a cheap append which survives
+    # the process dying, rather than an fsync'd rewrite.
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.execute('CREATE TABLE IF NOT EXISTS {0} (key TEXT PRIMARY KEY, '
+               'pkey BLOB, entry BLOB)'.format(table))
+    db.commit()
+    return db
+
+def _blob(obj):
+    return sqlite3.Binary(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+
 class DescriptionCache(object):
     """A quick persistent cache for descriptions from files.
     The keys are (classname, filename, kind) tuples.  The values are
-    (hashes-of-the-file, description-dictionary) tuples."""
+    (hashes-of-the-file, description-dictionary, dependency-fingerprints)
+    tuples, where the dependencies are the transitive includes of the
+    translation unit that the description came from.
+
+    The cache is stored in an sqlite3 database.  Opening it reads nothing;
+    each entry is fetched from disk on first access and each change is
+    committed as it is made, so an interrupted run keeps its work.
+    """
 
     def __init__(self, cachefile=os.path.join('build', 'desc.cache')):
         """Parameters
@@ -549,58 +1054,337 @@ class DescriptionCache(object):
 
         """
         self.cachefile = cachefile
-        if os.path.isfile(cachefile):
-            with io.open(cachefile, 'rb') as f:
-                self.cache = pickle.load(f)
-        else:
-            self.cache = {}
+        self.cache = {}  # entries which have been fetched, by key
+        self.counters = register_cache_counters(CacheCounters('descriptions'))
+        with self.counters.timer('open'):
+            self.db = _open_cache_db(cachefile, 'descs')
 
     def _hash_srcfiles(self, srcfiles):
-        hashes = []
-        for srcfile in srcfiles:
-            with io.open(srcfile, 'rb') as f:
-                filebytes = f.read()
-            hashes.append(md5(filebytes).hexdigest())
-        return tuple(hashes)
-
-    def isvalid(self, name, kind):
+        return tuple([file_digest(srcfile) for srcfile in srcfiles])
+
+    def _entry(self, key):
+        if key in self.cache:
+            return self.cache[key]
+        with self.counters.timer('load'):
+            row = self.db.execute('SELECT entry FROM descs WHERE key = ?',
+                                  (repr(key),)).fetchone()
+            if row is None:
+                return None
+            entry = self.cache[key] = pickle.loads(bytes(row[0]))
+        return entry
+
+    def isvalid(self, name, kind, context=None):
         """Boolean on whether the cach value for a (apiname, kind)
-        tuple matches the state of the file on the system."""
+        tuple matches the state of the file and its includes on the system.
+        If a context is given and there is a shared cache, a missing or stale
+        entry is looked up there as well, see fetch_shared()."""
         key = tuple(name) + (kind,)
-        if key not in self.cache:
+        entry = self._entry(key)
+        if entry is not None and len(entry) == 3:
+            cachehashes, _, deps = entry
+            with self.counters.timer('validate'):
+                currhashes = self._hash_srcfiles(name.srcfiles)
+                valid = cachehashes == currhashes and check_fingerprints(deps)[0]
+            if valid:
+                self.counters.incr('hits')
+                return True
+            self.counters.incr('stale')
+        if context is not None and self.fetch_shared(name, kind, context):
+            self.counters.incr('hits')
+            self.counters.incr('shared hits')
+            return True
+        self.counters.incr('misses')
+        return False
+
+    def _shared_key(self, name, kind, context):
+        return SharedCache.key('desc', name.srcname, kind, name.language,
+                               self._hash_srcfiles(name.srcfiles), context)
+
+    def fetch_shared(self, name, kind, context):
+        """Looks up a description in the shared cache by the contents of its
+        source files, the name and kind, and a context -- a hashable summary of
+        the parsers, flags, etc. that the description was computed with.  On a
+        hit whose dependencies match the files here, the description is added
+        to this cache and True is returned."""
+        if SHARED_CACHE is None:
             return False
-        cachehashes = self.cache[key][0]
-        currhashes = self._hash_srcfiles(name.srcfiles)
-        return cachehashes == currhashes
+        value = SHARED_CACHE.get(self._shared_key(name, kind, context))
+        if value is None:
+            return False
+        desc, deps = value
+        if not check_digests(deps):
+            return False
+        desc = dict(desc)
+        desc['name'] = dict(zip(name._fields, name))
+        self.set((name, kind), desc, dependencies=deps.keys())
+        return True
 
     def __getitem__(self, key):
         if len(key) == 2 and isinstance(key[0], apiname):
             key = tuple(key[0]) + key[1:]
-        return self.cache[key][1]  # return the description only
+        entry = self._entry(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry[1]  # return the description only
 
     def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value, dependencies=(), context=None):
+        """Sets a description along with the paths of the files which the
+        description depends on, i.e. the transitive includes of its
+        translation unit.  Changes to any of these invalidate the entry.
+        If a context is given, the description is also stored in the shared
+        cache, if any, see fetch_shared()."""
         if len(key) == 2 and isinstance(key[0], apiname):
             name, kind = key
             key = tuple(key[0]) + key[1:]
         else:
             name, kind = apiname(*key[0]), key[1]
+        t0 = time.time()
         currhashes = self._hash_srcfiles(name.srcfiles)
-        self.cache[key] = (currhashes, value)
+        entry = (currhashes, value, file_fingerprints(dependencies))
+        self.cache[key] = entry
+        self.db.execute('INSERT OR REPLACE INTO descs VALUES (?, ?, ?)',
+                        (repr(key), _blob(key), _blob(entry)))
+        self.db.commit()
+        self.counters.add_time('store', time.time() - t0)
+        if context is not None and SHARED_CACHE is not None:
+            desc = dict(value)
+            desc.pop('name', None)  # the apiname is specific to a project
+            SHARED_CACHE.put(self._shared_key(name, kind, context),
+                             (desc, file_digests(dependencies)))
 
     def __delitem__(self, key):
+        if len(key) == 2 and isinstance(key[0], apiname):
+            key = tuple(key[0]) + key[1:]
+        if self._entry(key) is None:
+            raise KeyError(key)
         del self.cache[key]
+        self.db.execute('DELETE FROM descs WHERE key = ?', (repr(key),))
+        self.db.commit()
+
+    def dependencies(self, name, kind):
+        """Returns the paths of the files which the cached description of an
+        (apiname, kind) depends on, or an empty list if there is none."""
+        entry = self._entry(tuple(name) + (kind,))
+        if entry is None or len(entry) < 3:
+            return []
+        return list(entry[2].keys())
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM descs').fetchone()[0]
+
+    def items(self):
+        """Iterates over all (key, entry) pairs, reading them from disk."""
+        for pkey, entry in self.db.execute('SELECT pkey, entry FROM descs'):
+            yield pickle.loads(bytes(pkey)), pickle.loads(bytes(entry))
 
     def dump(self):
-        """Writes the cache out to the filesystem."""
-        if not os.path.exists(self.cachefile):
-            pardir = os.path.split(self.cachefile)[0]
-            if not os.path.exists(pardir):
-                os.makedirs(pardir)
-        with io.open(self.cachefile, 'wb') as f:
-            pickle.dump(self.cache, f, pickle.HIGHEST_PROTOCOL)
+        """Checkpoints the cache database into its main file.  Changes are
+        already committed as they are made, so this need only be called once,
+        at the end of a run."""
+        with self.counters.timer('dump'):
+            self.db.commit()
+            self.db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        """Closes the cache database."""
+        self.db.close()
 
     def __str__(self):
-        return pformat(self.cache)
+        return pformat(dict(self.items()))
+
+def file_digests(filenames):
+    """Returns a dictionary mapping the names of regular files to their md5
+    digests.  Unlike fingerprints, these are independent of where and when
+    the files were written."""
+    return dict([(f, file_digest(f)) for f in filenames if os.path.isfile(f)])
+
+def check_digests(digests):
+    """Whether all of the files in a mapping of file names to md5 digests
+    exist and have these contents."""
+    for filename, digest in digests.items():
+        if not os.path.isfile(filename) or file_digest(filename) != digest:
+            return False
+    return True
+
+class SharedCache(object):
+    """A content-addressed cache directory which may be shared between
+    projects, concurrent jobs, and CI workers.  Entries are immutable and are
+    written to a temporary file which is atomically renamed into place, so
+    readers never see partial entries and racing writers of the same key are
+    harmless.  Readers and writers hold a shared lock on the directory while
+    eviction holds an exclusive one.  Reading an entry touches it, so that
+    evict() removes the least recently used entries first.
+    """
+
+    def __init__(self, dirname):
+        """Parameters
+        -------------
+        dirname : str
+            Path to the shared cache directory, created if needed.
+
+        """
+        self.dirname = dirname
+        self.objdir = os.path.join(dirname, 'objects')
+        self.lockfile = os.path.join(dirname, 'lock')
+        self.counters = CacheCounters('shared cache')
+        try:
+            os.makedirs(self.objdir)
+        except OSError:
+            if not os.path.isdir(self.objdir):
+                raise
+
+    @property
+    def hits(self):
+        return self.counters['hits']
+
+    @property
+    def misses(self):
+        return self.counters['misses']
+
+    @property
+    def writes(self):
+        return self.counters['writes']
+
+    @staticmethod
+    def key(*parts):
+        """Computes a content address from the repr of the given parts, which
+        should be plain tuples, strings, numbers, etc."""
+        return md5(repr(parts).encode('utf-8')).hexdigest()
+
+    def path(self, key, ext=''):
+        """The path to the entry for key with a file extension."""
+        return os.path.join(self.objdir, key[:2], key[2:] + ext)
+
+    @contextmanager
+    def lock(self, exclusive=False):
+        """Holds the directory lock, if file locking is available."""
+        if fcntl is None:
+            yield
+            return
+        with io.open(self.lockfile, 'ab') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _touch(self, path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _write(self, path, writer):
+        _ensure_pardir(path)
+        fd, tmpfile = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with io.open(fd, 'wb') as f:
+                writer(f)
+            _replace_file(tmpfile, path)
+        except Exception:
+            if os.path.exists(tmpfile):
+                os.remove(tmpfile)
+            raise
+        self.counters.incr('writes')
+
+    def get(self, key):
+        """Returns the object stored under key, or None."""
+        path = self.path(key, '.pkl')
+        with self.counters.timer('load'), self.lock():
+            try:
+                with io.open(path, 'rb') as f:
+                    value = pickle.load(f)
+            except Exception:
+                self.counters.incr('misses')
+                return None
+            self._touch(path)
+        self.counters.incr('hits')
+        return value
+
+    def put(self, key, value):
+        """Stores a picklable object under key."""
+        with self.counters.timer('store'), self.lock():
+            self._write(self.path(key, '.pkl'),
+                        lambda f: pickle.dump(value, f, pickle.HIGHEST_PROTOCOL))
+
+    def get_file(self, key, ext, dest):
+        """Copies the file stored under key and ext to dest.  Returns whether
+        the file was present."""
+        path = self.path(key, ext)
+        with self.counters.timer('load'), self.lock():
+            if not os.path.isfile(path):
+                return False
+            _ensure_pardir(dest)
+            shutil.copyfile(path, dest)
+            self._touch(path)
+        return True
+
+    def put_file(self, key, ext, src):
+        """Stores a copy of the file src under key and ext."""
+        with self.counters.timer('store'), self.lock():
+            with io.open(src, 'rb') as s:
+                self._write(self.path(key, ext),
+                            lambda f: shutil.copyfileobj(s, f))
+
+    def entries(self):
+        """Returns a list of (mtime, size, path) tuples for every entry.  Entries
+        are touched whenever they are read, so the mtime is the time of last use."""
+        entries = []
+        for root, dirs, files in os.walk(self.objdir):
+            for f in files:
+                path = os.path.join(root, f)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def size(self):
+        """The total size of all entries, in bytes."""
+        return sum([e[1] for e in self.entries()])
+
+    def evict(self, maxbytes):
+        """Removes the least recently used entries until the cache takes up
+        no more than maxbytes.  Stale temporary files are removed as well.
+
+        Returns
+        -------
+        nremoved : int
+            Number of files removed.
+        nbytes : int
+            Number of bytes freed.
+
+        """
+        nremoved = nbytes = 0
+        with self.lock(exclusive=True):
+            entries = sorted(self.entries())
+            total = sum([e[1] for e in entries])
+            for mtime, size, path in entries:
+                if total <= maxbytes and not path.endswith('.tmp'):
+                    continue
+                os.remove(path)
+                total -= size
+                nremoved += 1
+                nbytes += size
+        return nremoved, nbytes
+
+SHARED_CACHE = None
+"""The SharedCache used by this process, if any; see set_shared_cache()."""
+
+def set_shared_cache(dirname):
+    """Sets up the process-wide shared cache in a directory, or disables it if
+    dirname is None or empty."""
+    global SHARED_CACHE
+    SHARED_CACHE = SharedCache(dirname) if dirname else None
+    if SHARED_CACHE is None:
+        CACHE_COUNTERS.pop('shared cache', None)
+    else:
+        register_cache_counters(SHARED_CACHE.counters)
+    return SHARED_CACHE
 
 def merge_descriptions(descriptions):
     """Given a sequence of descriptions, in order of increasing precedence,
@@ -710,34 +1494,380 @@ def memoize(obj):
             return obj(*args, **kwargs)
     return memoizer
 
+_KWARGS_MARK = object()
+
+def _class_lookup(cls, name):
+    # finds an attribute in the class dicts of the MRO, without binding it
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            return klass.__dict__[name]
+    return None
+
 class memoize_method(object):
     """Decorator suitable for memoizing methods, rather than functions
-    and classes.  This is based off of code that may be found at
+    and classes.  The first time the method is looked up on an instance, a
+    memoized version bound to that instance is stored in the instance's
+    __dict__, under each name which resolves to this method on the instance's
+    class, so that later lookups do not go through this descriptor at all.
+    Overrides in subclasses are therefore never shadowed, and their calls
+    through super() simply rebind the memo.  Each method has its own cache
+    dict, which is kept in the instance's ``_cache`` dict under the undecorated
+    function and keyed by key().  Calls whose arguments are not hashable are
+    not memoized.  This is originally based off of code that may be found at
     http://code.activestate.com/recipes/577452-a-memoize-decorator-for-instance-methods/
-    This code was originally released under the MIT license.
+    which was released under the MIT license.
     """
     def __init__(self, meth):
         self.meth = meth
+        self._names = {}
+
+    def names(self, cls):
+        """The names which resolve to this descriptor on cls, aliases included.
+        These are found by scanning the class dicts of the MRO, rather than
+        through __set_name__(), which Python 2 never calls."""
+        names = self._names.get(cls)
+        if names is None:
+            names = set()
+            for klass in cls.__mro__:
+                for name, value in klass.__dict__.items():
+                    if value is self and _class_lookup(cls, name) is self:
+                        names.add(name)
+            names = self._names[cls] = tuple(sorted(names))
+        return names
+
+    @staticmethod
+    def key(args, kwargs):
+        """The cache key for the given positional and keyword arguments."""
+        if not kwargs:
+            return args
+        return args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
 
     def __get__(self, obj, objtype=None):
         if obj is None:
             return self.meth
-        p = functools.partial(self, obj)
-        p.__doc__ = self.meth.__doc__
-        p.__name__ = self.meth.__name__
-        return p
-
-    def __call__(self, *args, **kwargs):
-        obj = args[0]
-        cache = obj._cache = getattr(obj, '_cache', {})
-        key = (self.meth, args[1:], tuple(sorted(kwargs.items())))
-        hashable = ishashable(key)
-        if hashable:
-            if key not in cache:
-                cache[key] = self.meth(*args, **kwargs)
-            return cache[key]
-        else:
-            return self.meth(*args, **kwargs)
+        meth = self.meth
+        caches = obj.__dict__.setdefault('_cache', {})
+        cache = caches.setdefault(meth, {})
+        def memoized(*args, **kwargs):
+            key = args if not kwargs else \
+                  args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+            try:
+                return cache[key]
+            except KeyError:
+                value = cache[key] = meth(obj, *args, **kwargs)
+                return value
+            except TypeError:
+                # unhashable arguments
+                return meth(obj, *args, **kwargs)
+        memoized.__name__ = meth.__name__
+        memoized.__doc__ = meth.__doc__
+        memoized.meth = meth
+        for name in self.names(type(obj)):
+            obj.__dict__[name] = memoized
+        return memoized
+
+#
+# Tracing
+#
+
+def _cpu_time():
+    if hasattr(time, 'process_time'):
+        return time.process_time()
+    t = os.times()
+    return t[0] + t[1]
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MB, or None if
+    this is not available on this platform."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on Mac, kilobytes elsewhere
+    return rss / 2.0**20 if sys.platform == 'darwin' else rss / 2.0**10
+
+class Tracer(object):
+    """Records nested spans of wall time, along with the CPU time and the peak
+    RSS at their end, as Chrome trace events.  The output of dump() may be
+    viewed in chrome://tracing or https://ui.perfetto.dev.  Spans cost next to
+    nothing while the tracer is disabled, which is the default.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+
+    def enable(self):
+        """Clears any previous events and starts recording."""
+        self.enabled = True
+        del self.events[:]
+
+    @contextmanager
+    def span(self, name, cat='xdress', **args):
+        """Records the time spent in a with-block as a complete event.
+
+        Parameters
+        ----------
+        name : str
+            The name of the span, e.g. an apiname.
+        cat : str, optional
+            The category of the span, e.g. the plugin.
+        args : optional
+            Extra information to attach to the event.
+
+        """
+        if not self.enabled:
+            yield
+            return
+        t0 = time.time()
+        c0 = _cpu_time()
+        try:
+            yield
+        finally:
+            args['cpu_ms'] = round(1e3 * (_cpu_time() - c0), 3)
+            args['peak_rss_mb'] = peak_rss_mb()
+            self.events.append({'name': str(name), 'cat': cat, 'ph': 'X',
+                                'ts': int(t0 * 1e6),
+                                'dur': int((time.time() - t0) * 1e6),
+                                'pid': os.getpid(), 'tid': 0, 'args': args})
+
+    def dump(self, filename):
+        """Writes the events as Chrome trace-event JSON.  Processes other than
+        this one are labeled as workers."""
+        pid = os.getpid()
+        meta = [{'name': 'process_name', 'ph': 'M', 'pid': p, 'tid': 0,
+                 'args': {'name': 'xdress' if p == pid else 'xdress worker'}}
+                for p in sorted(set([e['pid'] for e in self.events]))]
+        _ensure_pardir(filename)
+        with io.open(filename, 'w') as f:
+            f.write(u'' + json.dumps({'traceEvents': meta + self.events,
+                                      'displayTimeUnit': 'ms'}))
+
+TRACER = Tracer()
+"""The process-wide tracer, enabled by --timings."""
+
+def _traced_call(func_arg):
+    # runs in a worker, and sends the worker's events back along with the result
+    func, arg = func_arg
+    mark = len(TRACER.events)
+    result = func(arg)
+    return result, TRACER.events[mark:]
+
+#
+# Memory
+#
+
+def current_rss_mb():
+    """Returns the current resident set size of this process in MB.  Where
+    this is not available, the peak RSS is returned instead, or None."""
+    try:
+        with io.open('/proc/self/statm', 'rb') as f:
+            npages = int(f.read().split()[1])
+        return npages * os.sysconf('SC_PAGE_SIZE') / 2.0**20
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        return peak_rss_mb()
+
+class MemoryMonitor(object):
+    """Accounts for the memory used by stages of the pipeline (plugin phases,
+    parser calls) and enforces an optional memory budget.
+
+    Accounting uses tracemalloc, and so only covers memory allocated by Python
+    in this process, and only once start() has been called.  The budget is
+    checked against the RSS of the process at the start of every stage; when
+    it comes within soft_fraction of max_mb, all of the registered relievers
+    (e.g. cache evictions) are called before carrying on.  Since freed memory
+    is rarely returned to the operating system, the relievers are only called
+    again once the RSS has grown by regrowth_fraction of max_mb since they
+    last were, or after it has dropped back below the soft limit.
+    """
+
+    def __init__(self, max_mb=None, soft_fraction=0.8, regrowth_fraction=0.05):
+        """Parameters
+        ----------
+        max_mb : float, optional
+            The memory budget in MB, None for no budget.
+        soft_fraction : float, optional
+            The fraction of the budget at which relievers are called.
+        regrowth_fraction : float, optional
+            The fraction of the budget by which the RSS must grow after the
+            relievers were called before they are called again.
+
+        """
+        self.max_mb = max_mb
+        self.soft_fraction = soft_fraction
+        self.regrowth_fraction = regrowth_fraction
+        self._relieved_rss = None
+        self.relievers = {}
+        self.records = []
+        self.nrelieved = 0
+        self._stack = []
+        self._nstages = 0
+        self._warned = False
+
+    @property
+    def tracing(self):
+        return tracemalloc is not None and tracemalloc.is_tracing()
+
+    def start(self):
+        """Starts tracemalloc-based accounting, if available."""
+        if tracemalloc is None:
+            warn("tracemalloc is not available, memory will not be accounted "
+                 "for", RuntimeWarning)
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        """Stops accounting, the records are kept."""
+        if self.tracing:
+            tracemalloc.stop()
+        del self._stack[:]
+
+    def add_reliever(self, name, func):
+        """Registers a function, taking no arguments, which frees memory when
+        the budget is nearly reached.  Registering a name again replaces the
+        previous function."""
+        self.relievers[name] = func
+
+    def check(self, where=''):
+        """Calls the relievers if the RSS is nearly over budget.  Returns the 
+        names of the relievers that were called."""
+        if self.max_mb is None:
+            return []
+        rss = current_rss_mb()
+        if rss is None:
+            return []
+        if rss < self.soft_fraction * self.max_mb:
+            self._relieved_rss = None
+            return []
+        if self._relieved_rss is not None and \
+           rss < self._relieved_rss + self.regrowth_fraction * self.max_mb:
+            return []
+        names = sorted(self.relievers.keys())
+        for name in names:
+            self.relievers[name]()
+        gc.collect()
+        self.nrelieved += 1
+        rss = self._relieved_rss = current_rss_mb()
+        if rss > self.max_mb and not self._warned:
+            self._warned = True
+            warn("xdress is using {0:.1f} MB, over max_memory_mb={1} even after "
+                 "freeing caches at {2}".format(rss, self.max_mb, where), 
+                 RuntimeWarning)
+        return names
+
+    @contextmanager
+    def stage(self, name):
+        """Checks the budget and then records the memory allocated by, and the 
+        peak memory during, a with-block."""
+        self.check(name)
+        if not self.tracing:
+            yield
+            return
+        cur, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        rec = {'name': str(name), 'start': cur, 'peak': cur, 
+               'depth': len(self._stack), 'seq': self._nstages}
+        self._nstages += 1
+        self._stack.append(rec)
+        try:
+            yield
+        finally:
+            if self.tracing:
+                cur, peak = tracemalloc.get_traced_memory()
+                rec['peak'] = max(rec['peak'], peak)
+                rec['end'] = cur
+                if self._stack and self._stack[-1] is rec:
+                    self._stack.pop()
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], 
+                                                  rec['peak'])
+                self.records.append(rec)
+
+    def report(self):
+        """Returns a table of the recorded stages, in the order they started.
+        Nested stages are indented."""
+        lines = ["{0:<48} {1:>10} {2:>10} {3:>10}".format('stage', 'start [MB]',
+                 'delta [MB]', 'peak [MB]')]
+        mb = 2.0**20
+        for rec in sorted(self.records, key=lambda r: r['seq']):
+            lines.append("{0:<48} {1:>10.1f} {2:>+10.1f} {3:>10.1f}".format(
+                         '  ' * rec['depth'] + rec['name'], rec['start'] / mb, 
+                         (rec['end'] - rec['start']) / mb, rec['peak'] / mb))
+        if self.max_mb is not None:
+            lines.append("max_memory_mb={0}, relieved {1} times, current RSS "
+                         "{2:.1f} MB".format(self.max_mb, self.nrelieved, 
+                                             current_rss_mb() or 0.0))
+        return '\n'.join(lines)
+
+MEMORY_MONITOR = MemoryMonitor()
+"""The process-wide memory monitor, accounting is started by --debug and the
+budget is set by max_memory_mb."""
+
+#
+# Parallelism
+#
+
+def _fork_pool(jobs):
+    """Returns a process pool executor whose workers are forked from the current
+    process, or None if this is not possible on this platform."""
+    if ProcessPoolExecutor is None or not hasattr(os, 'fork'):
+        return None
+    kwargs = {}
+    if sys.version_info[:2] >= (3, 7):
+        import multiprocessing
+        kwargs['mp_context'] = multiprocessing.get_context('fork')
+    elif sys.version_info[0] >= 3:
+        import multiprocessing
+        if multiprocessing.get_start_method(allow_none=True) not in (None, 'fork'):
+            return None
+    return ProcessPoolExecutor(max_workers=jobs, **kwargs)
+
+def parallel_imap(func, args, jobs=1):
+    """Lazily applies a function to each element of args, possibly in a pool
+    of worker processes.  The results are always yielded in the same order as
+    the arguments, so that merging them is as deterministic as a serial run.
+
+    Workers are forked from the current process and so inherit its module
+    level state, such as the type system.  The work is performed serially if
+    jobs is less than two, if there is only one argument, or if a forking
+    process pool is not available (e.g. concurrent.futures is not installed).
+
+    Parameters
+    ----------
+    func : callable
+        A module level (i.e. picklable) function of one argument.
+    args : sequence
+        Picklable arguments to call func with.
+    jobs : int, optional
+        Maximum number of worker processes.
+
+    Yields
+    ------
+    result : object
+        The return values of func, in the order of args.
+
+    """
+    args = list(args)
+    jobs = min(jobs or 1, len(args))
+    pool = _fork_pool(jobs) if 1 < jobs else None
+    if pool is None:
+        if 1 < jobs:
+            warn("a forking process pool is unavailable, running serially",
+                 RuntimeWarning)
+        for arg in args:
+            yield func(arg)
+        return
+    with pool:
+        if not TRACER.enabled:
+            for result in pool.map(func, args):
+                yield result
+            return
+        for result, events in pool.map(_traced_call, [(func, a) for a in args]):
+            TRACER.events.extend(events)
+            yield result
 
 
 #
@@ -2,6 +2,9 @@
 """
 
 import re
+import sys
+import types
+import importlib
 from collections import namedtuple
 
 class version_info(namedtuple('version_info', ['major', 'minor', 'micro', 'extra'])):
@@ -31,7 +34,9 @@ def report_versions():
             "NumPy (optional): {numpy_version}\n"
             "Cython (optional): {cython_version}"
             )
-    return vstr.format(**globals())
+    vers = dict([(name + '_version', dependency_version(name))
+                 for name in _DEPENDENCIES])
+    return vstr.format(xdress_version=xdress_version, **vers)
 
 #
 # XDress
@@ -41,65 +46,70 @@ xdress_version = '0.5-dev'
 xdress_version_info = version_info(0, 5, 0, 'dev')
 
 #
-# pycparser
+# Optional dependencies
 #
 
-try:
-    import pycparser
-except ImportError:
-    pycparser = None
+# maps names to (module, distribution) names
+_DEPENDENCIES = {
+    'pycparser': ('pycparser', 'pycparser'),
+    'numpy': ('numpy', 'numpy'),
+    'cython': ('Cython', 'Cython'),
+    'lxml': ('lxml.etree', 'lxml'),
+    }
 
-if pycparser is None:
-    pycparser_version = None
-    pycparser_version_info = version_info()
-else:
-    pycparser_version = pycparser.__version__
-    pycparser_version_info = version_parser(pycparser_version)
+_dependency_versions = {}
 
-#
-# numpy
-#
-
-try:
-    import numpy
-except ImportError:
-    numpy = None
-
-if numpy is None:
-    numpy_version = None
-    numpy_version_info = version_info()
-else:
-    numpy_version = numpy.__version__
-    numpy_version_info = version_parser(numpy_version)
-
-#
-# Cython
-#
-
-try:
-    import Cython
-except ImportError:
-    Cython = None
-
-if Cython is None:
-    cython_version = None
-    cython_version_info = version_info()
-else:
-    cython_version = Cython.__version__
-    cython_version_info = version_parser(cython_version)
-
-#
-# lxml
-#
-
-try:
-    import lxml.etree
-except ImportError:
-    lxml = None
-
-if lxml is None:
-    lxml_version = None
-    lxml_version_info = version_info()
-else:
-    lxml_version = lxml.etree.__version__
-    lxml_version_info = version_parser(lxml_version)
+def dependency_version(name):
+    """Returns the version string of an optional dependency, e.g. 'numpy', or
+    None if it is not installed.  This is read from the installed package's
+    metadata where possible, otherwise the dependency is imported.
+    """
+    if name not in _dependency_versions:
+        modname, distname = _DEPENDENCIES[name]
+        ver = None
+        try:
+            from importlib import metadata
+        except ImportError:
+            metadata = None
+        if metadata is not None:
+            try:
+                ver = metadata.version(distname)
+            except metadata.PackageNotFoundError:
+                pass
+        if ver is None:
+            try:
+                ver = importlib.import_module(modname).__version__
+            except ImportError:
+                pass
+        _dependency_versions[name] = ver
+    return _dependency_versions[name]
+
+def _dependency_attr(attr):
+    name, sep, rest = attr.partition('_version')
+    if name not in _DEPENDENCIES or len(sep) == 0 or rest not in ('', '_info'):
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(
+                             __name__, attr))
+    ver = dependency_version(name)
+    if len(rest) == 0:
+        return ver
+    return version_info() if ver is None else version_parser(ver)
+
+def __getattr__(attr):
+    """Looks up the <dependency>_version and <dependency>_version_info
+    attributes, e.g. numpy_version, on first access so that importing xdress 
+    does not import all of its optional dependencies."""
+    return _dependency_attr(attr)
+
+if sys.version_info[:2] < (3, 7):
+    # module-level __getattr__ is not supported, so this module is stood in for
+    # by one whose class supports it
+    class _VersionModule(types.ModuleType):
+        def __getattr__(self, attr):
+            return _dependency_attr(attr)
+
+    _module = _VersionModule(__name__, __doc__)
+    _module.__dict__.update(globals())
+    # keeps the original module, and so the globals of the functions above,
+    # alive on Python 2
+    _module._original_module = sys.modules[__name__]
+    sys.modules[__name__] = _module